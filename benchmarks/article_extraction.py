@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Article extraction benchmark
+
+Compares the CONTENT_SELECTORS cascade with the single-pass text density
+extractor on the pages in fixtures/articles, for every parser backend that is
+installed. Quality is word-level precision, recall and F1 of the full
+extracted content against the hand-picked main text in the <page>.txt file
+next to each page; speed is the time to extract the first 1000 characters,
+as HackerNewsScraper does. --pad-kb pads the pages with comment blocks for
+the speed measurement, to see how both methods scale with page size.
+
+Usage:
+    python benchmarks/article_extraction.py [--repeat 20] [--pad-kb 256] [--verbose]
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src", "tech"))
+
+from article_extractor import DEFAULT_MAX_CHARS, HAS_LXML, HAS_SELECTOLAX, METHODS, extract_article
+
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "fixtures", "articles")
+
+
+def load_corpus():
+    """Load (name, html, expected text) for every fixture page with an expected text."""
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        expected_path = path[:-len(".html")] + ".txt"
+        if not os.path.exists(expected_path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        with open(expected_path, "r", encoding="utf-8") as f:
+            expected = f.read()
+        corpus.append((os.path.basename(path)[:-len(".html")], html, expected))
+    return corpus
+
+
+def pad(html, pad_kb):
+    """Pad a page with trailing comment blocks up to pad_kb."""
+    filler = '<div class="comment"><p>' + "Interesting read, thanks for sharing. " * 20 + "</p></div>\n"
+    padding = filler * max(0, (pad_kb * 1024 - len(html)) // len(filler))
+    return html.replace("</body>", padding + "</body>")
+
+
+def word_scores(extracted, expected):
+    """Return precision, recall and F1 of the words of `extracted` against `expected`."""
+    got = Counter(re.findall(r"\w+", (extracted or "").lower()))
+    want = Counter(re.findall(r"\w+", expected.lower()))
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if overlap else 0.0
+    return precision, recall, f1
+
+
+def time_it(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement, best is reported")
+    parser.add_argument("--pad-kb", type=int, default=0, help="pad every page to this size for timing")
+    parser.add_argument("--verbose", action="store_true", help="print per-page results")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    backends = ["html.parser"] + (["lxml"] if HAS_LXML else []) + (["selectolax"] if HAS_SELECTOLAX else [])
+    print(f"{len(corpus)} pages" + (f", padded to {args.pad_kb} KB for timing" if args.pad_kb else "") + "\n")
+
+    if args.verbose:
+        print(f"{'page':<18} {'backend':<12} {'method':<10} {'ms':>7} {'prec':>6} {'recall':>6} {'F1':>6}")
+
+    totals = {}
+    for backend in backends:
+        for method in METHODS:
+            total = totals.setdefault((backend, method), {"ms": 0.0, "precision": 0.0, "recall": 0.0, "f1": 0.0})
+            for name, html, expected in corpus:
+                padded = pad(html, args.pad_kb)
+                elapsed = time_it(lambda: extract_article(padded, parser=backend, max_chars=DEFAULT_MAX_CHARS,
+                                                          method=method), args.repeat)
+                content = extract_article(html, parser=backend, max_chars=1_000_000, method=method)["content"]
+                precision, recall, f1 = word_scores(content, expected)
+                total["ms"] += elapsed * 1000
+                total["precision"] += precision / len(corpus)
+                total["recall"] += recall / len(corpus)
+                total["f1"] += f1 / len(corpus)
+                if args.verbose:
+                    print(f"{name:<18} {backend:<12} {method:<10} {elapsed * 1000:>7.2f} "
+                          f"{precision:>6.2f} {recall:>6.2f} {f1:>6.2f}")
+
+    if args.verbose:
+        print()
+    print(f"{'backend':<12} {'method':<10} {'total ms':>9} {'speedup':>8} {'prec':>6} {'recall':>6} {'F1':>6}")
+    for (backend, method), total in totals.items():
+        baseline = totals[(backend, "selectors")]["ms"]
+        print(f"{backend:<12} {method:<10} {total['ms']:>9.2f} {baseline / total['ms']:>7.1f}x "
+              f"{total['precision']:>6.2f} {total['recall']:>6.2f} {total['f1']:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
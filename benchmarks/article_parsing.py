@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Article parsing benchmark
+
+Compares the original full-download, full-parse article extraction against the
+byte-capped, early-exit extraction used by HackerNewsScraper, for every parser
+backend that is installed. Pages from fixtures/articles are padded to realistic
+sizes so the effect of the byte budget is visible.
+
+Usage:
+    python benchmarks/article_parsing.py [--pad-kb 2048] [--repeat 5]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src", "tech"))
+
+from bs4 import BeautifulSoup
+from article_extractor import CONTENT_SELECTORS, HAS_LXML, HAS_SELECTOLAX, extract_article
+
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "fixtures", "articles")
+MAX_BYTES = 512 * 1024
+MAX_CHARS = 1000
+
+
+def legacy_extract(html):
+    """The extraction HackerNewsScraper used before the byte budget was added."""
+    soup = BeautifulSoup(html, "html.parser")
+    title_tag = soup.select_one("title")
+    title = title_tag.text.strip() if title_tag else None
+    content = None
+    for selector in CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            paragraphs = content_elem.select("p")
+            if paragraphs:
+                content = "\n\n".join([p.text.strip() for p in paragraphs if p.text.strip()])
+                break
+    if not content:
+        content_elem = soup.select_one("body")
+        if content_elem:
+            content = content_elem.text.strip()
+    meta_desc = soup.select_one('meta[name="description"]')
+    description = meta_desc.get("content") if meta_desc else None
+    return {"title": title, "description": description, "content": content[:MAX_CHARS] if content else None}
+
+
+def load_corpus(pad_kb):
+    """Load fixture pages, padding each with trailing comment blocks up to pad_kb."""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        filler = '<div class="comment"><p>' + "Interesting read, thanks for sharing. " * 20 + "</p></div>\n"
+        padding = filler * max(0, (pad_kb * 1024 - len(html)) // len(filler))
+        pages[os.path.basename(path)] = html.replace("</body>", padding + "</body>")
+    return pages
+
+
+def time_it(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pad-kb", type=int, default=2048, help="pad every page to this size")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement, best is reported")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.pad_kb)
+    backends = ["html.parser"] + (["lxml"] if HAS_LXML else []) + (["selectolax"] if HAS_SELECTOLAX else [])
+
+    print(f"{len(pages)} pages padded to {args.pad_kb} KB, byte budget {MAX_BYTES // 1024} KB\n")
+    print(f"{'page':<20} {'variant':<24} {'bytes':>10} {'ms':>10} {'speedup':>8}")
+
+    totals = {}
+    for name, html in pages.items():
+        raw = html.encode("utf-8")
+        capped = raw[:MAX_BYTES].decode("utf-8", errors="replace")
+
+        baseline = time_it(lambda: legacy_extract(html), args.repeat)
+        totals["legacy html.parser"] = totals.get("legacy html.parser", 0) + baseline
+        print(f"{name:<20} {'legacy html.parser':<24} {len(raw):>10} {baseline * 1000:>10.1f} {1.0:>7.1f}x")
+
+        for backend in backends:
+            elapsed = time_it(lambda: extract_article(capped, parser=backend, max_chars=MAX_CHARS), args.repeat)
+            label = f"capped {backend}"
+            totals[label] = totals.get(label, 0) + elapsed
+            print(f"{name:<20} {label:<24} {min(len(raw), MAX_BYTES):>10} {elapsed * 1000:>10.1f} {baseline / elapsed:>7.1f}x")
+
+    print("\nTotal:")
+    for label, elapsed in totals.items():
+        print(f"  {label:<24} {elapsed * 1000:>10.1f} ms  {totals['legacy html.parser'] / elapsed:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Audio post-processing throughput benchmark
+
+Streams a synthetic voiceover (speech-like bursts with uneven gaps) through
+each stage of audio_postprocess on its own and through the full two-pass
+postprocess, and reports throughput in input samples per second and as a
+realtime factor. Peak traced memory shows that it does not grow with the
+length of the file.
+
+Usage:
+    python benchmarks/audio_mastering.py [--seconds 60] [--block-size 65536]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+
+from audio_postprocess import LoudnessMeter, Resampler, SilenceTrimmer, postprocess, read_blocks
+
+SAMPLE_RATE = 24000
+
+
+def synthetic_voiceover(seconds, sample_rate=SAMPLE_RATE, seed=0):
+    """Modulated noise bursts of 0.5-2 s separated by 0.05-1.5 s of silence."""
+    rng = np.random.default_rng(seed)
+    parts = []
+    total = 0
+    while total < seconds * sample_rate:
+        n = int(rng.uniform(0.5, 2.0) * sample_rate)
+        t = np.arange(n) / sample_rate
+        parts.append((0.1 * rng.standard_normal(n) * np.sin(2 * np.pi * 3 * t) ** 2).astype(np.float32))
+        parts.append(np.zeros(int(rng.uniform(0.05, 1.5) * sample_rate), dtype=np.float32))
+        total += len(parts[-2]) + len(parts[-1])
+    return np.concatenate(parts)
+
+
+def time_stage(name, path, samples, process, flush=None, block_size=65536):
+    start = time.perf_counter()
+    for block in read_blocks(path, block_size):
+        process(block)
+    if flush:
+        flush()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>12} {samples / elapsed / 1e6:>10.2f} {samples / SAMPLE_RATE / elapsed:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="voiceover length")
+    parser.add_argument("--block-size", type=int, default=65536)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "voiceover.wav")
+        audio = synthetic_voiceover(args.seconds)
+        sf.write(input_path, audio, SAMPLE_RATE, subtype="PCM_16")
+        samples = len(audio)
+        del audio
+
+        print(f"{'stage':>12} {'Msamples/s':>10} {'realtime x':>10}")
+        time_stage("read", input_path, samples, lambda block: None, block_size=args.block_size)
+        trimmer = SilenceTrimmer(SAMPLE_RATE)
+        time_stage("trim", input_path, samples, trimmer.process, trimmer.flush, args.block_size)
+        meter = LoudnessMeter(SAMPLE_RATE)
+        time_stage("loudness", input_path, samples, meter.add, meter.integrated, args.block_size)
+        resampler = Resampler(SAMPLE_RATE, 48000)
+        time_stage("resample", input_path, samples, resampler.process, resampler.flush, args.block_size)
+
+        output_path = os.path.join(tmp, "master.wav")
+        tracemalloc.start()
+        start = time.perf_counter()
+        stats = postprocess(input_path, output_path)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'postprocess':>12} {samples / elapsed / 1e6:>10.2f} {samples / SAMPLE_RATE / elapsed:>10.0f}")
+        print(f"\n{args.seconds:.0f}s in, {stats['seconds']:.1f}s out, {stats['lufs']:.1f} LUFS measured, "
+              f"{stats['gain_db']:+.1f} dB gain")
+        print(f"peak traced memory: {peak / 1e6:.1f} MB (input is {samples * 4 / 1e6:.1f} MB as float32)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark
+
+Runs the tech channel stages (get_top_stories with article fetching,
+create_tech_script, generate_audio, upload_video) and the Goodreads quote
+scrape without touching the network or a model:
+
+- Hacker News, the linked articles and Goodreads are replayed from the pages
+  in fixtures/hn, fixtures/articles and fixtures/goodreads by a local HTTP
+  server running in its own process, with a fixed latency per request
+- Gemini is stubs.StubGenaiClient behind the real rate limiter and cache
+- Kokoro is stubs.StubPipeline, producing synthetic audio at a fixed
+  realtime factor
+- YouTube is the same local server, speaking the resumable upload protocol
+
+Every repeat starts in a fresh temporary working directory and runs all stages
+twice: a cold pass with empty caches and a warm pass that hits the HTTP,
+Gemini and TTS caches of the first. Wall and CPU time are taken from the
+repeats; peak traced memory comes from one extra run under tracemalloc, which
+slows everything down too much to time at the same moment.
+
+Results are written as JSON, by default to benchmarks/results/end_to_end-<commit>.json;
+--compare prints the change against an earlier result file.
+
+Usage:
+    python benchmarks/end_to_end.py [--repeat 3] [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import multiprocessing
+import os
+import platform
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, max RSS is then left out
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Host the recorded front page links its articles to, rewritten to the replay server
+RECORDED_ORIGIN = "https://replay.invalid"
+
+STAGES = ("get_top_stories", "scrape_quotes", "create_tech_script", "generate_audio", "upload_video")
+PASSES = ("cold", "warm")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves the recorded pages and emulates the YouTube resumable upload endpoint."""
+
+    protocol_version = "HTTP/1.1"
+    origin = ""
+    latency = 0.0
+    sessions = {}
+    sessions_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        if url.path == "/news":
+            path = os.path.join(FIXTURES_DIR, "hn", "front-page.html")
+        elif url.path.startswith("/articles/"):
+            path = os.path.join(FIXTURES_DIR, "articles", os.path.basename(url.path))
+        elif url.path.startswith("/author/quotes/"):
+            page = parse_qs(url.query).get("page", ["1"])[0]
+            path = os.path.join(FIXTURES_DIR, "goodreads", f"quotes-page-{int(page)}.html")
+        else:
+            path = None
+        if path is None or not os.path.isfile(path):
+            self._send(404, b"Not found", "text/plain")
+            return
+
+        with open(path, "rb") as f:
+            body = f.read().replace(RECORDED_ORIGIN.encode(), self.origin.encode())
+        etag = f'"{os.stat(path).st_mtime_ns:x}-{len(body):x}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", None, {"ETag": etag})
+        else:
+            self._send(200, body, "text/html; charset=utf-8", {"ETag": etag})
+
+    def do_POST(self):
+        # Start of a resumable upload: the metadata comes in, the session URI goes out
+        time.sleep(self.latency)
+        self._read_body()
+        with self.sessions_lock:
+            session = f"session{len(self.sessions) + 1}"
+            self.sessions[session] = 0
+        self._send(200, b"", None, {"Location": f"{self.origin}/upload/{session}"})
+
+    def do_PUT(self):
+        time.sleep(self.latency)
+        session = os.path.basename(urlparse(self.path).path)
+        received = self._read_body()
+        content_range = self.headers.get("Content-Range", "")
+        if session in self.sessions and content_range.startswith("bytes */"):
+            # Status query of a client recovering from an error
+            offset = self.sessions[session]
+            self._send(308, b"", None, {"Range": f"bytes=0-{offset - 1}"} if offset else {})
+            return
+        match = re.match(r"bytes (\d+)-(\d+)/(\d+)", content_range)
+        if session not in self.sessions or not match:
+            self._send(400, b"Bad upload request", "text/plain")
+            return
+        first, last, total = map(int, match.groups())
+        if received != last - first + 1:
+            self._send(400, b"Chunk length does not match Content-Range", "text/plain")
+            return
+        self.sessions[session] = last + 1
+        if last + 1 < total:
+            self._send(308, b"", None, {"Range": f"bytes=0-{last}"})
+        else:
+            video = {"kind": "youtube#video", "id": f"replay-{session}", "status": {"uploadStatus": "uploaded"}}
+            self._send(200, json.dumps(video).encode(), "application/json; charset=UTF-8")
+
+    def _read_body(self):
+        remaining = int(self.headers.get("Content-Length") or 0)
+        received = 0
+        while remaining:
+            block = self.rfile.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            received += len(block)
+            remaining -= len(block)
+        return received
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_fixtures(latency, conn):
+    """Run the replay server, sending its origin through `conn` once it listens."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ReplayHandler)
+    ReplayHandler.origin = f"http://127.0.0.1:{server.server_address[1]}"
+    ReplayHandler.latency = latency
+    conn.send(ReplayHandler.origin)
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    """Return the short commit hash of the tree and whether it has uncommitted changes."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    check=True, capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def write_video(path, size_mb):
+    """Write an incompressible stand-in for a rendered video."""
+    with open(path, "wb") as f:
+        for _ in range(int(size_mb)):
+            f.write(os.urandom(1024 * 1024))
+
+
+class Harness:
+    """Holds the stage modules and the stub backends of one working directory."""
+
+    def __init__(self, origin, args):
+        from app import load_channel_module
+        import fetcher
+        import gemini_client
+        import tts_service
+        from gemini_cache import CachedGeminiClient
+        from stubs import StubGenaiClient, StubPipeline
+        from tts_cache import SegmentCache
+
+        self.origin = origin
+        self.args = args
+        self.fetcher_module = fetcher
+        self.scraper = load_channel_module("tech", "hacker_news_scraper")
+        self.story_store = load_channel_module("tech", "story_store")
+        self.hacker_script = load_channel_module("tech", "hacker_script")
+        self.audio_generation = load_channel_module("tech", "audio_generation")
+        self.quotes_scraper = load_channel_module("stoic", "stoic_news_scraper")
+        import youtube_uploader
+        self.youtube_uploader = youtube_uploader
+
+        # Module singletons keep their caches relative to the working directory
+        # they were created in, so every working directory gets new ones
+        fetcher._default_fetcher = None
+        self.genai = StubGenaiClient(latency=args.llm_latency)
+        gemini_client._client = CachedGeminiClient(gemini_client.RateLimitedClient(self.genai))
+        tts_service._default_service = tts_service.TTSService(
+            pipeline_factory=functools.partial(StubPipeline, load_seconds=args.tts_load_seconds,
+                                               realtime_factor=args.tts_realtime_factor),
+            cache=SegmentCache(), model_version="stub")
+        self.quotes_scraper.AUTHORS = {
+            author: {**info, "url": f"{origin}/author/quotes/{urlparse(info['url']).path.rsplit('/', 1)[1]}"}
+            for author, info in self.quotes_scraper.AUTHORS.items()
+        }
+        self.youtube = self._build_youtube()
+        self.video_path = os.path.abspath("video.mp4")
+        write_video(self.video_path, args.video_mb)
+        self.stories = []
+
+    def _build_youtube(self):
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+        from googleapiclient.http import build_http
+        # The bundled discovery document, pointed at the replay server
+        document = json.loads(get_static_doc("youtube", "v3"))
+        document["rootUrl"] = f"{self.origin}/"
+        # build_http keeps httplib2 from treating the 308 of a resumable upload as a redirect
+        return build_from_document(document, http=build_http())
+
+    def _http_stats(self):
+        return dict(self.fetcher_module.get_fetcher().stats)
+
+    def _http_delta(self, before):
+        after = self._http_stats()
+        return {key: after[key] - before.get(key, 0) for key in after}
+
+    def get_top_stories(self):
+        before = self._http_stats()
+        scraper = self.scraper.HackerNewsScraper(
+            base_url=f"{self.origin}/news", per_host_delay=self.args.per_host_delay,
+            store=self.story_store.StoryStore(self.hacker_script.STORIES_DB))
+        self.stories = scraper.get_top_stories(limit=self.args.stories, fetch_articles=True)
+        articles = sum(1 for story in self.stories if story.get("article_content"))
+        ok = len(self.stories) == self.args.stories and articles == len(self.stories)
+        return ok, {"stories": len(self.stories), "articles": articles, "http": self._http_delta(before)}
+
+    def scrape_quotes(self):
+        before = self._http_stats()
+        added = self.quotes_scraper.scrape_quotes(per_host_delay=self.args.per_host_delay)
+        return all(count >= 0 for count in added.values()), {"added": added, "http": self._http_delta(before)}
+
+    def create_tech_script(self):
+        requests_before = self.genai.requests
+        script = self.hacker_script.create_tech_script(self.stories)
+        self.hacker_script.write_tech_script(script, self.stories)
+        return bool(script), {"words": len(script.split()), "llm_requests": self.genai.requests - requests_before}
+
+    def generate_audio(self):
+        import tts_service
+        self.audio_generation.generate_audio(None, return_audio=False)
+        path = f"output/youtube-tech-{self.audio_generation.today}/voiceover-tech.wav"
+        seconds = len(tts_service.open_wav_memmap(path)) / tts_service.SAMPLE_RATE
+        return seconds > 0, {"audio_seconds": round(seconds, 2)}
+
+    def upload_video(self):
+        response = self.youtube_uploader.upload_video(
+            self.youtube, self.video_path, "Benchmark upload", "Replayed upload",
+            chunk_size=self.args.chunk_mb * 1024 * 1024)
+        return bool(response.get("id")), {"megabytes": self.args.video_mb}
+
+
+def run_stage(harness, stage, trace_memory, verbose):
+    """Run one stage, returning its timings, memory and counters."""
+    output = io.StringIO()
+    if trace_memory:
+        tracemalloc.start()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(sys.stdout if verbose else output):
+            ok, counters = getattr(harness, stage)()
+        error = None
+    except Exception as e:
+        ok, counters, error = False, {}, f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    result = {
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        # Linux reports kilobytes
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 if resource else None,
+        "ok": ok,
+        "counters": counters,
+    }
+    if peak is not None:
+        result["peak_traced_mb"] = peak / 1e6
+    if error:
+        result["error"] = error
+    if stage == "generate_audio" and counters.get("audio_seconds"):
+        result["counters"]["realtime_factor"] = round(wall / counters["audio_seconds"], 4)
+    return result
+
+
+def run_repeat(origin, args, trace_memory):
+    """Run the cold and the warm pass in a fresh working directory."""
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="e2e-bench-") as workdir:
+        os.chdir(workdir)
+        try:
+            harness = Harness(origin, args)
+            for name in PASSES:
+                results[name] = {stage: run_stage(harness, stage, trace_memory, args.verbose)
+                                 for stage in args.stages}
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def summarize(runs, memory_run):
+    """Merge the per-repeat results into one entry per pass and stage."""
+    summary = {}
+    for name in PASSES:
+        summary[name] = {}
+        for stage in runs[0][name]:
+            results = [run[name][stage] for run in runs]
+            walls = [result["wall_seconds"] for result in results]
+            entry = {
+                "best_seconds": min(walls),
+                "median_seconds": statistics.median(walls),
+                "wall_seconds": walls,
+                "cpu_seconds": statistics.median(result["cpu_seconds"] for result in results),
+                "max_rss_mb": max((result["max_rss_mb"] for result in results if result["max_rss_mb"] is not None),
+                                  default=None),
+                "ok": all(result["ok"] for result in results),
+                "counters": results[-1]["counters"],
+            }
+            errors = sorted({result["error"] for result in results if "error" in result})
+            if errors:
+                entry["errors"] = errors
+            if memory_run:
+                entry["peak_traced_mb"] = memory_run[name][stage]["peak_traced_mb"]
+            summary[name][stage] = entry
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'pass':<5} {'stage':<19} {'best s':>8} {'median s':>9} {'cpu s':>7} {'peak MB':>8}  notes")
+    for name, stages in summary.items():
+        for stage, entry in stages.items():
+            peak = f"{entry['peak_traced_mb']:>8.1f}" if "peak_traced_mb" in entry else f"{'-':>8}"
+            notes = "" if entry["ok"] else "DEGRADED " + "; ".join(entry.get("errors", []))
+            if stage == "generate_audio" and "realtime_factor" in entry["counters"]:
+                notes = f"rtf {entry['counters']['realtime_factor']:.3f} " + notes
+            print(f"{name:<5} {stage:<19} {entry['best_seconds']:>8.3f} {entry['median_seconds']:>9.3f} "
+                  f"{entry['cpu_seconds']:>7.3f} {peak}  {notes}")
+
+
+def print_comparison(summary, baseline_path):
+    """Print the change of every stage's best time against an earlier result file."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nagainst {baseline.get('commit', '?')} ({baseline_path})")
+    print(f"{'pass':<5} {'stage':<19} {'before s':>9} {'after s':>8} {'change':>8}")
+    for name, stages in summary.items():
+        for stage, entry in stages.items():
+            old = baseline.get("stages", {}).get(name, {}).get(stage)
+            if not old:
+                continue
+            change = (entry["best_seconds"] - old["best_seconds"]) / old["best_seconds"] if old["best_seconds"] else 0
+            print(f"{name:<5} {stage:<19} {old['best_seconds']:>9.3f} {entry['best_seconds']:>8.3f} {change:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs, each in a fresh working directory")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--stories", type=int, default=5, help="stories scraped and scripted")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="replay server latency per request")
+    parser.add_argument("--per-host-delay", type=float, default=0.0,
+                        help="scraper politeness delay, 0 measures the scrapers themselves")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per stub Gemini request")
+    parser.add_argument("--tts-load-seconds", type=float, default=1.0, help="stub Kokoro model load time")
+    parser.add_argument("--tts-realtime-factor", type=float, default=0.05,
+                        help="stub Kokoro synthesis seconds per second of audio")
+    parser.add_argument("--video-mb", type=int, default=24, help="size of the uploaded video")
+    parser.add_argument("--chunk-mb", type=int, default=8, help="upload chunk size, a multiple of 0.25")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", help="result file, benchmarks/results/end_to_end-<commit>.json by default")
+    parser.add_argument("--compare", metavar="RESULT", help="earlier result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the stages")
+    args = parser.parse_args()
+
+    # Keep a TTS daemon that may be running on this machine out of the measurement
+    os.environ["TTS_DAEMON_PORT"] = str(free_port())
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    server = multiprocessing.Process(target=serve_fixtures, args=(args.latency_ms / 1000, sender), daemon=True)
+    server.start()
+    try:
+        origin = receiver.recv()
+        runs = []
+        for i in range(args.repeat):
+            print(f"run {i + 1}/{args.repeat}...", file=sys.stderr)
+            runs.append(run_repeat(origin, args, trace_memory=False))
+        memory_run = None
+        if not args.no_memory:
+            print("memory run...", file=sys.stderr)
+            memory_run = run_repeat(origin, args, trace_memory=True)
+    finally:
+        server.terminate()
+
+    summary = summarize(runs, memory_run)
+    commit, dirty = git_commit()
+    result = {
+        "benchmark": "end_to_end",
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "verbose")},
+        "stages": summary,
+    }
+
+    print_summary(summary)
+    if args.compare:
+        print_comparison(summary, args.compare)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"end_to_end-{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0 if all(entry["ok"] for stages in summary.values() for entry in stages.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
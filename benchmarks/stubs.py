@@ -0,0 +1,122 @@
+"""
+Stub model backends for offline benchmarks.
+
+StubPipeline mimics kokoro.KPipeline: construction costs a fixed load time and
+calling it yields (graphemes, phonemes, audio) per sentence, with audio length
+proportional to the text. Built with model=False it loads nothing and yields
+no audio, and generate_from_tokens synthesizes one chunk from its phonemes.
+
+StubGenaiClient mimics google.genai.Client: `models.generate_content` waits a
+fixed latency and returns a narration built from the titles in the prompt, so
+the same prompt always gets the same response.
+"""
+
+import hashlib
+import re
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+
+
+class StubPipeline:
+    """Deterministic stand-in for kokoro.KPipeline."""
+
+    def __init__(self, lang_code="a", model=True, load_seconds=2.0, voice_load_seconds=0.2,
+                 realtime_factor=0.0, seconds_per_char=0.06):
+        """
+        Args:
+            lang_code: Ignored, kept for signature compatibility
+            model: False for a pipeline that only yields phonemes
+            load_seconds: Simulated model load time
+            voice_load_seconds: Simulated load time of a voice tensor
+            realtime_factor: Simulated synthesis time per second of audio; the
+                time is spent busy-waiting so the stub is CPU-bound like Kokoro
+            seconds_per_char: Audio seconds produced per input character
+        """
+        self.lang_code = lang_code
+        self.voice_load_seconds = voice_load_seconds
+        self.realtime_factor = realtime_factor
+        self.seconds_per_char = seconds_per_char
+        self.voices = {}
+        self.model = model
+        if model:
+            time.sleep(load_seconds)
+
+    def load_voice(self, voice):
+        if voice not in self.voices:
+            time.sleep(self.voice_load_seconds)
+            self.voices[voice] = True
+        return self.voices[voice]
+
+    def __call__(self, text, voice="af_heart", **kwargs):
+        if self.model:
+            self.load_voice(voice)
+        for sentence in re.split(r"(?<=[.!?])\s+|\n+", text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            # The stub's phonemes are the sentence itself
+            yield sentence, sentence, self._synthesize(sentence) if self.model else None
+
+    def generate_from_tokens(self, tokens, voice="af_heart", **kwargs):
+        self.load_voice(voice)
+        yield "", tokens, self._synthesize(tokens)
+
+    def _synthesize(self, phonemes):
+        samples = int(len(phonemes) * self.seconds_per_char * SAMPLE_RATE)
+        deadline = time.perf_counter() + samples / SAMPLE_RATE * self.realtime_factor
+        while time.perf_counter() < deadline:
+            pass
+        # Seeded by the text so the same sentence always sounds the same
+        seed = sum(map(ord, phonemes)) % (2 ** 32)
+        t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+        tone = np.sin(2 * np.pi * (180 + seed % 120) * t).astype(np.float32)
+        return 0.3 * tone
+
+
+SCRIPT_TEMPLATE = (
+    "Stop scrolling, here is what the tech world is talking about today. {stories} "
+    "That is a lot of change in one day, and every one of these stories will shape the tools you use. "
+    "Which one surprised you the most? Tell me in the comments and follow for tomorrow's roundup."
+)
+STORY_TEMPLATE = (
+    "Story {i}: {title}. People are debating it right now because it changes how we build software, "
+    "and the details are more interesting than the headline."
+)
+
+
+class _StubModels:
+    def __init__(self, owner: "StubGenaiClient"):
+        self._owner = owner
+
+    def generate_content(self, model, contents, config=None, **kwargs):
+        owner = self._owner
+        owner.requests += 1
+        time.sleep(owner.latency)
+        prompt = contents if isinstance(contents, str) else str(contents)
+        titles = re.findall(r"^Title: (.+)$", prompt, re.M)
+        if titles:
+            stories = " ".join(STORY_TEMPLATE.format(i=i, title=title) for i, title in enumerate(titles, 1))
+            text = SCRIPT_TEMPLATE.format(stories=stories)
+        else:
+            digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+            text = f"Stub response {digest}."
+        tokens = (len(prompt) + len(text)) // 4
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(total_token_count=tokens))
+
+
+class StubGenaiClient:
+    """Deterministic stand-in for google.genai.Client."""
+
+    def __init__(self, api_key=None, latency=0.5):
+        """
+        Args:
+            api_key: Ignored, kept for signature compatibility
+            latency: Simulated seconds per request
+        """
+        self.latency = latency
+        self.requests = 0
+        self.models = _StubModels(self)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Parallel TTS scaling benchmark
+
+Synthesizes the same script with TTSService.synthesize_parallel for 1..N worker
+processes and reports wall time, speedup and realtime factor (audio seconds per
+wall second). No segment cache is used, so every run synthesizes everything.
+
+Usage:
+    python benchmarks/tts_scaling.py [--stub] [--max-workers 4] [--sentences 16]
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from stubs import StubPipeline
+from tts_service import SAMPLE_RATE, TTSService
+
+SENTENCES = [
+    "The obstacle in the path becomes the path.",
+    "You have power over your mind, not outside events.",
+    "Realize this, and you will find strength.",
+    "Waste no more time arguing about what a good man should be.",
+    "Be one.",
+    "The happiness of your life depends upon the quality of your thoughts.",
+    "Very little is needed to make a happy life.",
+    "It is all within yourself, in your way of thinking.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stub", action="store_true", help="use the CPU-bound stub pipeline instead of Kokoro")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--sentences", type=int, default=16, help="script length in sentences")
+    parser.add_argument("--batch-size", type=int, default=2)
+    args = parser.parse_args()
+
+    text = " ".join(SENTENCES[i % len(SENTENCES)] + f" Number {i}." for i in range(args.sentences))
+    factory = functools.partial(StubPipeline, load_seconds=0.5, realtime_factor=0.3) if args.stub else None
+
+    print(f"{'workers':>7} {'wall s':>8} {'speedup':>8} {'realtime x':>10}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        service = TTSService(pipeline_factory=factory)
+        start = time.perf_counter()
+        samples = sum(len(chunk) for chunk in service.synthesize_parallel(
+            text, workers=workers, batch_size=args.batch_size))
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>8.2f} {baseline / elapsed:>7.2f}x {samples / SAMPLE_RATE / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+TTS cold vs warm start benchmark
+
+Times the first synthesis job of a fresh TTSService (pipeline and voice load
+included) against later jobs on the same warm service, which is what every
+channel after the first pays once the service is shared.
+
+Usage:
+    python benchmarks/tts_warm_start.py [--stub] [--jobs 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+sys.path.append(os.path.join(ROOT, "benchmarks"))
+
+from tts_service import TTSService
+
+TEXT = ("Stoicism teaches that we suffer more in imagination than in reality. "
+        "Focus on what you control. Let the rest go.")
+
+
+def run_job(service):
+    start = time.perf_counter()
+    chunks = list(service.synthesize(TEXT))
+    return time.perf_counter() - start, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stub", action="store_true", help="use the stub pipeline instead of Kokoro")
+    parser.add_argument("--jobs", type=int, default=3, help="warm jobs to run after the cold one")
+    args = parser.parse_args()
+
+    factory = None
+    if args.stub:
+        from stubs import StubPipeline
+        factory = StubPipeline
+
+    service = TTSService(pipeline_factory=factory)
+    cold, _ = run_job(service)
+    warm = [run_job(service)[0] for _ in range(args.jobs)]
+
+    print(f"backend:      {'stub' if args.stub else 'kokoro'}")
+    print(f"model load:   {service.stats['load_seconds'] * 1000:8.1f} ms")
+    print(f"cold job:     {cold * 1000:8.1f} ms")
+    print(f"warm job avg: {sum(warm) / len(warm) * 1000:8.1f} ms")
+    print(f"per-channel saving once warm: {(cold - min(warm)) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
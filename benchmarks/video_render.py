@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Video render benchmark
+
+Renders a synthetic voiceover of the given length into a 9:16 MP4 with
+video_renderer.render_video and reports the realtime factor (video seconds
+per wall second) for each x264 preset, plus the cost of composing the frame.
+
+Usage:
+    python benchmarks/video_render.py [--seconds 30] [--fps 30] [--presets ultrafast veryfast]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+
+from video_renderer import HEIGHT, WIDTH, compose, gradient_background, render_video
+
+
+def synthetic_overlay(width=WIDTH, height=HEIGHT):
+    """Semi-transparent panel in the middle third of the frame."""
+    overlay = np.zeros((height, width, 4), dtype=np.uint8)
+    overlay[height // 3:2 * height // 3, width // 10:9 * width // 10] = (255, 255, 255, 96)
+    return overlay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=30.0, help="voiceover length")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--presets", nargs="+", default=["ultrafast", "veryfast", "medium"])
+    args = parser.parse_args()
+
+    background = gradient_background((10, 14, 32), (36, 64, 132))
+    overlay = synthetic_overlay()
+
+    start = time.perf_counter()
+    for _ in range(10):
+        compose(background, overlay)
+    print(f"compose frame: {(time.perf_counter() - start) / 10 * 1000:.1f} ms (done once per video)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        audio_path = os.path.join(tmp, "voiceover.wav")
+        t = np.arange(int(args.seconds * 24000)) / 24000
+        sf.write(audio_path, (0.2 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), 24000, subtype="PCM_16")
+
+        print(f"{'preset':>10} {'wall s':>8} {'realtime x':>10} {'MB':>6}")
+        for preset in args.presets:
+            output_path = os.path.join(tmp, f"video-{preset}.mp4")
+            start = time.perf_counter()
+            realtime_factor = render_video(audio_path, output_path, background, overlay,
+                                           fps=args.fps, preset=preset)
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(output_path) / 1e6
+            print(f"{preset:>10} {elapsed:>8.2f} {realtime_factor:>10.1f} {size:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
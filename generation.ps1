@@ -24,13 +24,8 @@ if (Test-Path ".venv") {
     & .\.venv\Scripts\Activate.ps1
 }
 
-# Run scripts in sequence
-Run-Script "src/tech/hacker_news_scraper.py"
-Run-Script "src/tech/hacker_script.py"
-Run-Script "src/tech/audio_generation.py"
-Run-Script "src/stoic/stoic_news_scraper.py"
-Run-Script "src/stoic/stoic_script.py"
-Run-Script "src/stoic/audio_generation.py"
+# Run every channel in one process so models are loaded once
+Run-Script "src/app.py"
 
 
 # Deactivate virtual environment
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Automated YouTube Channel pipeline
+
+Runs scraping, scripting, audio generation, audio mastering and video
+rendering for every channel in a single process, so the TTS pipeline is loaded
+once and shared by all channels. Stage modules and their heavy dependencies
+(google.genai, kokoro/torch, bs4) are only imported when their stage runs.
+
+The channels are independent branches of a stage graph and run concurrently.
+Stages whose inputs and outputs are unchanged since their last run are skipped.
+
+With --trace every stage, scraper request, Gemini call, TTS job and upload is
+recorded as a span in a JSONL trace, and a summary of the run is printed at
+the end.
+
+Usage:
+    python src/app.py [--channels tech stoic] [--stages scrape script audio master render]
+                      [--force] [--force-from tech/script] [--trace [PATH]]
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import sys
+from datetime import datetime
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+CHANNELS = ("tech", "stoic")
+STAGES = ("scrape", "script", "audio", "master", "render")
+# One file per author of stoic_news_scraper.AUTHORS
+STOIC_QUOTE_FILES = (
+    "data/quotes/marcus_aurelius_quotes.json",
+    "data/quotes/seneca_quotes.json",
+    "data/quotes/epictetus_quotes.json",
+)
+# Databases the script stages read, hacker_script.STORIES_DB and stoic_script.PASSAGES_DB
+STORIES_DB = "data/stories.db"
+PASSAGES_DB = "data/passages.db"
+
+
+def load_channel_module(channel, module):
+    """
+    Import a module of a channel directory.
+
+    Channel directories use sibling imports, so they are put on sys.path. Both
+    channels have an audio_generation module, so that one is registered under a
+    channel-qualified name to keep the two apart.
+
+    Args:
+        channel: Channel directory name ("tech" or "stoic")
+        module: Module file name without .py
+
+    Returns:
+        The imported module
+    """
+    channel_dir = os.path.join(SRC_DIR, channel)
+    if channel_dir not in sys.path:
+        sys.path.append(channel_dir)
+    if module != "audio_generation":
+        return importlib.import_module(module)
+    name = f"{channel}_{module}"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(channel_dir, f"{module}.py"))
+        sys.modules[name] = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(sys.modules[name])
+    return sys.modules[name]
+
+
+def has_quotes(path):
+    """Return True if a quotes file exists and holds at least one quote."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return bool(json.load(f))
+    except (OSError, ValueError):
+        return False
+
+
+def run_stage(channel, stage, args):
+    """
+    Run one stage of one channel.
+
+    Args:
+        channel: Channel name
+        stage: Stage name
+        args: Parsed command line arguments
+
+    Returns:
+        True if the stage succeeded
+    """
+    if channel == "tech" and stage == "scrape":
+        scraper = load_channel_module("tech", "hacker_news_scraper")
+        # The JSON file of an earlier run may still exist, only this run's result counts
+        return bool(scraper.main(["--backend", args.hn_backend, "--limit", str(args.hn_limit)]))
+
+    if channel == "tech" and stage == "script":
+        hacker_script = load_channel_module("tech", "hacker_script")
+        return hacker_script.main() is not None
+
+    if channel == "stoic" and stage == "scrape":
+        stoic_news_scraper = load_channel_module("stoic", "stoic_news_scraper")
+        stoic_news_scraper.scrape_quotes()
+        if os.path.isdir("data/gutenberg"):
+            # Unchanged books are skipped, so this is cheap after the first run
+            load_channel_module("stoic", "gutenberg_ingest").main([])
+        # A failed scrape is fine as long as quotes from an earlier run exist
+        return any(has_quotes(path) for path in STOIC_QUOTE_FILES)
+
+    if channel == "stoic" and stage == "script":
+        stoic_script = load_channel_module("stoic", "stoic_script")
+        # Explicit arguments keep the app's own command line away from its parser
+        return stoic_script.main(["--topic", args.stoic_topic] if args.stoic_topic else []) is not None
+
+    if stage == "audio":
+        audio_generation = load_channel_module(channel, "audio_generation")
+        audio_generation.generate_audio(None, return_audio=False, workers=args.tts_workers)
+        return True
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    output_dir = f"output/youtube-{channel}-{today}"
+
+    if stage == "master":
+        from audio_postprocess import postprocess
+        stats = postprocess(f"{output_dir}/voiceover-{channel}.wav",
+                            f"{output_dir}/voiceover-{channel}-master.wav")
+        print(f"{channel}: {stats['lufs']:.1f} LUFS measured, {stats['gain_db']:+.1f} dB gain")
+        return True
+
+    if stage == "render":
+        from video_renderer import render_bundle
+        render_bundle(output_dir, channel)
+        return True
+
+    raise ValueError(f"Unknown stage {channel}/{stage}")
+
+
+def build_pipeline(args):
+    """
+    Build the stage graph of the selected channels.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Pipeline with one scrape -> script -> audio -> master -> render branch per channel
+    """
+    from pipeline import Pipeline, Stage, json_fingerprint
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    scrape_outputs = {
+        "tech": ["hacker_news_stories.json"],
+        "stoic": list(STOIC_QUOTE_FILES),
+    }
+    # The scrape stamps stories with the time they were fetched, which must not count as a change
+    script_inputs = {
+        "tech": ["hacker_news_stories.json", STORIES_DB],
+        "stoic": list(STOIC_QUOTE_FILES) + ([PASSAGES_DB] if args.stoic_topic else []),
+    }
+    fingerprints = {
+        "tech": {
+            "hacker_news_stories.json": json_fingerprint("scraped_at"),
+            STORIES_DB: lambda path: load_channel_module("tech", "story_store").StoryStore(path).fingerprint(),
+        },
+        "stoic": {},
+    }
+    params = {
+        "tech": {"hn_backend": args.hn_backend, "hn_limit": args.hn_limit},
+        "stoic": {"topic": args.stoic_topic},
+    }
+
+    pipeline = Pipeline()
+    for channel in args.channels:
+        output_dir = f"output/youtube-{channel}-{today}"
+        script_path = f"{output_dir}/script-{channel}.txt"
+        voiceover_path = f"{output_dir}/voiceover-{channel}.wav"
+        master_path = f"{output_dir}/voiceover-{channel}-master.wav"
+        video_path = f"{output_dir}/video-{channel}.mp4"
+
+        def stage_runner(stage, channel=channel):
+            return lambda: run_stage(channel, stage, args)
+
+        # Scrapers read from the network, so only their outputs can be compared
+        pipeline.add(Stage(f"{channel}/scrape", stage_runner("scrape"),
+                           outputs=scrape_outputs[channel],
+                           params=params[channel], always_run=True))
+        pipeline.add(Stage(f"{channel}/script", stage_runner("script"),
+                           inputs=script_inputs[channel], outputs=[script_path],
+                           deps=[f"{channel}/scrape"], fingerprints=fingerprints[channel]))
+        pipeline.add(Stage(f"{channel}/audio", stage_runner("audio"),
+                           inputs=[script_path], outputs=[voiceover_path],
+                           deps=[f"{channel}/script"]))
+        pipeline.add(Stage(f"{channel}/master", stage_runner("master"),
+                           inputs=[voiceover_path], outputs=[master_path],
+                           deps=[f"{channel}/audio"]))
+        pipeline.add(Stage(f"{channel}/render", stage_runner("render"),
+                           inputs=[master_path], outputs=[video_path],
+                           deps=[f"{channel}/master"]))
+    return pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the content pipeline for every channel in one process")
+    parser.add_argument("--channels", nargs="+", choices=CHANNELS, default=list(CHANNELS))
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--hn-backend", choices=("html", "api"), default="html")
+    parser.add_argument("--hn-limit", type=int, default=5)
+    parser.add_argument("--stoic-topic", help="base the stoic script on Gutenberg passages about this topic")
+    parser.add_argument("--tts-workers", type=int, default=int(os.getenv("TTS_WORKERS", "1")))
+    parser.add_argument("--force", action="store_true", help="rebuild every stage")
+    parser.add_argument("--force-from", nargs="+", default=[], metavar="STAGE",
+                        help="rebuild these stages (e.g. tech/script) and everything after them")
+    parser.add_argument("--trace", nargs="?", const="", metavar="PATH",
+                        help="write a JSONL trace of the run, to data/traces/run-<timestamp>.jsonl "
+                             "unless a path is given")
+    args = parser.parse_args(argv)
+
+    # Channel stages read and write paths relative to the project root
+    os.chdir(os.path.dirname(SRC_DIR))
+    sys.path.append(SRC_DIR)
+
+    import tracing
+    from pipeline import failed
+
+    if args.trace is not None:
+        tracing.configure(args.trace or None)
+
+    pipeline = build_pipeline(args)
+    only = [name for name in pipeline.stages if name.split("/")[1] in args.stages]
+    results = pipeline.run(only=only, force=args.force, force_from=args.force_from)
+    print("----------------------------------------")
+
+    tracer = tracing.get_tracer()
+    if tracer.enabled:
+        tracer.close()
+        print(tracer.report())
+        print(f"Trace written to {tracer.path}")
+        print("----------------------------------------")
+
+    if failed(results):
+        print(f"❌ Failed stages: {', '.join(failed(results))}")
+        return 1
+    print("All stages completed successfully! 🎉")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
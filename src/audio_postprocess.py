@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Audio Post-processing
+
+Masters a voiceover for upload: trims the silence between TTS chunks to an
+even length, normalizes loudness to a target integrated loudness (EBU R128 /
+ITU-R BS.1770) and resamples to 48 kHz. The file is streamed block by block
+in two passes, one to measure the loudness and one to write the result, so
+the full waveform is never held in memory.
+
+Usage:
+    python src/audio_postprocess.py voiceover-tech.wav voiceover-tech-master.wav
+"""
+
+import argparse
+import math
+import os
+import sys
+from typing import Dict, Iterator
+
+import numpy as np
+import soundfile as sf
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin, sosfilt
+
+from tts_service import SILENCE_THRESHOLD, write_wav_stream
+
+# YouTube normalizes to about -14 LUFS, so louder masters only get turned down
+TARGET_LUFS = -14.0
+PEAK_CEILING_DB = -1.0
+OUTPUT_SAMPLE_RATE = 48000
+BLOCK_SIZE = 65536
+
+# Silent stretches longer than this are shortened to it
+MAX_GAP_SECONDS = 0.3
+# Silence kept before the first and after the last sound
+EDGE_SECONDS = 0.1
+FRAME_SECONDS = 0.01
+
+# Resampling filter length per polyphase branch; longer is sharper and slower
+TAPS_PER_PHASE = 32
+
+
+def read_blocks(path: str, block_size: int = BLOCK_SIZE) -> Iterator[np.ndarray]:
+    """Yield a WAV file's samples as mono float32 blocks."""
+    for block in sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True):
+        yield block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+
+
+class SilenceTrimmer:
+    """Caps silent stretches of a stream at a maximum length and trims its edges."""
+
+    def __init__(self, sample_rate: int, threshold: float = SILENCE_THRESHOLD,
+                 max_gap: float = MAX_GAP_SECONDS, edge: float = EDGE_SECONDS,
+                 frame: float = FRAME_SECONDS):
+        """
+        Args:
+            sample_rate: Sample rate of the stream
+            threshold: RMS level below which a frame counts as silent
+            max_gap: Longest silence kept between sounds, in seconds
+            edge: Silence kept before the first and after the last sound, in seconds
+            frame: Analysis frame length, in seconds
+        """
+        self.frame_size = max(1, int(sample_rate * frame))
+        self.threshold = threshold
+        self.max_gap = int(max_gap / frame) * self.frame_size
+        self.edge = int(edge / frame) * self.frame_size
+        self._remainder = np.zeros(0, dtype=np.float32)
+        # Silence since the last sound, already cut to the length that will be kept
+        self._held = np.zeros(0, dtype=np.float32)
+        self._started = False
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Trim a chunk; silence at its end is held back until the next sound."""
+        samples = np.concatenate((self._remainder, chunk))
+        count = len(samples) // self.frame_size
+        self._remainder = samples[count * self.frame_size:]
+        frames = samples[:count * self.frame_size].reshape(count, self.frame_size)
+        loud = np.sqrt(np.mean(frames * frames, axis=1)) > self.threshold
+
+        # Walk the runs of loud and silent frames rather than single samples
+        bounds = [0, *(np.flatnonzero(np.diff(loud.astype(np.int8))) + 1), count]
+        out = []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            if start == end:
+                continue
+            run = frames[start:end].ravel()
+            if loud[start]:
+                out += [self._held, run]
+                self._held = self._held[:0]
+                self._started = True
+            elif self._started:
+                # Gaps keep their beginning, up to max_gap
+                self._held = np.concatenate((self._held, run[:self.max_gap - len(self._held)]))
+            else:
+                # Leading silence keeps its end, up to the edge length
+                self._held = np.concatenate((self._held, run))[-self.edge:] if self.edge else self._held
+        return np.concatenate(out) if out else samples[:0]
+
+    def flush(self) -> np.ndarray:
+        """Return the end of the stream, keeping only the trailing edge of silence."""
+        tail = np.concatenate((self._held, self._remainder))[:self.edge] if self._started else self._held[:0]
+        self._held = self._held[:0]
+        self._remainder = self._remainder[:0]
+        return tail
+
+
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """
+    Return the BS.1770 K-weighting filter (high shelf and high pass) as second-order sections.
+
+    The standard only tabulates coefficients for 48 kHz; these are derived for
+    any sample rate from the analog prototype, as libebur128 does.
+    """
+    # Stage 1: high shelf of about +4 dB modelling the head
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0,
+             1, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    # Stage 2: RLB high pass at about 38 Hz
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    high_pass = [1, -2, 1, 1, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, high_pass])
+
+
+class LoudnessMeter:
+    """Streaming integrated loudness (LUFS) and sample peak of a mono signal."""
+
+    def __init__(self, sample_rate: int):
+        self.sos = k_weighting(sample_rate)
+        self._zi = np.zeros((self.sos.shape[0], 2))
+        # Gating blocks are 400 ms long with 75% overlap, built from 100 ms steps
+        self.step = sample_rate // 10
+        self._remainder = np.zeros(0, dtype=np.float64)
+        self._step_energy = []
+        self.peak = 0.0
+
+    def add(self, chunk: np.ndarray):
+        """Feed the next chunk of the stream."""
+        if not len(chunk):
+            return
+        self.peak = max(self.peak, float(np.max(np.abs(chunk))))
+        weighted, self._zi = sosfilt(self.sos, chunk, zi=self._zi)
+        samples = np.concatenate((self._remainder, weighted))
+        count = len(samples) // self.step
+        steps = samples[:count * self.step].reshape(count, self.step)
+        self._step_energy.extend(np.einsum("ij,ij->i", steps, steps))
+        self._remainder = samples[count * self.step:]
+
+    def integrated(self) -> float:
+        """Return the gated integrated loudness in LUFS, or -inf for silence."""
+        energy = np.asarray(self._step_energy)
+        if len(energy) < 4:
+            return float("-inf")
+        blocks = (energy[:-3] + energy[1:-2] + energy[2:-1] + energy[3:]) / (4 * self.step)
+        with np.errstate(divide="ignore"):
+            loudness = -0.691 + 10 * np.log10(blocks)
+        # Absolute gate at -70 LUFS, then relative gate 10 LU below the gated mean
+        blocks = blocks[loudness > -70]
+        if not len(blocks):
+            return float("-inf")
+        relative_gate = -0.691 + 10 * np.log10(blocks.mean()) - 10
+        blocks = blocks[-0.691 + 10 * np.log10(blocks) > relative_gate]
+        return float(-0.691 + 10 * np.log10(blocks.mean()))
+
+
+class Resampler:
+    """
+    Streaming polyphase FIR resampler for rational rate changes.
+
+    Only the output samples are computed: each one is the dot product of the
+    filter phase it falls on with the input samples before it, so converting
+    44.1 kHz to 48 kHz does not filter all 160 phases and discard most of them.
+    """
+
+    def __init__(self, orig_rate: int, target_rate: int, taps_per_phase: int = TAPS_PER_PHASE):
+        """
+        Args:
+            orig_rate: Input sample rate
+            target_rate: Output sample rate
+            taps_per_phase: Filter length per polyphase branch
+        """
+        g = math.gcd(orig_rate, target_rate)
+        self.up = target_rate // g
+        self.down = orig_rate // g
+        factor = max(self.up, self.down)
+        # An odd length gives the filter a delay of a whole number of upsampled samples
+        taps = taps_per_phase * self.up - 1
+        # Kaiser-windowed low-pass at the lower of the two Nyquist rates
+        h = firwin(taps, 0.95 / factor, window=("kaiser", 8.6)) * self.up
+        # Row p holds phase p, h[p], h[p + up], ..., reversed to line up with a window of input
+        self._phases = np.append(h, 0.0).reshape(taps_per_phase, self.up).T[:, ::-1].copy()
+        self._history = np.zeros(taps_per_phase - 1)
+        # Upsampled index of the next output sample. Starting at the filter's
+        # delay of (taps - 1) / 2 upsampled samples compensates it exactly, also
+        # where it is not a whole number of output samples (0.4 for 44.1 -> 48 kHz)
+        self._next = (taps - 1) // 2
+        self._inputs = 0
+        self._outputs = 0
+
+    def _filter(self, chunk: np.ndarray) -> np.ndarray:
+        """Return every output sample whose input samples have all arrived."""
+        if not len(chunk):
+            # The trimmer yields empty chunks while it holds silence
+            return np.zeros(0)
+        buffer = np.concatenate((self._history, chunk))
+        windows = sliding_window_view(buffer, len(self._history) + 1)
+        total = self._inputs + len(chunk)
+        count = max(0, -(-(total * self.up - self._next) // self.down))
+        out = np.empty(count)
+        # Every up-th output falls on the same phase, down input samples further on
+        for j in range(min(self.up, count)):
+            index = self._next + j * self.down
+            start = index // self.up - self._inputs
+            rows = len(range(j, count, self.up))
+            phase = self._phases[index % self.up]
+            if self.down == 1:
+                # Plain upsampling uses every window, np.correlate gets there faster
+                out[j::self.up] = np.correlate(buffer[start:start + rows + len(self._history)], phase, "valid")
+            else:
+                stop = start + (rows - 1) * self.down + 1
+                out[j::self.up] = windows[start:stop:self.down] @ phase
+        self._history = buffer[len(buffer) - len(self._history):]
+        self._next += count * self.down
+        self._inputs = total
+        return out
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Resample the next chunk of the stream."""
+        if self.up == self.down == 1:
+            return chunk
+        out = self._filter(chunk)
+        self._outputs += len(out)
+        return out.astype(np.float32)
+
+    def flush(self) -> np.ndarray:
+        """Return the output still inside the filter at the end of the stream."""
+        if self.up == self.down == 1:
+            return np.zeros(0, dtype=np.float32)
+        expected = -(-self._inputs * self.up // self.down)
+        out = self._filter(np.zeros(len(self._history) + 1))
+        out = out[:max(0, expected - self._outputs)]
+        self._outputs = expected
+        return out.astype(np.float32)
+
+
+def mastered_blocks(path: str, sample_rate: int, block_size: int = BLOCK_SIZE) -> Iterator[np.ndarray]:
+    """Yield the blocks of a WAV file with its silences trimmed, resampled to `sample_rate`."""
+    orig_rate = sf.info(path).samplerate
+    trimmer = SilenceTrimmer(orig_rate)
+    resampler = Resampler(orig_rate, sample_rate)
+    for block in read_blocks(path, block_size):
+        yield resampler.process(trimmer.process(block))
+    yield resampler.process(trimmer.flush())
+    yield resampler.flush()
+
+
+def measure_loudness(path: str, sample_rate: int = OUTPUT_SAMPLE_RATE) -> Dict[str, float]:
+    """
+    Measure the integrated loudness and peak of a WAV file as it will be written.
+
+    Silences are trimmed and the audio is resampled first, so the peak includes
+    the overshoot the resampling filter adds between the original samples.
+
+    Returns:
+        Dictionary with "lufs" and "peak_db"
+    """
+    meter = LoudnessMeter(sample_rate)
+    for block in mastered_blocks(path, sample_rate):
+        meter.add(block)
+    peak_db = 20 * math.log10(meter.peak) if meter.peak > 0 else float("-inf")
+    return {"lufs": meter.integrated(), "peak_db": peak_db}
+
+
+def postprocess(input_path: str, output_path: str, target_lufs: float = TARGET_LUFS,
+                sample_rate: int = OUTPUT_SAMPLE_RATE, subtype: str = "PCM_16") -> Dict[str, float]:
+    """
+    Trim silences, normalize loudness and resample a voiceover.
+
+    Args:
+        input_path: Voiceover WAV
+        output_path: Mastered WAV to write
+        target_lufs: Integrated loudness to normalize to
+        sample_rate: Output sample rate
+        subtype: soundfile subtype of the output
+
+    Returns:
+        Dictionary with the measured loudness, applied gain and output length
+    """
+    stats = measure_loudness(input_path, sample_rate)
+    gain_db = 0.0
+    if math.isfinite(stats["lufs"]):
+        # Never push peaks past the ceiling, quiet speech just ends up below target
+        gain_db = min(target_lufs - stats["lufs"], PEAK_CEILING_DB - stats["peak_db"])
+    gain = np.float32(10 ** (gain_db / 20))
+
+    tmp_path = f"{output_path}.tmp.wav"
+    frames = write_wav_stream(
+        (np.clip(block * gain, -1.0, 1.0) for block in mastered_blocks(input_path, sample_rate)),
+        tmp_path, sample_rate=sample_rate, subtype=subtype,
+    )
+    os.replace(tmp_path, output_path)
+
+    stats.update({"gain_db": gain_db, "seconds": frames / sample_rate})
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Master a voiceover for upload")
+    parser.add_argument("input", help="voiceover WAV")
+    parser.add_argument("output", help="mastered WAV to write")
+    parser.add_argument("--target-lufs", type=float, default=TARGET_LUFS)
+    parser.add_argument("--sample-rate", type=int, default=OUTPUT_SAMPLE_RATE)
+    args = parser.parse_args(argv)
+    stats = postprocess(args.input, args.output, args.target_lufs, args.sample_rate)
+    print(f"Mastered {args.output}: {stats['lufs']:.1f} LUFS measured, "
+          f"{stats['gain_db']:+.1f} dB gain, {stats['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Batch Uploader
+
+Uploads every finished output/youtube-{channel}-{date}/ bundle that has not
+been uploaded yet, a few at a time, without going over the YouTube Data API's
+daily quota. Results are kept in a manifest so a bundle is never uploaded twice.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo
+
+import tracing
+from youtube_uploader import generate_title, upload_video
+
+BUNDLE_PATTERN = re.compile(r"^youtube-(?P<channel>[a-z]+)-(?P<date>\d{4}-\d{2}-\d{2})$")
+
+# Quota cost of a videos.insert call and the default daily budget of a project
+UPLOAD_QUOTA_COST = 1600
+DAILY_QUOTA = 10000
+# The API quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+CHANNEL_TAGS = {
+    "tech": ["tech", "hacker news", "tech news", "shorts"],
+    "stoic": ["stoicism", "marcus aurelius", "philosophy", "shorts"],
+}
+
+# YouTube limits video descriptions to 5000 bytes
+MAX_DESCRIPTION_CHARS = 4500
+
+
+class UploadManifest:
+    """JSON record of finished uploads and quota spent per day."""
+
+    def __init__(self, path: str = "data/upload_manifest.json", daily_quota: int = DAILY_QUOTA):
+        """
+        Args:
+            path: Manifest file
+            daily_quota: API units that may be spent per quota day
+        """
+        self.path = path
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._data = json.load(f)
+        except (OSError, ValueError):
+            self._data = {"uploads": {}, "quota": {}}
+
+    def is_uploaded(self, bundle: str) -> bool:
+        with self._lock:
+            return bundle in self._data["uploads"]
+
+    def reserve_quota(self, cost: int = UPLOAD_QUOTA_COST) -> bool:
+        """
+        Charge an API call to today's budget.
+
+        Returns:
+            False if the call would go over the daily quota
+        """
+        day = datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+        with self._lock:
+            spent = self._data["quota"].get(day, 0)
+            if spent + cost > self.daily_quota:
+                return False
+            # Older days are no longer needed
+            self._data["quota"] = {day: spent + cost}
+            self._save()
+        return True
+
+    def refund_quota(self, cost: int = UPLOAD_QUOTA_COST):
+        """Return units reserved for a call that failed; nothing is returned across a quota reset."""
+        day = datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+        with self._lock:
+            if day not in self._data["quota"]:
+                return
+            self._data["quota"][day] = max(0, self._data["quota"][day] - cost)
+            self._save()
+
+    def record(self, bundle: str, result: Dict):
+        """Remember a finished upload."""
+        with self._lock:
+            self._data["uploads"][bundle] = result
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def find_bundles(output_dir: str = "output", dates: Optional[Iterable[str]] = None) -> List[Dict]:
+    """
+    Find finished video bundles.
+
+    A bundle is finished once its video-{channel}.mp4 exists.
+
+    Args:
+        output_dir: Directory holding the youtube-{channel}-{date} bundles
+        dates: Only return bundles of these YYYY-MM-DD dates
+
+    Returns:
+        Bundle dictionaries (dir, channel, date, video, script) sorted by date
+    """
+    dates = set(dates) if dates else None
+    bundles = []
+    try:
+        names = os.listdir(output_dir)
+    except OSError:
+        return []
+    for name in names:
+        match = BUNDLE_PATTERN.match(name)
+        if not match or (dates and match["date"] not in dates):
+            continue
+        bundle_dir = os.path.join(output_dir, name)
+        channel = match["channel"]
+        video = os.path.join(bundle_dir, f"video-{channel}.mp4")
+        if not os.path.exists(video):
+            continue
+        bundles.append({
+            "dir": bundle_dir,
+            "channel": channel,
+            "date": match["date"],
+            "video": video,
+            "script": os.path.join(bundle_dir, f"script-{channel}.txt"),
+        })
+    return sorted(bundles, key=lambda bundle: (bundle["date"], bundle["channel"]))
+
+
+def upload_batch(service_factory: Callable, output_dir: str = "output",
+                 dates: Optional[Iterable[str]] = None, max_concurrency: int = 2,
+                 manifest: Optional[UploadManifest] = None, title_func: Callable = None) -> Dict[str, str]:
+    """
+    Upload all finished bundles not in the manifest yet.
+
+    Args:
+        service_factory: Returns the YouTube service object a worker thread uses,
+            e.g. youtube_uploader.get_youtube; called once per thread
+        output_dir: Directory holding the bundles
+        dates: Only upload bundles of these YYYY-MM-DD dates
+        max_concurrency: Uploads running at the same time
+        manifest: Upload manifest, defaults to data/upload_manifest.json
+        title_func: Builds a title from the script text, defaults to a Gemini generated one
+
+    Returns:
+        Mapping of bundle directory to "uploaded", "failed" or "over quota"
+    """
+    manifest = manifest or UploadManifest()
+    title_func = title_func or generate_title
+    pending = [bundle for bundle in find_bundles(output_dir, dates) if not manifest.is_uploaded(bundle["dir"])]
+    print(f"Found {len(pending)} bundles to upload")
+
+    local = threading.local()
+
+    def upload(bundle):
+        if not manifest.reserve_quota():
+            print(f"Skipping {bundle['dir']}: daily quota budget used up")
+            return "over quota"
+        try:
+            if not hasattr(local, "youtube"):
+                local.youtube = service_factory()
+            title, description = describe_bundle(bundle, title_func)
+            start = time.time()
+            response = upload_video(
+                youtube=local.youtube,
+                file_path=bundle["video"],
+                title=title,
+                description=description,
+                tags=CHANNEL_TAGS.get(bundle["channel"]),
+            )
+        except Exception:
+            # The bundle stays pending, so its retry must find the units still available
+            manifest.refund_quota()
+            raise
+        manifest.record(bundle["dir"], {
+            "video_id": response.get("id"),
+            "title": title,
+            "uploaded_at": datetime.now().isoformat(),
+            "seconds": round(time.time() - start, 1),
+        })
+        return "uploaded"
+
+    results = {}
+    with tracing.span("youtube.batch_upload", bundles=len(pending)) as span:
+        # The upload spans of the worker threads are children of the batch span
+        upload = tracing.in_context(upload)
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {executor.submit(upload, bundle): bundle["dir"] for bundle in pending}
+            for future in as_completed(futures):
+                bundle_dir = futures[future]
+                try:
+                    results[bundle_dir] = future.result()
+                except Exception as e:
+                    tracing.error("youtube.batch_errors", f"❌ Upload of {bundle_dir} failed: {e}",
+                                  bundle=bundle_dir)
+                    results[bundle_dir] = "failed"
+        span.set(uploaded=sum(status == "uploaded" for status in results.values()))
+    return results
+
+
+def describe_bundle(bundle: Dict, title_func: Callable):
+    """Return the title and description of a bundle's video, built from its script."""
+    try:
+        with open(bundle["script"], "r", encoding="utf-8") as f:
+            script = f.read()
+    except OSError:
+        script = ""
+
+    if bundle["channel"] == "stoic" and script.startswith("QUOTE:"):
+        # Stoic scripts start with the quote and author, the narration follows
+        header, _, narration = script.partition("SCRIPT:")
+        topic = header.strip()
+        description = f"{header.strip()}\n\n{narration.strip()}"
+    else:
+        topic = f"{bundle['channel']} news of {bundle['date']}: {script[:500]}"
+        description = script
+
+    title = title_func(topic) if script else f"{bundle['channel'].title()} - {bundle['date']}"
+    return title, description[:MAX_DESCRIPTION_CHARS]
@@ -0,0 +1,100 @@
+"""
+Disk LRU
+
+Size cap shared by the on-disk caches (HTTP responses, Gemini responses, TTS
+segments). The modification time of an entry's file marks its last use, and
+the least recently used entries are removed once the cache outgrows its budget.
+"""
+
+import os
+import threading
+from typing import Optional, Sequence
+
+
+def mark_used(path: str):
+    """Record a cache hit on `path` for LRU eviction."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class SizeCap:
+    """
+    Keeps a cache directory under `max_bytes`.
+
+    Writers report the bytes they add through `added`. The directory is only
+    listed when the running total crosses `max_bytes`; eviction then goes down
+    to `low_water` of the budget, so the next listing is again many writes away.
+    Entries removed or overwritten by the caches themselves are not reported:
+    the running total can only overestimate, and the listing corrects it.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, suffix: str,
+                 companions: Sequence[str] = (), low_water: float = 0.9):
+        """
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Upper bound for the total size of the entries
+            suffix: Suffix of the file whose modification time marks the last use of an entry
+            companions: Suffixes of further files of an entry, counted and evicted with it
+            low_water: Fraction of `max_bytes` an eviction goes down to
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.companions = tuple(companions)
+        self.low_water = low_water
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    def added(self, nbytes: int):
+        """Account for `nbytes` written to the cache and evict if it is now over budget."""
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+            else:
+                self._total += nbytes
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        """Return the entries as (last use, size, paths), and their total size."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            base = path[:-len(self.suffix)]
+            paths = [path] + [base + companion for companion in self.companions]
+            try:
+                used = os.path.getmtime(path)
+            except OSError:
+                continue
+            size = sum(_size(p) for p in paths)
+            entries.append((used, size, paths))
+            total += size
+        return entries, total
+
+    def _evict(self):
+        entries, total = self._scan()
+        if total > self.max_bytes:
+            target = self.max_bytes * self.low_water
+            for _, size, paths in sorted(entries):
+                if total <= target:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+        self._total = total
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,357 @@
+"""
+Shared HTTP fetch layer
+
+Pooled keep-alive sessions plus a persistent on-disk HTTP cache used by the
+scrapers. Cached responses are served without touching the network while they
+are fresh and revalidated with ETag/Last-Modified once they go stale. Bodies
+cut short by a `max_bytes` read are cached with that limit and only served to
+requests that read no more than it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import tracing
+from disk_lru import SizeCap, mark_used
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+
+class ContentTypeError(ValueError):
+    """Raised when a response has a content type the caller did not ask for."""
+
+
+class HttpCache:
+    """Persistent HTTP response cache with TTL and size-capped LRU eviction."""
+
+    def __init__(self, cache_dir: str = "data/http_cache", ttl: float = 12 * 3600,
+                 max_stale: float = 7 * 24 * 3600, max_bytes: int = 200 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cached responses
+            ttl: Seconds a response is served without revalidation
+            max_stale: Seconds a stale response is kept around for conditional GETs
+            max_bytes: Upper bound for the total size of cached bodies
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_cap = SizeCap(cache_dir, max_bytes, ".json", companions=(".body",))
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".body"
+
+    def load(self, url: str) -> Optional[Dict]:
+        """
+        Load a cached entry.
+
+        Args:
+            url: Request URL
+
+        Returns:
+            Entry metadata with the body under `content`, or None if not cached
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(body_path, "rb") as f:
+                entry["content"] = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry["stored_at"] > self.ttl + self.max_stale:
+            self.delete(url)
+            return None
+
+        mark_used(meta_path)
+        return entry
+
+    def is_fresh(self, entry: Dict, ttl: Optional[float] = None) -> bool:
+        """Return True if the entry can be served without revalidation."""
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() - entry["stored_at"] < ttl
+
+    def store(self, url: str, response: requests.Response, truncated_at: Optional[int] = None):
+        """
+        Store a successful response.
+
+        Args:
+            url: Request URL
+            response: Response with status 200
+            truncated_at: Byte limit the body was cut at, None for a complete body
+        """
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control or len(response.content) > self.max_bytes:
+            return
+
+        meta_path, body_path = self._paths(url)
+        entry = {
+            "url": url,
+            "stored_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "truncated_at": truncated_at,
+            "headers": {k: v for k, v in response.headers.items()
+                        if k.lower() in ("content-type", "etag", "last-modified")},
+        }
+        meta = json.dumps(entry).encode("utf-8")
+        with self._lock:
+            _atomic_write(body_path, response.content)
+            _atomic_write(meta_path, meta)
+        self._size_cap.added(len(response.content) + len(meta))
+
+    def touch(self, url: str):
+        """Reset the age of an entry after a successful revalidation."""
+        meta_path, _ = self._paths(url)
+        with self._lock:
+            try:
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                entry["stored_at"] = time.time()
+                _atomic_write(meta_path, json.dumps(entry).encode("utf-8"))
+            except (OSError, ValueError):
+                pass
+
+    def delete(self, url: str):
+        """Remove an entry from the cache."""
+        for path in self._paths(url):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class Fetcher:
+    """HTTP client with pooled keep-alive connections and conditional-GET caching."""
+
+    def __init__(self, cache: Optional[HttpCache] = None, pool_size: int = 16,
+                 headers: Optional[Dict] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            cache: Response cache, or None to disable caching
+            pool_size: Maximum number of pooled connections per host
+            headers: Default request headers
+        """
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "bytes_downloaded": 0}
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+        tracing.count(f"http.{key}", amount)
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: float = 10,
+            ttl: Optional[float] = None, use_cache: bool = True,
+            before_request: Optional[Callable[[str], None]] = None,
+            max_bytes: Optional[int] = None,
+            content_types: Optional[Iterable[str]] = None) -> requests.Response:
+        """
+        Perform a GET request, going through the cache when enabled.
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers
+            timeout: Request timeout in seconds
+            ttl: Override of the cache freshness window for this request
+            use_cache: Set to False to bypass the cache
+            before_request: Called with the URL before going to the network,
+                e.g. a rate limiter; not called for fresh cache hits
+            max_bytes: Stream the body and stop reading after this many bytes
+            content_types: Accepted media types; other responses raise
+                ContentTypeError before their body is downloaded
+
+        Returns:
+            The response; cached responses have `from_cache` set to True
+        """
+        with tracing.span("http.get", url=url) as span:
+            return self._get(url, headers, timeout, ttl, use_cache, before_request, max_bytes,
+                             content_types, span)
+
+    def _get(self, url, headers, timeout, ttl, use_cache, before_request, max_bytes, content_types, span):
+        cache = self.cache if use_cache else None
+        entry = cache.load(url) if cache else None
+        truncated_at = entry.get("truncated_at") if entry else None
+        if truncated_at is not None and (max_bytes is None or max_bytes > truncated_at):
+            # Too short for this request; revalidating it would only confirm the short body
+            entry = None
+
+        if entry and cache.is_fresh(entry, ttl):
+            self._count("hits")
+            span.set(cache="hit")
+            response = _cached_response(url, entry)
+            _check_content_type(response, content_types)
+            return response
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        if before_request:
+            before_request(url)
+        stream = max_bytes is not None or content_types is not None
+        response = self.session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+        response.from_cache = False
+
+        if entry and response.status_code == 304:
+            response.close()
+            self._count("revalidated")
+            span.set(cache="revalidated")
+            cache.touch(url)
+            response = _cached_response(url, entry)
+            _check_content_type(response, content_types)
+            return response
+
+        self._count("misses")
+        truncated_at = None
+        if stream and response.status_code == 200:
+            try:
+                _check_content_type(response, content_types)
+                if _read_limited(response, max_bytes):
+                    truncated_at = max_bytes
+            finally:
+                response.close()
+        self._count("bytes_downloaded", len(response.content))
+        span.set(cache="miss", status=response.status_code, bytes=len(response.content))
+        if cache and response.status_code == 200:
+            cache.store(url, response, truncated_at)
+        return response
+
+    def report(self) -> str:
+        """Return a one-line summary of the cache statistics."""
+        s = self.stats
+        return (f"HTTP cache: {s['hits']} hits, {s['revalidated']} revalidated, "
+                f"{s['misses']} misses, {s['bytes_downloaded']} bytes downloaded")
+
+
+class HostRateLimiter:
+    """Enforce a minimum delay between requests to the same host."""
+
+    def __init__(self, min_interval: float = 1.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            min_interval: Minimum number of seconds between two requests to one host
+        """
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """
+        Block until a request to the host of `url` is allowed.
+
+        Requests to different hosts never wait on each other.
+
+        Args:
+            url: URL that is about to be requested
+        """
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        with host_lock:
+            last = self._last_request.get(host)
+            if last is not None:
+                delay = self.min_interval - (time.monotonic() - last)
+                if delay > 0:
+                    time.sleep(delay)
+            self._last_request[host] = time.monotonic()
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> Fetcher:
+    """Return the process-wide fetcher shared by all scrapers."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher(cache=HttpCache())
+        return _default_fetcher
+
+
+def _cached_response(url: str, entry: Dict) -> requests.Response:
+    """Build a requests.Response from a cache entry."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry["content"]
+    response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.from_cache = True
+    return response
+
+
+def _check_content_type(response: requests.Response, content_types: Optional[Iterable[str]]):
+    if content_types is None:
+        return
+    media_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    # Servers that send no content type at all are given the benefit of the doubt
+    if media_type and media_type not in content_types:
+        raise ContentTypeError(f"unsupported content type {media_type!r}")
+
+
+def _read_limited(response: requests.Response, max_bytes: Optional[int]) -> bool:
+    """
+    Read a streamed body, stopping once max_bytes have been received.
+
+    Returns:
+        True if the body may be longer than what was read
+    """
+    chunks = []
+    received = 0
+    truncated = False
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        chunks.append(chunk)
+        received += len(chunk)
+        if max_bytes is not None and received >= max_bytes:
+            # A body of exactly max_bytes cannot be told apart from a longer one
+            truncated = True
+            break
+    content = b"".join(chunks)
+    response._content = content[:max_bytes] if max_bytes is not None else content
+    response._content_consumed = True
+    return truncated
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,212 @@
+"""
+Gemini Response Cache
+
+Caching wrapper around genai.Client. Responses are stored on disk keyed by
+(model, prompt hash, generation config), so re-running a stage with an
+identical prompt costs no API quota.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import tracing
+from disk_lru import SizeCap, mark_used
+
+
+class CachedResponse:
+    """Minimal stand-in for a GenerateContentResponse served from the cache."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.from_cache = True
+
+
+class ResponseCache:
+    """On-disk response store with TTL and size-capped LRU eviction."""
+
+    def __init__(self, cache_dir: str = "data/gemini_cache", ttl: float = 24 * 3600,
+                 max_bytes: int = 20 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory holding one JSON file per response
+            ttl: Seconds a response is reused
+            max_bytes: Upper bound for the total size of the cache
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_cap = SizeCap(cache_dir, max_bytes, ".json")
+
+    @staticmethod
+    def key(model: str, contents: Any, config: Any = None) -> str:
+        """Return the cache key of a request."""
+        payload = json.dumps({"model": model, "contents": contents, "config": _config_dict(config)},
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["stored_at"] > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        mark_used(path)
+        return entry["text"]
+
+    def put(self, key: str, model: str, text: str):
+        """Store a response text."""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "stored_at": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._size_cap.added(os.path.getsize(path))
+
+
+class _CachedModels:
+    """Mirrors client.models with a caching generate_content."""
+
+    def __init__(self, owner: "CachedGeminiClient"):
+        self._owner = owner
+
+    def generate_content(self, model: str, contents: Any, config: Any = None,
+                         bypass_cache: bool = False, **kwargs):
+        """
+        Same as genai.Client.models.generate_content, served from the cache when possible.
+
+        Args:
+            model: Model name
+            contents: Prompt
+            config: Generation config
+            bypass_cache: Always call the API; the fresh response still refreshes the cache
+            **kwargs: Passed through to the wrapped client
+
+        Returns:
+            The API response, or a CachedResponse with the same `text`
+        """
+        with tracing.span("gemini.generate_content", model=model) as span:
+            key, cached = self._owner._lookup(model, contents, config, bypass_cache)
+            span.set(cached=cached is not None)
+            if cached is not None:
+                return cached
+            if config is not None:
+                kwargs["config"] = config
+            response = self._owner.client.models.generate_content(model=model, contents=contents, **kwargs)
+            self._owner._store(key, model, response)
+            span.set(tokens=_total_tokens(response))
+            return response
+
+
+class _AsyncCachedModels:
+    """Mirrors client.aio.models with a caching generate_content."""
+
+    def __init__(self, owner: "CachedGeminiClient"):
+        self._owner = owner
+
+    async def generate_content(self, model: str, contents: Any, config: Any = None,
+                               bypass_cache: bool = False, **kwargs):
+        """Async version of _CachedModels.generate_content."""
+        owner = self._owner
+        with tracing.span("gemini.generate_content", model=model) as span:
+            key, cached = owner._lookup(model, contents, config, bypass_cache)
+            span.set(cached=cached is not None)
+            if cached is not None:
+                return cached
+            if config is not None:
+                kwargs["config"] = config
+            aio = getattr(owner.client, "aio", None)
+            if aio is not None:
+                response = await aio.models.generate_content(model=model, contents=contents, **kwargs)
+            else:
+                # Clients without an async interface run in a worker thread
+                response = await asyncio.to_thread(
+                    owner.client.models.generate_content, model=model, contents=contents, **kwargs)
+            owner._store(key, model, response)
+            span.set(tokens=_total_tokens(response))
+            return response
+
+
+class _AsyncNamespace:
+    def __init__(self, owner: "CachedGeminiClient"):
+        self.models = _AsyncCachedModels(owner)
+
+
+class CachedGeminiClient:
+    """Drop-in wrapper for genai.Client whose `models.generate_content` is cached, sync and async."""
+
+    def __init__(self, client, cache: Optional[ResponseCache] = None, enabled: Optional[bool] = None):
+        """
+        Args:
+            client: genai.Client, or any object with the same `models.generate_content`
+            cache: Response store, defaults to data/gemini_cache
+            enabled: Set to False to bypass the cache for every request; defaults
+                to on unless the GEMINI_CACHE environment variable is "off"
+        """
+        if enabled is None:
+            enabled = os.getenv("GEMINI_CACHE", "on").lower() not in ("off", "0", "false")
+        self.client = client
+        self.cache = cache or ResponseCache()
+        self.enabled = enabled
+        self.models = _CachedModels(self)
+        self.aio = _AsyncNamespace(self)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+        tracing.count(f"gemini_cache.{key}")
+
+    def _lookup(self, model: str, contents: Any, config: Any, bypass_cache: bool):
+        """Return the cache key of a request and the cached response, if any."""
+        key = self.cache.key(model, contents, config)
+        if self.enabled and not bypass_cache:
+            text = self.cache.get(key)
+            if text is not None:
+                self._count("hits")
+                return key, CachedResponse(text)
+        self._count("misses")
+        return key, None
+
+    def _store(self, key: str, model: str, response):
+        if self.enabled and response.text:
+            self.cache.put(key, model, response.text)
+
+    def report(self) -> str:
+        """Return a one-line summary of the cache statistics."""
+        return f"Gemini cache: {self.stats['hits']} hits, {self.stats['misses']} misses"
+
+    def __getattr__(self, name):
+        # Everything other than models.generate_content goes to the real client
+        return getattr(self.client, name)
+
+
+def _total_tokens(response) -> Optional[int]:
+    """Return the token usage reported with a response, if any."""
+    return getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+
+
+def _config_dict(config: Any) -> Any:
+    """Turn a generation config (dict or pydantic model) into plain data."""
+    if config is None:
+        return None
+    if hasattr(config, "model_dump"):
+        return config.model_dump(exclude_none=True, mode="json")
+    return config
@@ -0,0 +1,280 @@
+"""
+Gemini Client
+
+Shared generation client for every channel. Requests run on one background
+event loop with a bounded number in flight, pass through requests-per-minute
+and tokens-per-minute token buckets, time out, and are retried with
+exponential backoff and jitter on rate limits, server errors and network
+failures. Responses are cached on disk by gemini_cache.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import tracing
+from gemini_cache import CachedGeminiClient
+
+try:
+    import httpx
+    NETWORK_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:
+    NETWORK_ERRORS = (ConnectionError, TimeoutError)
+
+# HTTP status codes worth retrying
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+# Rough prompt size estimate used to reserve tokens before a request
+CHARS_PER_TOKEN = 4
+EXPECTED_OUTPUT_TOKENS = 400
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            per_minute: Tokens added per minute
+            capacity: Burst size, defaults to one minute worth of tokens
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Wait until `amount` tokens are available and take them.
+
+        Returns:
+            Seconds spent waiting
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        # Waiters are served one at a time so large requests are not starved
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                delay = (amount - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.tokens -= amount
+        return waited
+
+    def adjust(self, amount: float):
+        """Take (or give back, if negative) tokens without waiting, e.g. once actual usage is known."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class _Models:
+    def __init__(self, owner: "RateLimitedClient"):
+        self._owner = owner
+
+    def generate_content(self, model: str, contents: Any, **kwargs):
+        """Blocking generate_content; safe to call from any thread."""
+        return self._owner.run(self._owner.generate_content(model, contents, **kwargs))
+
+
+class _AsyncModels:
+    def __init__(self, owner: "RateLimitedClient"):
+        self._owner = owner
+
+    async def generate_content(self, model: str, contents: Any, **kwargs):
+        """generate_content awaitable from any event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._owner.generate_content(model, contents, **kwargs), self._owner.loop)
+        return await asyncio.wrap_future(future)
+
+
+class _AsyncNamespace:
+    def __init__(self, owner: "RateLimitedClient"):
+        self.models = _AsyncModels(owner)
+
+
+class RateLimitedClient:
+    """Wraps genai.Client with concurrency limits, rate limiting, timeouts and retries."""
+
+    def __init__(self, client, max_concurrency: int = 4, requests_per_minute: float = 15,
+                 tokens_per_minute: float = 1_000_000, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 32.0, timeout: float = 60.0):
+        """
+        Args:
+            client: genai.Client, or any object with the same `models.generate_content`
+            max_concurrency: Maximum number of requests in flight
+            requests_per_minute: Request quota of the model
+            tokens_per_minute: Token quota of the model
+            max_retries: Retries of a failed request before giving up
+            base_delay: Backoff before the first retry, doubled on every attempt
+            max_delay: Upper bound for a single backoff
+            timeout: Seconds a single attempt may take
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.models = _Models(self)
+        self.aio = _AsyncNamespace(self)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, float] = {"requests": 0, "retries": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Background event loop every request runs on, started on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="gemini-client", daemon=True).start()
+                # Limits are created on the loop that uses them
+                asyncio.run_coroutine_threadsafe(self._create_limits(), loop).result()
+                self._loop = loop
+            return self._loop
+
+    async def _create_limits(self):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._request_bucket = TokenBucket(self.requests_per_minute)
+        self._token_bucket = TokenBucket(self.tokens_per_minute)
+
+    def run(self, coro):
+        """Run a coroutine on the background loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+        tracing.count(f"gemini.{key}", amount)
+
+    async def generate_content(self, model: str, contents: Any, **kwargs):
+        """
+        Send one request, waiting for quota and retrying transient failures.
+
+        Must run on `loop`; use `models` or `aio.models` from elsewhere.
+
+        Returns:
+            The API response
+        """
+        estimate = estimate_tokens(contents) + EXPECTED_OUTPUT_TOKENS
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                waited = await self._request_bucket.acquire()
+                waited += await self._token_bucket.acquire(estimate)
+                if waited:
+                    self._count("throttled_seconds", waited)
+                self._count("requests")
+                try:
+                    response = await asyncio.wait_for(self._call(model, contents, **kwargs), self.timeout)
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e):
+                        self._count("failures")
+                        raise
+                    error = e
+                else:
+                    usage = getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+                    if usage:
+                        self._token_bucket.adjust(usage - estimate)
+                    return response
+
+            delay = retry_after(error)
+            if delay is None:
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                # Full jitter keeps concurrent retries from hitting the API together
+                delay = random.uniform(0, delay)
+            self._count("retries")
+            print(f"Gemini request failed ({tracing.describe_error(error)}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _call(self, model: str, contents: Any, **kwargs):
+        aio = getattr(self.client, "aio", None)
+        if aio is not None:
+            return await aio.models.generate_content(model=model, contents=contents, **kwargs)
+        # Clients without an async interface run in a worker thread
+        return await asyncio.to_thread(self.client.models.generate_content, model=model,
+                                       contents=contents, **kwargs)
+
+    def report(self) -> str:
+        """Return a one-line summary of the request statistics."""
+        return (f"Gemini API: {self.stats['requests']} requests, {self.stats['retries']} retries, "
+                f"{self.stats['failures']} failures, {self.stats['throttled_seconds']:.1f}s throttled")
+
+
+def estimate_tokens(contents: Any) -> int:
+    """Estimate the token count of a prompt from its length."""
+    text = contents if isinstance(contents, str) else json.dumps(contents, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """Return the HTTP status of an API error, if it has one."""
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed request is worth retrying."""
+    if isinstance(error, (asyncio.TimeoutError,) + NETWORK_ERRORS):
+        return True
+    return status_code(error) in RETRY_STATUS
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Return the Retry-After delay sent with an error response, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> CachedGeminiClient:
+    """
+    Return the process-wide Gemini client, creating it on first use.
+
+    Every channel shares it, so concurrent stages stay within one quota. Limits
+    can be tuned with GEMINI_MAX_CONCURRENCY, GEMINI_RPM and GEMINI_TPM.
+    google.genai is only imported here since it takes most of a second.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google import genai
+            client = RateLimitedClient(
+                genai.Client(api_key=os.getenv("GEMINI_API_KEY")),
+                max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+                requests_per_minute=float(os.getenv("GEMINI_RPM", "15")),
+                tokens_per_minute=float(os.getenv("GEMINI_TPM", "1000000")),
+            )
+            _client = CachedGeminiClient(client)
+        return _client
+
+
+def report() -> str:
+    """Return the cache and request statistics of the shared client."""
+    client = get_client()
+    return f"{client.report()}\n{client.client.report()}"
@@ -0,0 +1,222 @@
+"""
+Pipeline
+
+A small make-like stage graph. Each stage declares the files it reads and
+writes; a stage is skipped when its outputs exist and the content hashes of its
+inputs and outputs match the last successful run. Files whose bytes change on
+every run without their content changing (timestamps, SQLite bookkeeping) can
+be given a fingerprint function that hashes a stable projection instead. Independent branches run
+concurrently.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import tracing
+
+
+class Stage:
+    """One step of the pipeline."""
+
+    def __init__(self, name: str, run: Callable[[], bool], inputs: Iterable[str] = (),
+                 outputs: Iterable[str] = (), deps: Iterable[str] = (),
+                 params: Optional[Dict] = None, always_run: bool = False,
+                 fingerprints: Optional[Dict[str, Callable[[str], str]]] = None):
+        """
+        Args:
+            name: Unique stage name, e.g. "tech/script"
+            run: Callable doing the work, returns True on success
+            inputs: Files the stage reads
+            outputs: Files the stage writes
+            deps: Names of stages that must finish first
+            params: Settings that change the outputs; a change forces a rebuild
+            always_run: Never skip, e.g. for stages reading from the network
+            fingerprints: Digest functions by path, for files not to be hashed whole
+        """
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.params = params or {}
+        self.always_run = always_run
+        self.fingerprints = fingerprints or {}
+
+
+class Pipeline:
+    """Runs stages in dependency order, skipping stages that are up to date."""
+
+    def __init__(self, state_file: str = "data/pipeline_state.json", max_workers: int = 4):
+        """
+        Args:
+            state_file: Where input/output hashes of the last runs are kept
+            max_workers: Maximum number of stages running at the same time
+        """
+        self.state_file = state_file
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self._state_lock = threading.Lock()
+        self._state = self._load_state()
+
+    def add(self, stage: Stage):
+        """Add a stage; its dependencies must already be added."""
+        for dep in stage.deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {stage.name} depends on unknown stage {dep}")
+        self.stages[stage.name] = stage
+
+    def descendants(self, name: str) -> Set[str]:
+        """Return the stage and every stage that depends on it, directly or not."""
+        result = {name}
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages.values():
+                if stage.name not in result and result.intersection(stage.deps):
+                    result.add(stage.name)
+                    changed = True
+        return result
+
+    def run(self, only: Optional[Iterable[str]] = None, force: bool = False,
+            force_from: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """
+        Run the pipeline.
+
+        Args:
+            only: Stage names to run; other stages are treated as already done
+            force: Rebuild every stage
+            force_from: Rebuild these stages and everything downstream of them
+
+        Returns:
+            Mapping of stage name to "ran", "skipped", "failed" or "blocked"
+        """
+        selected = set(only) if only is not None else set(self.stages)
+        forced = set(self.stages) if force else set()
+        for name in force_from or ():
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage {name}")
+            forced |= self.descendants(name)
+
+        results: Dict[str, str] = {name: "skipped" for name in self.stages if name not in selected}
+        pending = [name for name in self.stages if name in selected]
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(results.get(dep) in ("failed", "blocked") for dep in stage.deps):
+                        print(f"⏭️  {name} blocked by a failed dependency")
+                        results[name] = "blocked"
+                        pending.remove(name)
+                    elif all(dep in results for dep in stage.deps):
+                        pending.remove(name)
+                        running[executor.submit(self._run_stage, stage, name in forced)] = name
+
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        return results
+
+    def _run_stage(self, stage: Stage, forced: bool) -> str:
+        if not forced and not stage.always_run and self._is_up_to_date(stage):
+            print(f"⏩ {stage.name} is up to date")
+            tracing.count("stage.skipped")
+            return "skipped"
+
+        print(f"Running {stage.name}...")
+        start = time.perf_counter()
+        with tracing.span(f"stage.{stage.name}", forced=forced) as span:
+            try:
+                ok = stage.run()
+            except Exception as e:
+                print(f"❌ {stage.name} failed: {e}")
+                span.fail(e)
+                return "failed"
+            missing = [path for path in stage.outputs if not os.path.exists(path)]
+            if not ok or missing:
+                print(f"❌ {stage.name} failed" + (f", missing outputs: {missing}" if missing else ""))
+                span.fail(f"missing outputs: {missing}" if missing else "stage reported failure")
+                return "failed"
+
+        self._record(stage)
+        print(f"✅ {stage.name} completed in {time.perf_counter() - start:.1f}s")
+        return "ran"
+
+    def _signature(self, stage: Stage) -> Optional[Dict]:
+        """Hash the inputs, outputs and params of a stage, or None if a file is missing."""
+        files = {}
+        for path in stage.inputs + stage.outputs:
+            if not os.path.exists(path):
+                return None
+            files[path] = stage.fingerprints.get(path, hash_file)(path)
+        return {"files": files, "params": json.dumps(stage.params, sort_keys=True)}
+
+    def _is_up_to_date(self, stage: Stage) -> bool:
+        signature = self._signature(stage)
+        with self._state_lock:
+            return signature is not None and self._state.get(stage.name) == signature
+
+    def _record(self, stage: Stage):
+        signature = self._signature(stage)
+        with self._state_lock:
+            self._state[stage.name] = signature
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp_path = self.state_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, indent=2)
+            os.replace(tmp_path, self.state_file)
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def hash_file(path: str) -> str:
+    """Return the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def json_fingerprint(*ignore_keys: str) -> Callable[[str], str]:
+    """
+    Return a fingerprint function hashing a JSON file without some keys.
+
+    Args:
+        *ignore_keys: Object keys left out at any depth, e.g. "scraped_at"
+
+    Returns:
+        Function of a path returning the SHA-256 of the remaining content
+    """
+    def strip(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: strip(item) for key, item in value.items() if key not in ignore_keys}
+        if isinstance(value, list):
+            return [strip(item) for item in value]
+        return value
+
+    def fingerprint(path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            content = strip(json.load(f))
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+    return fingerprint
+
+
+def failed(results: Dict[str, str]) -> List[str]:
+    """Return the names of failed or blocked stages."""
+    return [name for name, status in results.items() if status in ("failed", "blocked")]
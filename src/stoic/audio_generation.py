@@ -1,45 +1,32 @@
-from google import genai
 import os 
+import sys
 from dotenv import load_dotenv
-from kokoro import KPipeline
-from IPython.display import display, Audio
-import soundfile as sf
-import numpy as np
 import datetime
 load_dotenv()
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from voiceover import generate_voiceover
 
-today = datetime.datetime.now().strftime("%Y-%m-%d")
-def generate_audio(script_text):
-    # Use UTF-8 encoding when reading the file to handle special characters
-    with open(f'output/youtube-stoic-{today}/script-stoic.txt', 'r', encoding='utf-8') as f:
-        script_text = f.read()
-
-    pipeline = KPipeline(lang_code='a')
-
-    text = f"{script_text}"
 
-    generator = pipeline(text, voice='af_heart')
-    
-    # Collect all audio chunks
-    all_audio_chunks = []
-    for i, (gs, ps, audio) in enumerate(generator):
-        print(f"Processing chunk {i}")
-        all_audio_chunks.append(audio)
-    
-    # Combine all audio chunks into a single array
-    combined_audio = np.concatenate(all_audio_chunks)
-    
-    # Save the combined audio to a single file
-    output_filename = f'output/youtube-stoic-{today}/voiceover-stoic.wav'
-    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
-    sf.write(output_filename, combined_audio, 24000)
-    
-    print(f"Audio saved to {output_filename}")
-    
-    # Display the combined audio
-    display(Audio(data=combined_audio, rate=24000, autoplay=True))
+today = datetime.datetime.now().strftime("%Y-%m-%d")
+def generate_audio(script_text, stream=True, return_audio=True, autoplay=False, workers=1):
+    """
+    Generate the stoic voiceover for today's script
     
-    return combined_audio
+    Args:
+        script_text (str): Unused, the script is read from today's output folder
+        stream (bool): Write each chunk to the WAV file as it is produced
+        return_audio (bool): Return the samples, see voiceover.generate_voiceover
+        autoplay (bool): Play the result in IPython
+        workers (int): Synthesize sentence batches in this many processes
+        
+    Returns:
+        Float32 samples of the voiceover, or None if return_audio is False
+    """
+    return generate_voiceover('stoic', f'output/youtube-stoic-{today}/script-stoic.txt',
+                              f'output/youtube-stoic-{today}/voiceover-stoic.wav',
+                              voice='af_heart', lang_code='a', stream=stream, return_audio=return_audio,
+                              autoplay=autoplay, workers=workers)
 
-generate_audio('script-stoic.txt')
\ No newline at end of file
+if __name__ == "__main__":
+    generate_audio('script-stoic.txt', return_audio=False, workers=int(os.getenv("TTS_WORKERS", "1")))
\ No newline at end of file
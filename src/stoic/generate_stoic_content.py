@@ -1,7 +1,7 @@
 import os
 import sys
-from stoic_news_scraper import scrape_marcus_aurelius_quotes
-from stoic_script import load_marcus_aurelius_quotes, create_quote_script, write_script
+from stoic_news_scraper import scrape_quotes
+from stoic_script import load_quotes, create_quote_script, write_script
 import random
 
 def main():
@@ -10,17 +10,14 @@ def main():
     """
     print("\n=== STOIC CONTENT GENERATION PIPELINE ===\n")
     
-    # Step 1: Check if quotes already exist
-    quotes_file = "data/quotes/marcus_aurelius_quotes.json"
-    if not os.path.exists(quotes_file) or os.path.getsize(quotes_file) == 0:
-        print("No quotes found. Running scraper...")
-        scrape_marcus_aurelius_quotes()
-    else:
-        print("Quotes file already exists. Skipping scraping.")
+    # Step 1: Merge newly published quotes into the quote files
+    # (unchanged pages are revalidated from the HTTP cache)
+    print("Refreshing quotes...")
+    scrape_quotes()
     
     # Step 2: Load quotes
-    print("\n--- LOADING MARCUS AURELIUS QUOTES ---\n")
-    quotes = load_marcus_aurelius_quotes()
+    print("\n--- LOADING STOIC QUOTES ---\n")
+    quotes = load_quotes()
     
     if not quotes:
         print("No quotes found. Exiting...")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Gutenberg Ingestion
+
+Segments locally stored Project Gutenberg plain-text books (Meditations,
+Seneca's letters, the Enchiridion, ...) into passages and loads them into the
+passage_store full-text index.
+
+Books are memory-mapped and walked paragraph by paragraph, so only the
+paragraph being segmented is ever decoded, and passages are streamed into
+SQLite as they are produced. Books that have not changed since the last run
+are skipped.
+
+Usage:
+    python src/stoic/gutenberg_ingest.py [data/gutenberg/meditations.txt ...] [--force]
+"""
+
+import argparse
+import mmap
+import os
+import re
+import sys
+from typing import Dict, Iterator, List, Optional
+
+from passage_store import PassageStore
+
+GUTENBERG_DIR = "data/gutenberg"
+
+# Passages are a few sentences long: enough to stand on their own, short enough
+# to be explained in a 30 second video
+MIN_PASSAGE_WORDS = 8
+MAX_PASSAGE_WORDS = 90
+
+START_MARKER = re.compile(rb"\*\*\*\s*START OF (?:THE|THIS) PROJECT GUTENBERG E(?:BOOK|TEXT)[^\n]*\n", re.I)
+END_MARKER = re.compile(rb"\*\*\*\s*END OF (?:THE|THIS) PROJECT GUTENBERG E(?:BOOK|TEXT)", re.I)
+PARAGRAPH_BREAK = re.compile(rb"\r?\n(?:[ \t]*\r?\n)+")
+HEADER_FIELD = re.compile(rb"^(Title|Author|Translator):[ \t]*(.+?)\r?$", re.M)
+
+# Section numbers such as "IV. " or "12. " that start many paragraphs
+SECTION_NUMBER = re.compile(r"^(?:[IVXLC]+|\d+)\.\s+")
+# A sentence ends at . ! ? or ; (optionally followed by a closing quote or
+# bracket) before whitespace and a capitalized word
+SENTENCE_END = re.compile(r"(?:(?<=[.!?;])|(?<=[.!?;][\"'”’)\]]))\s+(?=[\"'“‘(]?[A-Z])")
+
+# Longest paragraph that can be a heading
+MAX_HEADING_CHARS = 120
+
+# Enough of the file to hold the Gutenberg header
+HEADER_BYTES = 16 * 1024
+
+
+def read_header(mm) -> Dict[str, str]:
+    """Return the Title, Author and Translator fields of a Gutenberg header."""
+    fields = {}
+    for match in HEADER_FIELD.finditer(mm, 0, min(len(mm), HEADER_BYTES)):
+        fields.setdefault(match.group(1).decode().lower(), match.group(2).decode("utf-8", "replace").strip())
+    return fields
+
+
+def iter_paragraphs(mm) -> Iterator[str]:
+    """
+    Yield the paragraphs between the Gutenberg start and end markers.
+
+    Args:
+        mm: Memory-mapped book (any bytes-like object works)
+
+    Yields:
+        Paragraphs with line wrapping and italics underscores removed
+    """
+    start = START_MARKER.search(mm)
+    start = start.end() if start else 0
+    end = END_MARKER.search(mm, start)
+    end = end.start() if end else len(mm)
+
+    position = start
+    while position < end:
+        match = PARAGRAPH_BREAK.search(mm, position, end)
+        stop = match.start() if match else end
+        if stop > position:
+            text = mm[position:stop].decode("utf-8", "replace").replace("_", "")
+            text = " ".join(text.split())
+            if text:
+                yield text
+        position = match.end() if match else end
+
+
+def is_heading(paragraph: str) -> bool:
+    """Return True for titles, chapter headings and other non-prose paragraphs."""
+    # Headings are short, so prose paragraphs are ruled out without looking at them
+    if len(paragraph) > MAX_HEADING_CHARS:
+        return False
+    if paragraph.isupper() or not any(c.isalpha() for c in paragraph):
+        return True
+    return len(paragraph.split()) < MIN_PASSAGE_WORDS and paragraph[-1] not in ".!?;:\"'”’"
+
+
+def split_sentences(paragraph: str) -> List[str]:
+    """Split a paragraph into sentences."""
+    return [sentence for sentence in SENTENCE_END.split(paragraph) if sentence]
+
+
+def iter_passages(paragraphs, min_words: int = MIN_PASSAGE_WORDS,
+                  max_words: int = MAX_PASSAGE_WORDS) -> Iterator[str]:
+    """
+    Group the sentences of each paragraph into passages.
+
+    Passages never span paragraphs. Sentences are added until the next one
+    would go over `max_words`; a short remainder is attached to the previous
+    passage of the paragraph instead of standing alone.
+
+    Args:
+        paragraphs: Paragraph texts
+        min_words: Shorter passages are dropped
+        max_words: Target maximum length of a passage
+
+    Yields:
+        Passage texts
+    """
+    for paragraph in paragraphs:
+        if is_heading(paragraph):
+            continue
+        paragraph = SECTION_NUMBER.sub("", paragraph)
+
+        passages = []
+        current = []
+        current_words = 0
+        for sentence in split_sentences(paragraph):
+            words = len(sentence.split())
+            if current and current_words + words > max_words:
+                passages.append(current)
+                current, current_words = [], 0
+            current.append(sentence)
+            current_words += words
+        if current:
+            if passages and current_words < min_words:
+                passages[-1].extend(current)
+            else:
+                passages.append(current)
+
+        for sentences in passages:
+            passage = " ".join(sentences)
+            if len(passage.split()) >= min_words:
+                yield passage
+
+
+def ingest_book(store: PassageStore, path: str, book: Optional[str] = None, force: bool = False) -> int:
+    """
+    Segment a Gutenberg plain-text book and index its passages.
+
+    Args:
+        store: Passage index
+        path: UTF-8 plain-text book
+        book: Key of the book, defaults to the file name without extension
+        force: Ingest even if the file has not changed since the last run
+
+    Returns:
+        Number of passages indexed, or -1 if the book was unchanged
+    """
+    book = book or os.path.splitext(os.path.basename(path))[0]
+    if not force and store.is_current(book, path):
+        return -1
+    if os.path.getsize(path) == 0:
+        return store.replace_book(book, path, None, None, [])
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header = read_header(mm)
+        return store.replace_book(book, path, header.get("title"), header.get("author"),
+                                  iter_passages(iter_paragraphs(mm)))
+
+
+def ingest_directory(store: PassageStore, directory: str = GUTENBERG_DIR, force: bool = False) -> Dict[str, int]:
+    """
+    Ingest every .txt book of a directory.
+
+    Returns:
+        Mapping of book path to the ingest_book result
+    """
+    results = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".txt"):
+            path = os.path.join(directory, name)
+            results[path] = ingest_book(store, path, force=force)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index Project Gutenberg books for passage search")
+    parser.add_argument("books", nargs="*", help=f"plain-text books, every .txt in {GUTENBERG_DIR} by default")
+    parser.add_argument("--db", default="data/passages.db")
+    parser.add_argument("--force", action="store_true", help="re-ingest unchanged books")
+    parser.add_argument("--search", metavar="TOPIC", help="print the best passages for a topic")
+    args = parser.parse_args(argv)
+
+    store = PassageStore(args.db)
+    if args.search:
+        for passage in store.search(args.search, limit=5):
+            print(f"[{passage['source']}] {passage['quote']}\n")
+        return 0
+
+    if args.books:
+        results = {path: ingest_book(store, path, force=args.force) for path in args.books}
+    elif os.path.isdir(GUTENBERG_DIR):
+        results = ingest_directory(store, force=args.force)
+    else:
+        print(f"No books given and {GUTENBERG_DIR} does not exist")
+        return 1
+
+    for path, count in results.items():
+        print(f"{path}: " + ("unchanged" if count < 0 else f"{count} passages"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Passage Store
+
+SQLite FTS5 index of passages from public domain stoic books, searchable by
+topic keyword. Filled by gutenberg_ingest.py.
+"""
+
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    book TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    passages INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text,
+    book UNINDEXED,
+    author UNINDEXED,
+    title UNINDEXED,
+    position UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+class PassageStore:
+    """SQLite FTS5 index of book passages."""
+
+    def __init__(self, db_path: str = "data/passages.db"):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def is_current(self, book: str, path: str) -> bool:
+        """Return True if `path` was already ingested as `book` and has not changed since."""
+        stat = os.stat(path)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT size, mtime FROM books WHERE book = ?", (book,)).fetchone()
+        return row is not None and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime
+
+    def replace_book(self, book: str, path: str, title: Optional[str], author: Optional[str],
+                     passages: Iterable[str]) -> int:
+        """
+        Replace all passages of a book in one transaction.
+
+        Args:
+            book: Book key
+            path: Source text file, recorded to detect changes
+            title: Book title
+            author: Book author
+            passages: Passage texts in book order; consumed lazily
+
+        Returns:
+            Number of passages stored
+        """
+        stat = os.stat(path)
+        count = 0
+
+        def rows():
+            nonlocal count
+            for position, text in enumerate(passages):
+                count += 1
+                yield text, book, author, title, position
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM passages WHERE book = ?", (book,))
+            conn.executemany(
+                "INSERT INTO passages (text, book, author, title, position) VALUES (?, ?, ?, ?, ?)",
+                rows(),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO books (book, title, author, path, size, mtime, passages, ingested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (book, title, author, path, stat.st_size, stat.st_mtime, count, datetime.now().isoformat()),
+            )
+        return count
+
+    def search(self, topic: str, limit: int = 10, author: Optional[str] = None) -> List[Dict]:
+        """
+        Find the passages that best match a topic.
+
+        Args:
+            topic: Keywords; passages containing any of them match, ranked by BM25
+            limit: Maximum number of passages
+            author: Only return passages of this author
+
+        Returns:
+            Passage dictionaries with the same 'quote' and 'author' keys as
+            scraped quotes, best match first
+        """
+        words = re.findall(r"\w+", topic)
+        if not words:
+            return []
+        # Quoting every word keeps FTS5 operators in the topic from being interpreted
+        query = " OR ".join(f'"{word}"' for word in words)
+        sql = "SELECT text, author, title, book, position FROM passages WHERE passages MATCH ?"
+        params = [query]
+        if author:
+            sql += " AND author = ?"
+            params.append(author)
+        sql += " ORDER BY bm25(passages) LIMIT ?"
+        params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [{
+            "quote": row["text"],
+            "author": row["author"] or "Unknown",
+            "source": row["title"] or row["book"],
+            "book": row["book"],
+            "position": row["position"],
+        } for row in rows]
+
+    def books(self) -> List[Dict]:
+        """Return the ingested books with their passage counts."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT book, title, author, passages, ingested_at FROM books ORDER BY book").fetchall()
+        return [dict(row) for row in rows]
@@ -1,59 +1,248 @@
-import requests
 from bs4 import BeautifulSoup
-import time
-import random
+import argparse
+import hashlib
 import os
+import re
+import sys
 import json
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional
 
-def scrape_marcus_aurelius_quotes():
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetcher import HostRateLimiter, get_fetcher
+import tracing
+
+# Goodreads quote pages of each author, keyed by the slug used in file names
+AUTHORS = {
+    "marcus_aurelius": {"name": "Marcus Aurelius",
+                        "url": "https://www.goodreads.com/author/quotes/17212.Marcus_Aurelius"},
+    "seneca": {"name": "Seneca",
+               "url": "https://www.goodreads.com/author/quotes/4918776.Seneca"},
+    "epictetus": {"name": "Epictetus",
+                  "url": "https://www.goodreads.com/author/quotes/13852.Epictetus"},
+}
+
+QUOTES_DIR = "data/quotes"
+
+# Older pages barely change, so they are only revalidated once a week. The first
+# page, which shows new quotes and the page count, keeps the fetcher's default TTL.
+QUOTE_PAGE_TTL = 7 * 24 * 3600
+
+
+def quotes_path(author: str) -> str:
+    """Return the JSON file holding the quotes of an author slug."""
+    return os.path.join(QUOTES_DIR, f"{author}_quotes.json")
+
+
+def normalize_quote(text: str) -> str:
+    """Reduce a quote to lowercase words so that formatting variants compare equal."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def quote_hash(text: str) -> str:
+    """Return the deduplication key of a quote text."""
+    return hashlib.sha1(normalize_quote(text).encode("utf-8")).hexdigest()
+
+
+def parse_quotes_page(html, author_name: str) -> List[Dict]:
     """
-    Scrape Marcus Aurelius quotes from Goodreads.
+    Extract the quotes of one Goodreads quotes page.
+
+    Args:
+        html: Page HTML, as text or bytes
+        author_name: Author to attribute the quotes to
+
+    Returns:
+        List of quote dictionaries
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    quotes = []
+    for element in soup.select('.quoteText'):
+        # Extract the quote text and clean up the attribution and quotation marks
+        quote_text = element.get_text().split('―')[0]
+        quote_text = " ".join(quote_text.split()).strip('"“” ')
+        if not quote_text:
+            continue
+
+        quote = {
+            "quote": quote_text,
+            "author": author_name,
+            "source": "Goodreads",
+            "date_scraped": datetime.now().strftime("%Y-%m-%d"),
+        }
+        likes = element.find_parent(class_='quote')
+        likes = likes.select_one('.quoteFooter .right a') if likes else None
+        match = re.search(r"([\d,]+)\s+likes?", likes.get_text()) if likes else None
+        if match:
+            quote["likes"] = int(match.group(1).replace(",", ""))
+        quotes.append(quote)
+    return quotes
+
+
+def parse_page_count(html) -> int:
+    """Return the number of the last page linked from the pagination bar."""
+    soup = BeautifulSoup(html, 'html.parser')
+    pages = [int(link.get_text()) for link in soup.select('a[href*="page="]')
+             if link.get_text().strip().isdigit()]
+    return max(pages, default=1)
+
+
+def merge_quotes(path: str, quotes: List[Dict]) -> int:
+    """
+    Add quotes to a quotes file, skipping those already in it.
+
+    Existing entries keep their position and scrape date; new ones are appended.
+
+    Args:
+        path: JSON quotes file, created if missing
+        quotes: Scraped quotes
+
+    Returns:
+        Number of quotes added
     """
-    url = "https://www.goodreads.com/author/quotes/17212.Marcus_Aurelius"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    
     try:
-        response = requests.get(url, headers=headers)
+        with open(path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    except (OSError, ValueError):
+        existing = []
+
+    seen = {quote.get("hash") or quote_hash(quote["quote"]) for quote in existing}
+    added = 0
+    for quote in quotes:
+        key = quote_hash(quote["quote"])
+        if key in seen:
+            continue
+        seen.add(key)
+        existing.append({**quote, "hash": key})
+        added += 1
+
+    if added or not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(existing, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    return added
+
+
+def scrape_author_quotes(author: str, max_pages: Optional[int] = None, max_workers: int = 4,
+                         per_host_delay: float = 1.0,
+                         rate_limiter: Optional[HostRateLimiter] = None) -> List[Dict]:
+    """
+    Scrape every quotes page of an author from Goodreads.
+
+    The first page tells how many pages there are; the others are fetched
+    concurrently, at most one request per `per_host_delay` seconds.
+
+    Args:
+        author: Key of AUTHORS
+        max_pages: Stop after this many pages
+        max_workers: Pages fetched at the same time
+        per_host_delay: Minimum seconds between two requests to Goodreads
+        rate_limiter: Limiter shared with other scrapes, created if not given
+
+    Returns:
+        Quotes of all pages in page order, possibly with duplicates
+    """
+    url = AUTHORS[author]["url"]
+    name = AUTHORS[author]["name"]
+    fetcher = get_fetcher()
+    rate_limiter = rate_limiter or HostRateLimiter(per_host_delay)
+
+    def fetch_page(page):
+        response = fetcher.get(f"{url}?page={page}", ttl=QUOTE_PAGE_TTL if page > 1 else None,
+                               before_request=rate_limiter.wait)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find all quote elements
-        quote_elements = soup.select('.quoteText')
-        
-        quotes = []
-        for element in quote_elements:
-            # Extract the quote text
-            quote_text = element.get_text().strip()
-            
-            # Clean up the quote text (remove attribution and extra whitespace)
-            quote_text = quote_text.split('―')[0].strip()
-            quote_text = quote_text.replace('"', '').strip()
-            
-            if quote_text:
-                quotes.append({
-                    "quote": quote_text,
-                    "author": "Marcus Aurelius",
-                    "source": "Goodreads",
-                    "date_scraped": datetime.now().strftime("%Y-%m-%d")
-                })
-        
-        # Create directory if it doesn't exist
-        os.makedirs("data/quotes", exist_ok=True)
-        
-        # Save quotes to a JSON file
-        with open("data/quotes/marcus_aurelius_quotes.json", "w", encoding="utf-8") as f:
-            json.dump(quotes, f, indent=4, ensure_ascii=False)
-        
-        print(f"Successfully scraped {len(quotes)} quotes from Marcus Aurelius.")
-        return quotes
-    
+        # Bytes let BeautifulSoup pick up the charset declared in the page
+        return response.content
+
+    with tracing.span("goodreads.author", author=author) as span:
+        first_page = fetch_page(1)
+        page_count = parse_page_count(first_page)
+        if max_pages:
+            page_count = min(page_count, max_pages)
+
+        quotes = parse_quotes_page(first_page, name)
+        failed_pages = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(tracing.in_context(fetch_page), page) for page in range(2, page_count + 1)]
+            for page, future in enumerate(futures, 2):
+                try:
+                    quotes.extend(parse_quotes_page(future.result(), name))
+                except Exception as e:
+                    tracing.error("goodreads.page_errors", f"Error scraping page {page} of {name} quotes: {e}")
+                    failed_pages += 1
+        span.set(pages=page_count, failed_pages=failed_pages, quotes=len(quotes))
+
+    print(f"Scraped {len(quotes)} quotes of {name} from {page_count} pages.")
+    return quotes
+
+
+def scrape_quotes(authors=None, max_pages: Optional[int] = None, max_workers: int = 4,
+                  per_host_delay: float = 1.0) -> Dict[str, int]:
+    """
+    Scrape the quotes of several authors and merge them into their quotes files.
+
+    Args:
+        authors: Keys of AUTHORS, all authors by default
+        max_pages: Stop after this many pages per author
+        max_workers: Pages fetched at the same time
+        per_host_delay: Minimum seconds between two requests to Goodreads
+
+    Returns:
+        Mapping of author to the number of new quotes, -1 if the scrape failed.
+        The quotes file of every author exists afterwards, empty for a failed
+        first scrape, so that the files can be declared as pipeline outputs.
+    """
+    # All authors live on the same host, so they share one politeness budget
+    rate_limiter = HostRateLimiter(per_host_delay)
+    added = {}
+    for author in authors or AUTHORS:
+        try:
+            quotes = scrape_author_quotes(author, max_pages, max_workers, rate_limiter=rate_limiter)
+        except Exception as e:
+            tracing.error("goodreads.author_errors", f"Error scraping {AUTHORS[author]['name']} quotes: {e}")
+            added[author] = -1
+            # Creates an empty file if there is none, existing quotes are kept
+            merge_quotes(quotes_path(author), [])
+            continue
+        added[author] = merge_quotes(quotes_path(author), quotes)
+        print(f"Added {added[author]} new {AUTHORS[author]['name']} quotes to {quotes_path(author)}.")
+
+    print(get_fetcher().report())
+    return added
+
+
+def scrape_marcus_aurelius_quotes():
+    """
+    Scrape Marcus Aurelius quotes from Goodreads and merge them into his quotes file.
+
+    Returns:
+        The scraped quotes, or an empty list if the scrape failed
+    """
+    try:
+        quotes = scrape_author_quotes("marcus_aurelius")
     except Exception as e:
-        print(f"Error scraping quotes: {e}")
+        tracing.error("goodreads.author_errors", f"Error scraping quotes: {e}")
         return []
+    merge_quotes(quotes_path("marcus_aurelius"), quotes)
+    return quotes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape stoic quotes from Goodreads")
+    parser.add_argument("--authors", nargs="+", choices=list(AUTHORS), default=list(AUTHORS))
+    parser.add_argument("--max-pages", type=int, help="pages per author, all by default")
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--delay", type=float, default=1.0,
+                        help="minimum seconds between two requests to Goodreads")
+    args = parser.parse_args(argv)
+    added = scrape_quotes(args.authors, args.max_pages, args.max_workers, args.delay)
+    return 0 if any(count >= 0 for count in added.values()) else 1
+
 
 if __name__ == "__main__":
-    scrape_marcus_aurelius_quotes()
+    sys.exit(main())
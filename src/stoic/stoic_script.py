@@ -1,14 +1,73 @@
-from google import genai
+import argparse
 import os 
 import re
 import json
 import random
-from datetime import datetime
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 load_dotenv()
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")    
-client = genai.Client(api_key=GEMINI_API_KEY)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tracing
+from gemini_client import get_client, report as gemini_report
+from stoic_news_scraper import AUTHORS, quotes_path
+from passage_store import PassageStore
+
+SCRIPT_MODEL = "gemini-2.0-flash"
+
+PASSAGES_DB = "data/passages.db"
+
+SCRIPT_REQUIREMENTS = """The script should:
+1. Be exactly 30 seconds when read aloud (approximately 75 words)
+2. Start with a hook in the first 3 seconds to grab attention
+3. Explain the quote in simple, relatable terms
+4. Include a practical application for modern life
+5. End with a thought-provoking conclusion
+6. Be engaging and suitable for YouTube Shorts
+7. Only include the narrator's dialogue, no visual cues or music notes
+8. Be written in a conversational, engaging tone
+9. Use short sentences and simple language
+10. Include a call to action at the end"""
+
+# Bounds a generated script has to meet to be accepted from a batch response
+MIN_SCRIPT_WORDS = 40
+MAX_SCRIPT_WORDS = 150
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "index": {"type": "INTEGER"},
+            "script": {"type": "STRING"},
+        },
+        "required": ["index", "script"],
+    },
+}
+
+def load_quotes(authors=None):
+    """
+    Load and parse the scraped quotes of several stoic authors
+    
+    Args:
+        authors (list): Author keys of stoic_news_scraper.AUTHORS, all by default
+        
+    Returns:
+        list: Quotes of all authors whose quotes file exists
+    """
+    quotes = []
+    for author in authors or AUTHORS:
+        path = quotes_path(author)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                quotes.extend(json.load(f))
+        except Exception as e:
+            print(f"Error loading {AUTHORS[author]['name']} quotes: {e}")
+    return quotes
 
 def load_marcus_aurelius_quotes():
     """
@@ -17,13 +76,23 @@ def load_marcus_aurelius_quotes():
     Returns:
         list: List of Marcus Aurelius quotes
     """
-    try:
-        with open('data/quotes/marcus_aurelius_quotes.json', 'r', encoding='utf-8') as f:
-            quotes = json.load(f)
-        return quotes
-    except Exception as e:
-        print(f"Error loading Marcus Aurelius quotes: {e}")
+    return load_quotes(["marcus_aurelius"])
+
+def find_passages(topic, limit=20):
+    """
+    Look up book passages about a topic in the Gutenberg passage index
+    
+    Args:
+        topic (str): Topic keywords, e.g. "anger" or "fear of death"
+        limit (int): Maximum number of passages
+        
+    Returns:
+        list: Passages in the same format as quotes, best match first; empty
+        if the index has not been built
+    """
+    if not os.path.exists(PASSAGES_DB):
         return []
+    return PassageStore(PASSAGES_DB).search(topic, limit)
 
 def create_quote_script(quote):
     """
@@ -43,41 +112,130 @@ def create_quote_script(quote):
     Quote: "{quote_text}"
     Author: {author}
 
-The script should:
-1. Be exactly 30 seconds when read aloud (approximately 75 words)
-2. Start with a hook in the first 3 seconds to grab attention
-3. Explain the quote in simple, relatable terms
-4. Include a practical application for modern life
-5. End with a thought-provoking conclusion
-6. Be engaging and suitable for YouTube Shorts
-7. Only include the narrator's dialogue, no visual cues or music notes
-8. Be written in a conversational, engaging tone
-9. Use short sentences and simple language
-10. Include a call to action at the end
+{SCRIPT_REQUIREMENTS}
 
 Format the response as a clean script with only the narrator's lines."""
 
-    script_response = client.models.generate_content(
-        model="gemini-2.0-flash",
+    script_response = get_client().models.generate_content(
+        model=SCRIPT_MODEL,
         contents=prompt,
     )
     
     return script_response.text
 
-def write_script(script_text, quote):
+def create_quote_scripts_batch(quotes):
+    """
+    Create scripts for several quotes with a single Gemini request
+    
+    The model is asked for a JSON array with one script per quote. If scripts
+    are missing or fail validation, the batch is requested once more without
+    the response cache, and scripts still missing after that are generated with
+    individual create_quote_script calls.
+    
+    Args:
+        quotes (list): Quote dictionaries with 'quote' and 'author' keys
+        
+    Returns:
+        list: Script text for each quote, in the same order
+    """
+    quote_list = "\n".join(
+        f'{i}. "{quote["quote"]}" - {quote["author"]}' for i, quote in enumerate(quotes)
+    )
+    prompt = f"""Create one 30-second YouTube Shorts script for each of these stoic quotes, explaining the quote in simple terms for modern life.
+
+Quotes:
+{quote_list}
+
+{SCRIPT_REQUIREMENTS}
+
+Respond with a JSON array containing one object per quote, with "index" set to the quote's number and "script" set to the narrator's lines only."""
+
+    scripts = {}
+    # A malformed response would be served from the response cache on every
+    # run, so an incomplete one is requested again once past the cache
+    for bypass_cache in (False, True):
+        try:
+            response = get_client().models.generate_content(
+                model=SCRIPT_MODEL,
+                contents=prompt,
+                config={
+                    "response_mime_type": "application/json",
+                    "response_schema": BATCH_RESPONSE_SCHEMA,
+                },
+                bypass_cache=bypass_cache,
+            )
+        except Exception as e:
+            print(f"Batch script generation failed: {e}")
+            break
+        for i, script in parse_batch_response(response.text, len(quotes)).items():
+            scripts.setdefault(i, script)
+        if len(scripts) == len(quotes):
+            break
+        if not bypass_cache:
+            print("Batch response is incomplete, requesting it again")
+    
+    missing = [i for i in range(len(quotes)) if i not in scripts]
+    if missing:
+        print(f"Generating {len(missing)} of {len(quotes)} scripts individually")
+        # The shared client bounds how many of these are in flight at once
+        generate = tracing.in_context(create_quote_script)
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            for i, script in zip(missing, executor.map(generate, [quotes[i] for i in missing])):
+                scripts[i] = script
+    return [scripts[i] for i in range(len(quotes))]
+
+def parse_batch_response(response_text, count):
+    """
+    Validate a batch response and split it into scripts
+    
+    Args:
+        response_text (str): JSON returned by the model
+        count (int): Number of quotes in the request
+        
+    Returns:
+        dict: Script text by quote index, for valid items only
+    """
+    try:
+        items = json.loads(response_text)
+    except (TypeError, ValueError) as e:
+        print(f"Batch response is not valid JSON: {e}")
+        return {}
+    if not isinstance(items, list):
+        print("Batch response is not a JSON array")
+        return {}
+    
+    scripts = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        script = item.get("script")
+        if not isinstance(index, int) or not 0 <= index < count or index in scripts:
+            continue
+        if not isinstance(script, str):
+            continue
+        words = len(script.split())
+        if not MIN_SCRIPT_WORDS <= words <= MAX_SCRIPT_WORDS:
+            print(f"Rejecting script {index + 1}: {words} words")
+            continue
+        scripts[index] = script.strip()
+    return scripts
+
+def write_script(script_text, quote, date=None):
     """
     Write the script to a file in the output directory
     
     Args:
         script_text (str): The script content to write
         quote (dict): The quote used for the script
+        date (datetime.date): Day the script is for, defaults to today
         
     Returns:
         str: Path to the written script file
     """
     # Create output directory if it doesn't exist
-    today = datetime.now().strftime("%Y-%m-%d")
-    output_dir = f"output/youtube-stoic-{today}"
+    day = (date or datetime.now()).strftime("%Y-%m-%d")
+    output_dir = f"output/youtube-stoic-{day}"
     os.makedirs(output_dir, exist_ok=True)
     
     # Create a filename based on the first few words of the quote
@@ -93,13 +251,69 @@ def write_script(script_text, quote):
     return script_path
 
 
-if __name__ == "__main__":
-    print("\n--- LOADING MARCUS AURELIUS QUOTES ---\n")
-    quotes = load_marcus_aurelius_quotes()
+def write_week_scripts(quotes, days=7, start_date=None):
+    """
+    Generate and write scripts for the coming days with one batched request
+    
+    Args:
+        quotes (list): Quotes to pick from
+        days (int): Number of daily scripts to create
+        start_date (datetime.date): First day of the batch, defaults to today
+        
+    Returns:
+        list: Paths to the written script files
+    """
+    start_date = start_date or datetime.now().date()
+    selected = random.sample(quotes, min(days, len(quotes)))
+    scripts = create_quote_scripts_batch(selected)
+    
+    script_paths = []
+    for offset, (quote, script) in enumerate(zip(selected, scripts)):
+        script_paths.append(write_script(script, quote, start_date + timedelta(days=offset)))
+    return script_paths
+
+
+def main(argv=None):
+    """
+    Generate stoic scripts from random stoic quotes
+    
+    By default a single script is written for today; with --days N the scripts
+    for the next N days are generated in one batched request. With --topic the
+    quote is picked among the best matching passages of the Gutenberg index.
+    
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv
+        
+    Returns:
+        str: Path to today's script file, or None if no quotes were found
+    """
+    parser = argparse.ArgumentParser(description="Generate stoic YouTube Shorts scripts")
+    parser.add_argument("--days", type=int, default=1,
+                        help="number of daily scripts to generate in one batch")
+    parser.add_argument("--topic", help="pick book passages about this topic instead of random quotes")
+    args = parser.parse_args(argv)
+    
+    quotes = []
+    if args.topic:
+        print(f"\n--- SEARCHING PASSAGES ABOUT {args.topic.upper()} ---\n")
+        quotes = find_passages(args.topic, limit=max(20, 3 * args.days))
+        if not quotes:
+            print("No matching passages found, falling back to quotes")
+    
+    if not quotes:
+        print("\n--- LOADING STOIC QUOTES ---\n")
+        quotes = load_quotes()
     
     if not quotes:
         print("No quotes found. Exiting...")
-        exit(1)
+        return None
+    
+    if args.days > 1:
+        print(f"\n--- GENERATING {args.days} SCRIPTS IN ONE BATCH ---\n")
+        script_paths = write_week_scripts(quotes, args.days)
+        print(gemini_report())
+        print("\n--- SCRIPT GENERATION COMPLETE ---\n")
+        return script_paths[0] if script_paths else None
     
     # Select a random quote
     selected_quote = random.choice(quotes)
@@ -110,6 +324,12 @@ if __name__ == "__main__":
     
     print("\n--- WRITING SCRIPT TO FILE ---\n")
     script_path = write_script(script, selected_quote)
+    print(gemini_report())
     
     print("\n--- SCRIPT GENERATION COMPLETE ---\n")
-    
\ No newline at end of file
+    return script_path
+
+
+if __name__ == "__main__":
+    if not main():
+        exit(1)
@@ -0,0 +1,453 @@
+"""
+Article Extractor
+
+Turns the HTML of a linked article into a short title/description/content
+summary. The parser backend is pluggable and text extraction stops as soon as
+enough characters have been collected.
+
+Two methods find the main content: "density" scores blocks of text in a single
+pass over the document and keeps the paragraphs of the densest container, while
+"selectors" takes the paragraphs of the first match of CONTENT_SELECTORS. With
+the html.parser and lxml backends the density pass consumes parser events
+directly, without building a tree.
+"""
+
+import re
+from html.parser import HTMLParser as PythonHTMLParser
+from typing import Dict, Iterable, Optional
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+PARSERS = ("html.parser", "lxml", "selectolax")
+
+if HAS_SELECTOLAX:
+    DEFAULT_PARSER = "selectolax"
+elif HAS_LXML:
+    DEFAULT_PARSER = "lxml"
+else:
+    DEFAULT_PARSER = "html.parser"
+
+# Try different common content selectors
+CONTENT_SELECTORS = [
+    "article",
+    "main",
+    ".article-content",
+    ".post-content",
+    ".entry-content",
+    "#content",
+    ".content"
+]
+
+DEFAULT_MAX_CHARS = 1000
+
+METHODS = ("density", "selectors")
+DEFAULT_METHOD = "density"
+
+# Subtrees that never hold the main content. <form> and <header> are not among
+# them: some sites wrap the whole page in a form, and articles put their title
+# and lead in a header; link density and class hints take care of the rest.
+SKIP_TAGS = frozenset({
+    "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "footer", "aside", "button", "select", "textarea",
+})
+# Elements whose own text (outside nested blocks) forms one block of text
+BLOCK_TAGS = frozenset({
+    "p", "pre", "blockquote", "li", "dd", "dt", "td", "th", "figcaption",
+    "div", "section", "article", "main", "body", "center",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+})
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+DOCUMENT_ROOT = "#document"
+# Elements that never have an end tag
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+})
+# Open element -> start tags that implicitly close it
+_P_CLOSERS = frozenset({
+    "p", "div", "section", "article", "main", "aside", "header", "footer", "nav", "ul", "ol",
+    "dl", "pre", "blockquote", "table", "form", "figure", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+})
+IMPLIED_END_TAGS = {
+    "p": _P_CLOSERS,
+    "li": frozenset({"li"}),
+    "dt": frozenset({"dt", "dd"}),
+    "dd": frozenset({"dt", "dd"}),
+    "td": frozenset({"td", "th", "tr"}),
+    "th": frozenset({"td", "th", "tr"}),
+    "tr": frozenset({"tr"}),
+    "option": frozenset({"option"}),
+}
+
+# Blocks shorter than this neither score nor make it into the content
+MIN_BLOCK_CHARS = 25
+# Blocks that are mostly link text are navigation, not content
+MAX_LINK_DENSITY = 0.5
+
+# Class and id hints that move a container's score up or down
+CLASS_WEIGHT = 25
+POSITIVE_HINTS = re.compile(r"article|content|entry|main|post|story|text|body", re.I)
+NEGATIVE_HINTS = re.compile(
+    r"comment|sidebar|footer|nav|menu|share|social|related|promo|sponsor|banner|cookie|"
+    r"newsletter|subscribe|popup|breadcrumb|widget|(?:^|[\s_-])ads?(?:$|[\s_-])|advert",
+    re.I,
+)
+TAG_WEIGHTS = {"article": 10, "main": 5, "section": 2}
+
+
+def extract_article(html: str, parser: str = DEFAULT_PARSER,
+                    max_chars: int = DEFAULT_MAX_CHARS, method: str = DEFAULT_METHOD) -> Dict:
+    """
+    Extract title, meta description and main content from an article page.
+
+    Args:
+        html: Page HTML
+        parser: One of PARSERS
+        max_chars: Maximum length of the extracted content
+        method: One of METHODS
+
+    Returns:
+        Dictionary with `title`, `description` and `content` keys
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser {parser!r}, expected one of {PARSERS}")
+
+    if method == "density":
+        if parser == "selectolax":
+            if not HAS_SELECTOLAX:
+                raise ImportError("selectolax is not installed, run `pip install selectolax`")
+            # lexbor parses in C; walking its tree is cheaper than a second parse
+            scorer = _DensityScorer()
+            _walk_selectolax(HTMLParser(html).root, scorer)
+        else:
+            scorer = _score_stream(html, parser)
+        return scorer.result(max_chars)
+
+    if parser == "selectolax":
+        return _extract_with_selectolax(html, max_chars)
+    if parser in ("html.parser", "lxml"):
+        return _extract_with_soup(html, parser, max_chars)
+
+
+def _extract_with_soup(html: str, parser: str, max_chars: int) -> Dict:
+    soup = BeautifulSoup(html, parser)
+
+    # Try to get the title
+    title = None
+    title_tag = soup.select_one("title")
+    if title_tag:
+        title = title_tag.text.strip()
+
+    # Try to get the main content
+    content = None
+    for selector in CONTENT_SELECTORS:
+        content_elem = soup.select_one(selector)
+        if content_elem:
+            # Get text from paragraphs
+            paragraphs = (p.text.strip() for p in _iter_tags(content_elem, "p"))
+            content = _join_until(paragraphs, max_chars, "\n\n")
+            if content:
+                break
+
+    # If no paragraphs found, try to get all text
+    if not content:
+        content_elem = soup.select_one("body")
+        if content_elem:
+            content = _join_until(content_elem.stripped_strings, max_chars, " ")
+
+    # Try to get meta description
+    description = None
+    meta_desc = soup.select_one('meta[name="description"]')
+    if meta_desc:
+        description = meta_desc.get("content")
+
+    return {"title": title, "description": description, "content": content}
+
+
+def _extract_with_selectolax(html: str, max_chars: int) -> Dict:
+    if not HAS_SELECTOLAX:
+        raise ImportError("selectolax is not installed, run `pip install selectolax`")
+
+    tree = HTMLParser(html)
+
+    title = None
+    title_tag = tree.css_first("title")
+    if title_tag:
+        title = title_tag.text(strip=True)
+
+    content = None
+    for selector in CONTENT_SELECTORS:
+        content_elem = tree.css_first(selector)
+        if content_elem:
+            paragraphs = (p.text(strip=True) for p in content_elem.css("p"))
+            content = _join_until(paragraphs, max_chars, "\n\n")
+            if content:
+                break
+
+    if not content and tree.body:
+        content = _join_until(_iter_text_nodes(tree.body), max_chars, " ")
+
+    description = None
+    meta_desc = tree.css_first('meta[name="description"]')
+    if meta_desc:
+        description = meta_desc.attributes.get("content")
+
+    return {"title": title, "description": description, "content": content}
+
+
+class _DensityScorer:
+    """
+    Score containers by the text of the blocks inside them while the document
+    streams past as start/data/end events, the interface of lxml parser targets.
+
+    Every block of at least MIN_BLOCK_CHARS characters adds a score to its
+    parent and half of it to its grandparent, in the spirit of Readability.
+    Container scores are weighted by their class/id hints and reduced by their
+    share of link text. Elements are numbered in document order, so the
+    blocks inside the winning container are the ones numbered between its
+    start and end. No tree is built.
+
+    Events do not have to be balanced: end tags close any elements left open
+    inside them, stray end tags are ignored and a few implied end tags
+    (paragraphs, list items, table cells) are added like an HTML parser would.
+    """
+
+    def __init__(self):
+        self.index = 0
+        self.chars = 0
+        self.link_chars = 0
+        self.link_depth = 0
+        self.skip_depth = 0
+        # Open elements: [number, tag, attrs, chars at start, link chars at start]
+        self.stack = []
+        # Open blocks collecting their own text: [number, text pieces, link chars]
+        self.collectors = []
+        # Finished blocks in document order: (number, tag, text, link chars)
+        self.blocks = []
+        self.scores = {}
+        # Scored elements once closed: number -> (end number, weight, chars, link chars)
+        self.containers = {}
+        self.title_parts = None
+        self.title = None
+        self.description = None
+        # Python's parser does not add <html> and <body> to fragments, so text
+        # outside of any element is collected by this implicit document root
+        self.start(DOCUMENT_ROOT, {})
+
+    def start(self, tag: str, attrs: Dict):
+        stack = self.stack
+        while stack and stack[-1][1] in IMPLIED_END_TAGS and tag in IMPLIED_END_TAGS[stack[-1][1]]:
+            self.end(stack[-1][1])
+        stack.append([self.index, tag, attrs, self.chars, self.link_chars])
+        self.index += 1
+        if self.skip_depth or tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS or tag == DOCUMENT_ROOT:
+            self.collectors.append([self.index - 1, [], 0])
+        elif tag == "a":
+            self.link_depth += 1
+        elif tag == "title" and self.title is None:
+            self.title_parts = []
+        elif tag == "meta" and self.description is None and (attrs.get("name") or "").lower() == "description":
+            self.description = attrs.get("content")
+
+    def data(self, text: str):
+        if self.skip_depth:
+            return
+        if self.title_parts is not None:
+            self.title_parts.append(text)
+            return
+        if not self.collectors:
+            return
+        length = len(text.strip())
+        if not length:
+            self.collectors[-1][1].append(" ")
+            return
+        self.chars += length
+        collector = self.collectors[-1]
+        collector[1].append(text)
+        if self.link_depth:
+            self.link_chars += length
+            collector[2] += length
+
+    def end(self, tag: str):
+        stack = self.stack
+        if stack and stack[-1][1] == tag:
+            self._close()
+            return
+        for position in range(len(stack) - 1, -1, -1):
+            if stack[position][1] == tag:
+                break
+        else:
+            return
+        while len(stack) > position:
+            self._close()
+
+    def close(self):
+        while self.stack:
+            self._close()
+
+    def _close(self):
+        number, tag, attrs, chars, link_chars = self.stack.pop()
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if tag in BLOCK_TAGS or tag == DOCUMENT_ROOT:
+            _, pieces, block_link_chars = self.collectors.pop()
+            text = " ".join("".join(pieces).split())
+            if text:
+                self.blocks.append((number, tag, text, block_link_chars))
+                if tag not in HEADING_TAGS and len(text) >= MIN_BLOCK_CHARS:
+                    score = 1 + text.count(",") + min(len(text) // 100, 3)
+                    if self.stack:
+                        parent = self.stack[-1][0]
+                        self.scores[parent] = self.scores.get(parent, 0) + score
+                    if len(self.stack) > 1:
+                        grandparent = self.stack[-2][0]
+                        self.scores[grandparent] = self.scores.get(grandparent, 0) + score / 2
+        elif tag == "a":
+            self.link_depth -= 1
+        elif tag == "title" and self.title_parts is not None:
+            self.title = "".join(self.title_parts).strip()
+            self.title_parts = None
+
+        # Children close first, so a container's score is complete by now
+        if number in self.scores:
+            self.containers[number] = (self.index, _hint_weight(tag, attrs),
+                                       self.chars - chars, self.link_chars - link_chars)
+
+    def result(self, max_chars: int) -> Dict:
+        self.close()
+        best = None
+        best_score = 0
+        for number, (end, weight, chars, link_chars) in self.containers.items():
+            link_density = link_chars / chars if chars else 1
+            score = (self.scores[number] + weight) * (1 - link_density)
+            if score > best_score:
+                best, best_score = (number, end), score
+
+        if best:
+            start, end = best
+            blocks = (text for number, tag, text, link_chars in self.blocks
+                      if start <= number < end and tag not in HEADING_TAGS
+                      and len(text) >= MIN_BLOCK_CHARS and link_chars <= MAX_LINK_DENSITY * len(text))
+            content = _join_until(blocks, max_chars, "\n\n")
+        else:
+            # No block is long enough to score, keep whatever text there is
+            content = _join_until((text for _, _, text, _ in self.blocks), max_chars, " ")
+        return {"title": self.title, "description": self.description, "content": content}
+
+
+class _DensityHTMLParser(PythonHTMLParser):
+    """Stream the events of Python's built-in HTML parser into a _DensityScorer."""
+
+    def __init__(self, scorer: _DensityScorer):
+        super().__init__(convert_charrefs=True)
+        self.scorer = scorer
+
+    def handle_starttag(self, tag, attrs):
+        self.scorer.start(tag, dict(attrs))
+        if tag in VOID_TAGS:
+            self.scorer.end(tag)
+
+    def handle_endtag(self, tag):
+        self.scorer.end(tag)
+
+    def handle_data(self, data):
+        self.scorer.data(data)
+
+
+def _hint_weight(tag: str, attrs: Dict) -> float:
+    """Weight of a container from its tag and class/id names."""
+    weight = TAG_WEIGHTS.get(tag, 0)
+    hint = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+    if hint.strip():
+        if NEGATIVE_HINTS.search(hint):
+            weight -= CLASS_WEIGHT
+        if POSITIVE_HINTS.search(hint):
+            weight += CLASS_WEIGHT
+    return weight
+
+
+def _score_stream(html: str, parser: str) -> _DensityScorer:
+    """Run the density scorer over a page without building a tree."""
+    scorer = _DensityScorer()
+    if parser == "lxml":
+        stream = etree.HTMLParser(target=scorer)
+        try:
+            stream.feed(html)
+            stream.close()
+        except etree.LxmlError:
+            # Raised for empty documents; whatever was seen is still scored
+            pass
+    else:
+        stream = _DensityHTMLParser(scorer)
+        stream.feed(html)
+        stream.close()
+    return scorer
+
+
+def _walk_selectolax(root, scorer: _DensityScorer):
+    """Feed the elements and text of a selectolax tree to the scorer, depth first."""
+    if root is None:
+        return
+    scorer.start(root.tag, root.attributes)
+    stack = [(root.tag, root.iter(include_text=True))]
+    while stack:
+        tag, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            scorer.end(tag)
+            continue
+        child_tag = child.tag
+        if child_tag == "-text":
+            scorer.data(child.text_content)
+        elif child_tag[0] not in "-#_!" and child_tag not in SKIP_TAGS:
+            scorer.start(child_tag, child.attributes)
+            stack.append((child_tag, child.iter(include_text=True)))
+
+
+def _iter_tags(root: Tag, name: str) -> Iterable[Tag]:
+    """Lazily yield descendant tags so callers can stop early."""
+    for node in root.descendants:
+        if isinstance(node, Tag) and node.name == name:
+            yield node
+
+
+def _iter_text_nodes(root) -> Iterable[str]:
+    """Lazily yield stripped text nodes of a selectolax node."""
+    for node in root.traverse(include_text=True):
+        if node.tag == "-text":
+            text = node.text_content.strip()
+            if text and node.parent and node.parent.tag not in ("script", "style"):
+                yield text
+
+
+def _join_until(pieces: Iterable[str], max_chars: int, separator: str) -> Optional[str]:
+    """Join non-empty pieces until at least max_chars characters are collected."""
+    parts = []
+    length = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        parts.append(piece)
+        length += len(piece) + len(separator)
+        if length >= max_chars:
+            break
+    return separator.join(parts)[:max_chars] or None
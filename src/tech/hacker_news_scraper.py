@@ -6,192 +6,377 @@ This script scrapes the top 5 stories from Hacker News (https://news.ycombinator
 and extracts information from each linked article.
 """
 
-import requests
 from bs4 import BeautifulSoup
-import time
+from article_extractor import DEFAULT_MAX_CHARS, DEFAULT_PARSER, extract_article
+from story_store import StoryStore
+import argparse
 import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import os
 from typing import Dict, List, Optional, Tuple
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fetcher import HTML_CONTENT_TYPES, ContentTypeError, Fetcher, HostRateLimiter, get_fetcher
+import tracing
+
+# The front page changes constantly, so it is only reused for a few minutes
+FRONT_PAGE_TTL = 10 * 60
+
+# Only the first ~1000 characters are kept, which rarely needs more than this
+DEFAULT_MAX_ARTICLE_BYTES = 512 * 1024
+
+
+BACKENDS = ("html", "api")
+
+
 class HackerNewsScraper:
     """Scraper for Hacker News website."""
     
-    def __init__(self, base_url: str = "https://news.ycombinator.com/"):
-        """Initialize the scraper with the base URL."""
+    def __init__(self, base_url: str = "https://news.ycombinator.com/",
+                 backend: str = "html", api_url: str = "https://hacker-news.firebaseio.com/v0/",
+                 api_workers: int = 16, max_workers: int = 8, per_host_delay: float = 1.0,
+                 fetcher: Optional[Fetcher] = None, parser: str = DEFAULT_PARSER,
+                 max_article_bytes: Optional[int] = DEFAULT_MAX_ARTICLE_BYTES,
+                 max_chars: int = DEFAULT_MAX_CHARS, store: Optional[StoryStore] = None):
+        """
+        Initialize the scraper with the base URL.
+
+        Args:
+            base_url: Hacker News front page URL
+            backend: "html" scrapes the front page, "api" uses the Firebase JSON API
+            api_url: Base URL of the Firebase API
+            api_workers: Number of API item records fetched concurrently
+            max_workers: Number of articles fetched concurrently (1 fetches sequentially)
+            per_host_delay: Minimum seconds between two requests to the same host
+            fetcher: HTTP fetch layer, defaults to the shared cached fetcher
+            parser: Article parser backend ("html.parser", "lxml" or "selectolax")
+            max_article_bytes: Stop downloading an article after this many bytes
+                (None downloads the whole body)
+            max_chars: Maximum length of the extracted article content
+            store: Story index; articles it already holds are not fetched again,
+                fetched articles and saved stories are recorded in it
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
         self.base_url = base_url
+        self.backend = backend
+        self.api_url = api_url
+        self.api_workers = max(1, api_workers)
+        self.fetcher = fetcher or get_fetcher()
+        self.parser = parser
+        self.max_article_bytes = max_article_bytes
+        self.max_chars = max_chars
+        self.store = store
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = HostRateLimiter(per_host_delay)
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
     
-    def get_top_stories(self, limit: int = 5) -> List[Dict]:
+    def get_top_stories(self, limit: int = 5, fetch_articles: bool = False) -> List[Dict]:
         """
         Get the top stories from Hacker News.
+
+        Stories come from the front page HTML or the Firebase API depending on
+        `backend`. Stories are returned in their rank order. Linked articles are
+        only fetched when asked for; the script stage normally fetches them
+        later through `fetch_articles` for the stories it actually uses.
         
         Args:
             limit: Number of stories to retrieve
+            fetch_articles: Also fetch the linked article of every story
             
         Returns:
             List of dictionaries containing story information
         """
-        try:
-            response = requests.get(self.base_url, headers=self.headers)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            stories = []
-            
-            # Find all story items
-            story_items = soup.select(".athing")
-            
-            for i, item in enumerate(story_items[:limit]):
-                # Get the story ID
-                story_id = item.get("id")
-                
-                # Get the story title and link
-                title_cell = item.select_one(".titleline > a")
-                if not title_cell:
-                    continue
-                    
-                title = title_cell.text
-                link = title_cell.get("href")
-                
-                # Make sure the link is absolute
-                if link and not link.startswith(("http://", "https://")):
-                    link = f"https://news.ycombinator.com/{link}"
-                
-                # Get the story details from the following row
-                details_row = item.find_next_sibling("tr")
-                if not details_row:
-                    continue
-                
-                # Get points, author, and comments
-                score = details_row.select_one(".score")
-                score_text = score.text.split()[0] if score else "0"
-                
-                author = details_row.select_one(".hnuser")
-                author_text = author.text if author else "unknown"
+        with tracing.span("hn.get_top_stories", backend=self.backend, limit=limit) as span:
+            try:
+                if self.backend == "api":
+                    stories = self._get_stories_from_api(limit)
+                else:
+                    stories = self._get_stories_from_html(limit)
                 
-                comments_link = details_row.select_one("a[href*='item']")
-                comments_count = "0"
-                if comments_link:
-                    comments_text = comments_link.text
-                    if "comment" in comments_text:
-                        comments_count = comments_text.split()[0]
+                if fetch_articles:
+                    self.fetch_articles(stories)
                 
-                # Get article content if possible
-                article_content = self._get_article_content(link) if link else None
+                span.set(stories=len(stories))
+                return stories
                 
-                story = {
-                    "id": story_id,
-                    "title": title,
-                    "link": link,
-                    "points": score_text,
-                    "author": author_text,
-                    "comments": comments_count,
-                    "article_content": article_content,
-                    "scraped_at": datetime.now().isoformat()
-                }
-                
-                stories.append(story)
+            except Exception as e:
+                tracing.error("hn.errors", f"Error scraping Hacker News: {e}")
+                span.fail(e)
+                return []
+    
+    def fetch_articles(self, stories: List[Dict]) -> List[Dict]:
+        """
+        Fill in `article_content` for stories that do not have it yet.
+
+        Content already held by the story index is reused; the remaining
+        articles are fetched concurrently using up to `max_workers` threads and
+        recorded in the index.
+        
+        Args:
+            stories: Story dictionaries, updated in place
+            
+        Returns:
+            The same list of stories
+        """
+        # Reuse article content from earlier runs
+        if self.store:
+            known = self.store.get_article_contents(
+                story["id"] for story in stories if not story.get("article_content"))
+            for story in stories:
+                if not story.get("article_content"):
+                    story["article_content"] = known.get(story["id"])
+        
+        # Get article content if possible; map() keeps the rank order
+        missing = [story for story in stories if not story.get("article_content")]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            contents = executor.map(tracing.in_context(self._fetch_story_article), missing)
+            for story, article_content in zip(missing, contents):
+                story["article_content"] = article_content
+        
+        if self.store:
+            self.store.save_article_contents(missing)
+        
+        return stories
+    
+    def _get_stories_from_html(self, limit: int) -> List[Dict]:
+        """
+        Parse the top stories from the front page HTML.
+
+        The front page only lists 30 stories, so `limit` is capped at 30.
+        
+        Args:
+            limit: Number of stories to retrieve
+            
+        Returns:
+            List of story dictionaries without article content
+        """
+        response = self.fetcher.get(self.base_url, headers=self.headers, ttl=FRONT_PAGE_TTL,
+                                    before_request=self.rate_limiter.wait)
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.text, "html.parser")
+        stories = []
+        
+        # Find all story items
+        story_items = soup.select(".athing")
+        
+        for i, item in enumerate(story_items[:limit]):
+            # Get the story ID
+            story_id = item.get("id")
+            
+            # Get the story title and link
+            title_cell = item.select_one(".titleline > a")
+            if not title_cell:
+                continue
                 
-                # Be nice to the server
-                time.sleep(1)
+            title = title_cell.text
+            link = title_cell.get("href")
             
-            return stories
+            # Make sure the link is absolute
+            if link and not link.startswith(("http://", "https://")):
+                link = f"https://news.ycombinator.com/{link}"
             
-        except Exception as e:
-            print(f"Error scraping Hacker News: {e}")
-            return []
+            # Get the story details from the following row
+            details_row = item.find_next_sibling("tr")
+            if not details_row:
+                continue
+            
+            # Get points, author, and comments
+            score = details_row.select_one(".score")
+            score_text = score.text.split()[0] if score else "0"
+            
+            author = details_row.select_one(".hnuser")
+            author_text = author.text if author else "unknown"
+            
+            comments_link = details_row.select_one("a[href*='item']")
+            comments_count = "0"
+            if comments_link:
+                comments_text = comments_link.text
+                if "comment" in comments_text:
+                    comments_count = comments_text.split()[0]
+            
+            story = {
+                "id": story_id,
+                "title": title,
+                "link": link,
+                "points": score_text,
+                "author": author_text,
+                "comments": comments_count,
+                "article_content": None,
+                "scraped_at": datetime.now().isoformat()
+            }
+            
+            stories.append(story)
+        
+        return stories
     
-    def _get_article_content(self, url: str) -> Optional[Dict]:
+    def _get_stories_from_api(self, limit: int) -> List[Dict]:
         """
-        Get content from the linked article.
+        Fetch the top stories from the Hacker News Firebase API.
+
+        `topstories.json` lists up to 500 ranked ids; the item records are
+        fetched concurrently using up to `api_workers` threads.
         
         Args:
-            url: URL of the article
+            limit: Number of stories to retrieve
             
         Returns:
-            Dictionary with article content or None if failed
+            List of story dictionaries without article content
+        """
+        response = self.fetcher.get(f"{self.api_url}topstories.json", ttl=FRONT_PAGE_TTL)
+        response.raise_for_status()
+        story_ids = response.json()[:limit]
+        
+        with ThreadPoolExecutor(max_workers=self.api_workers) as executor:
+            items = list(executor.map(tracing.in_context(self._get_api_item), story_ids))
+        
+        return [self._story_from_item(item) for item in items if item]
+    
+    def _get_api_item(self, item_id: int) -> Optional[Dict]:
+        """
+        Fetch a single item record from the Firebase API.
+        
+        Args:
+            item_id: Hacker News item id
+            
+        Returns:
+            Item dictionary or None if failed or deleted
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.fetcher.get(f"{self.api_url}item/{item_id}.json", ttl=FRONT_PAGE_TTL)
             response.raise_for_status()
+            item = response.json()
+            if not item or item.get("deleted") or item.get("dead"):
+                return None
+            return item
+        except Exception as e:
+            tracing.error("hn.item_errors", f"Error getting item {item_id}: {e}")
+            return None
+    
+    def _story_from_item(self, item: Dict) -> Dict:
+        """
+        Convert a Firebase API item into the story dictionary shape of the HTML backend.
+        
+        Args:
+            item: Item dictionary from the API
             
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Try to get the title
-            title = None
-            title_tag = soup.select_one("title")
-            if title_tag:
-                title = title_tag.text.strip()
-            
-            # Try to get the main content
-            content = None
-            
-            # Try different common content selectors
-            content_selectors = [
-                "article", 
-                "main", 
-                ".article-content", 
-                ".post-content", 
-                ".entry-content",
-                "#content",
-                ".content"
-            ]
-            
-            for selector in content_selectors:
-                content_elem = soup.select_one(selector)
-                if content_elem:
-                    # Get text from paragraphs
-                    paragraphs = content_elem.select("p")
-                    if paragraphs:
-                        content = "\n\n".join([p.text.strip() for p in paragraphs if p.text.strip()])
-                        break
-            
-            # If no paragraphs found, try to get all text
-            if not content:
-                content_elem = soup.select_one("body")
-                if content_elem:
-                    content = content_elem.text.strip()
-            
-            # Try to get meta description
-            description = None
-            meta_desc = soup.select_one('meta[name="description"]')
-            if meta_desc:
-                description = meta_desc.get("content")
-            
-            return {
-                "title": title,
-                "description": description,
-                "content": content[:1000] if content else None  # Limit content length
-            }
+        Returns:
+            Story dictionary without article content
+        """
+        # Ask HN and similar posts have no url and link to their own item page
+        link = item.get("url") or f"https://news.ycombinator.com/item?id={item['id']}"
+        return {
+            "id": str(item["id"]),
+            "title": item.get("title", ""),
+            "link": link,
+            "points": str(item.get("score", 0)),
+            "author": item.get("by", "unknown"),
+            "comments": str(item.get("descendants", 0)),
+            "article_content": None,
+            "scraped_at": datetime.now().isoformat()
+        }
+    
+    def _fetch_story_article(self, story: Dict) -> Optional[Dict]:
+        """
+        Fetch the linked article of a story.
+        
+        Args:
+            story: Story dictionary with a `link` key
             
-        except Exception as e:
-            print(f"Error getting article content from {url}: {e}")
+        Returns:
+            Dictionary with article content or None if failed
+        """
+        link = story.get("link")
+        if not link:
             return None
+        return self._get_article_content(link)
+    
+    def _get_article_content(self, url: str) -> Optional[Dict]:
+        """
+        Get content from the linked article.
+        
+        Args:
+            url: URL of the article
+            
+        Returns:
+            Dictionary with article content or None if failed
+        """
+        with tracing.span("hn.article", url=url) as span:
+            try:
+                response = self.fetcher.get(url, headers=self.headers, timeout=10,
+                                            before_request=self.rate_limiter.wait,
+                                            max_bytes=self.max_article_bytes,
+                                            content_types=HTML_CONTENT_TYPES)
+                response.raise_for_status()
+                
+                article = extract_article(response.text, parser=self.parser, max_chars=self.max_chars)
+                span.set(chars=len(article.get("content") or ""))
+                return article
+                
+            except ContentTypeError as e:
+                print(f"Skipping article {url}: {e}")
+                span.set(skipped=str(e))
+                return None
+            except Exception as e:
+                tracing.error("hn.article_errors", f"Error getting article content from {url}: {e}")
+                span.fail(e)
+                return None
     
     def save_stories(self, stories: List[Dict], filename: str = "hacker_news_stories.json"):
         """
-        Save stories to a JSON file.
+        Save stories to a JSON file and record them in the story index if one is set.
         
         Args:
             stories: List of story dictionaries
             filename: Output filename
+
+        Returns:
+            True if the JSON file was written
         """
+        saved = False
         try:
             with open(filename, "w", encoding="utf-8") as f:
                 json.dump(stories, f, indent=2, ensure_ascii=False)
             print(f"Stories saved to {filename}")
+            saved = True
         except Exception as e:
-            print(f"Error saving stories: {e}")
+            tracing.error("hn.save_errors", f"Error saving stories: {e}")
+        
+        if self.store:
+            try:
+                self.store.upsert_stories(stories)
+                print(f"Stories indexed in {self.store.db_path}")
+            except Exception as e:
+                tracing.error("hn.save_errors", f"Error indexing stories: {e}")
+        return saved
+
 
+def main(argv: Optional[List[str]] = None):
+    """
+    Main function to run the scraper.
+    
+    Args:
+        argv: Command line arguments, defaults to sys.argv
 
-def main():
-    """Main function to run the scraper."""
-    scraper = HackerNewsScraper()
-    print("Scraping top 5 stories from Hacker News...")
-    stories = scraper.get_top_stories(limit=5)
+    Returns:
+        The scraped stories, empty if none were scraped or they could not be saved
+    """
+    parser = argparse.ArgumentParser(description="Scrape the top stories from Hacker News")
+    parser.add_argument("--backend", choices=BACKENDS, default="html",
+                        help="scrape the front page HTML or use the Firebase API")
+    parser.add_argument("--limit", type=int, default=5, help="number of stories to scrape")
+    parser.add_argument("--fetch-articles", action="store_true",
+                        help="fetch every linked article now instead of in the script stage")
+    args = parser.parse_args(argv)
+    
+    scraper = HackerNewsScraper(backend=args.backend, store=StoryStore())
+    print(f"Scraping top {args.limit} stories from Hacker News...")
+    stories = scraper.get_top_stories(limit=args.limit, fetch_articles=args.fetch_articles)
     
     if stories:
         print(f"Successfully scraped {len(stories)} stories")
@@ -210,9 +395,12 @@ def main():
                     print(f"   Content: {content['content'][:150]}...")
         
         # Save to file
-        scraper.save_stories(stories)
-    else:
-        print("Failed to scrape any stories")
+        saved = scraper.save_stories(stories)
+        print(scraper.fetcher.report())
+        return stories if saved else []
+
+    print("Failed to scrape any stories")
+    return []
 
 
 if __name__ == "__main__":
@@ -1,27 +1,80 @@
 import json
 import os
-from google import genai
+import sys
+from story_store import StoryStore
 from dotenv import load_dotenv
 load_dotenv()
 
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")    
-client = genai.Client(api_key=GEMINI_API_KEY)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gemini_client import get_client, report as gemini_report
 
-def load_tech_news():
+STORIES_DB = 'data/stories.db'
+
+# Article text included in the prompt per story, in (approximate) tokens
+ARTICLE_TOKEN_BUDGET = 200
+CHARS_PER_TOKEN = 4
+
+def load_tech_news(limit=5, db_path=STORIES_DB):
     """
-    Load and parse the tech news from JSON file
+    Load the top tech news items that have not been covered in a video yet
     
+    Falls back to the JSON file written by the scraper when no story index exists.
+    
+    Args:
+        limit (int): Number of news items to load
+        db_path (str): Path of the story index database
+        
     Returns:
         list: List of tech news items
     """
+    if os.path.exists(db_path):
+        try:
+            return StoryStore(db_path).top_uncovered(limit)
+        except Exception as e:
+            print(f"Error loading tech news from the story index: {e}")
+    
     try:
         with open('hacker_news_stories.json', 'r', encoding='utf-8') as f:
             news_items = json.load(f)
-        return news_items[:5]  # Get only the first 5 news items
+        return news_items[:limit]
     except Exception as e:
         print(f"Error loading tech news: {e}")
         return []
 
+def fetch_article_context(news_items):
+    """
+    Fetch the linked articles of the selected news items only
+    
+    Args:
+        news_items (list): News items picked for the script, updated in place
+        
+    Returns:
+        list: The same news items with 'article_content' filled in where possible
+    """
+    # Imported here so loading this module does not pull in bs4 and requests
+    from hacker_news_scraper import HackerNewsScraper
+
+    store = StoryStore(STORIES_DB) if os.path.exists(STORIES_DB) else None
+    scraper = HackerNewsScraper(store=store)
+    return scraper.fetch_articles(news_items)
+
+def trim_to_token_budget(text, budget=ARTICLE_TOKEN_BUDGET):
+    """
+    Trim text to roughly `budget` tokens, cutting at a word boundary
+    
+    Args:
+        text (str): Text to trim
+        budget (int): Token budget
+        
+    Returns:
+        str: Trimmed text
+    """
+    max_chars = budget * CHARS_PER_TOKEN
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
 def create_tech_script(news_items):
     """
     Create a script from multiple tech news items
@@ -36,6 +89,10 @@ def create_tech_script(news_items):
     news_content = ""
     for i, item in enumerate(news_items, 1):
         news_content += f"\nNews {i}:\nTitle: {item['title']}\nURL: {item['link']}\nPoints: {item['points']}\n"
+        article = item.get('article_content') or {}
+        article_text = article.get('content') or article.get('description')
+        if article_text:
+            news_content += f"Article excerpt: {trim_to_token_budget(article_text)}\n"
     
     prompt = f"""Create a 60-second YouTube Shorts script that summarizes these 5 tech news stories in an engaging way.
 
@@ -54,10 +111,11 @@ The script should:
 10. Include a call to action at the end
 11. Flow smoothly between different news items
 12. Highlight the most interesting aspects of each story
+13. Use the article excerpts, where given, to get the facts of each story right
 
 Format the response as a clean script with only the narrator's lines."""
 
-    script_response = client.models.generate_content(
+    script_response = get_client().models.generate_content(
         model="gemini-2.0-flash",
         contents=prompt,
     )
@@ -90,11 +148,20 @@ def write_tech_script(script_text, news_items):
     return script_path
 
 def main():
+    """
+    Generate today's tech script from the top uncovered stories
+    
+    Returns:
+        str: Path to the written script file, or None if no news items were found
+    """
     # Load news items
     news_items = load_tech_news()
     if not news_items:
         print("No news items found")
-        return
+        return None
+    
+    # Fetch article text for the selected stories only
+    fetch_article_context(news_items)
     
     # Create combined script for all news items
     script_text = create_tech_script(news_items)
@@ -102,6 +169,13 @@ def main():
     # Write the script to file
     script_path = write_tech_script(script_text, news_items)
     print(f"Combined script generated and saved to: {script_path}")
+    print(gemini_report())
+    
+    # Remember the covered stories so they are not picked again tomorrow
+    if os.path.exists(STORIES_DB):
+        StoryStore(STORIES_DB).mark_covered(item['id'] for item in news_items)
+    
+    return script_path
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
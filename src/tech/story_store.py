@@ -0,0 +1,233 @@
+"""
+Story Store
+
+Persistent SQLite index of scraped Hacker News stories keyed by HN id. Keeps
+points/comments snapshots over time and remembers which stories were already
+covered in a video.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT,
+    author TEXT,
+    points INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER NOT NULL DEFAULT 0,
+    last_rank INTEGER,
+    article_content TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    covered_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_stories_uncovered
+    ON stories (last_seen, last_rank) WHERE covered_at IS NULL;
+CREATE TABLE IF NOT EXISTS snapshots (
+    story_id INTEGER NOT NULL REFERENCES stories (id),
+    scraped_at TEXT NOT NULL,
+    rank INTEGER,
+    points INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    PRIMARY KEY (story_id, scraped_at)
+);
+"""
+
+
+class StoryStore:
+    """SQLite-backed index of Hacker News stories."""
+
+    def __init__(self, db_path: str = "data/stories.db"):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the store usable from any thread
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def upsert_stories(self, stories: List[Dict]):
+        """
+        Insert or update stories and record a points/comments snapshot for each.
+
+        Args:
+            stories: Story dictionaries in rank order, as returned by the scraper
+        """
+        # One timestamp per scrape so stories of the same run sort by rank
+        scraped_at = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            for rank, story in enumerate(stories, 1):
+                points = _to_int(story.get("points"))
+                comments = _to_int(story.get("comments"))
+                article_content = story.get("article_content")
+                conn.execute(
+                    """
+                    INSERT INTO stories (id, title, link, author, points, comments, last_rank,
+                                         article_content, first_seen, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (id) DO UPDATE SET
+                        title = excluded.title,
+                        link = excluded.link,
+                        points = excluded.points,
+                        comments = excluded.comments,
+                        last_rank = excluded.last_rank,
+                        article_content = COALESCE(excluded.article_content, stories.article_content),
+                        last_seen = excluded.last_seen
+                    """,
+                    (int(story["id"]), story["title"], story.get("link"), story.get("author"),
+                     points, comments, rank,
+                     json.dumps(article_content, ensure_ascii=False) if article_content else None,
+                     scraped_at, scraped_at),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots (story_id, scraped_at, rank, points, comments) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (int(story["id"]), scraped_at, rank, points, comments),
+                )
+
+    def save_article_contents(self, stories: List[Dict]):
+        """
+        Store fetched article content without touching rank or snapshots.
+
+        Args:
+            stories: Story dictionaries with `article_content` filled in
+        """
+        rows = [(json.dumps(story["article_content"], ensure_ascii=False), int(story["id"]))
+                for story in stories if story.get("article_content")]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("UPDATE stories SET article_content = ? WHERE id = ?", rows)
+
+    def get_article_contents(self, story_ids: Iterable) -> Dict[str, Dict]:
+        """
+        Look up article content already stored for the given stories.
+
+        Args:
+            story_ids: HN story ids
+
+        Returns:
+            Mapping of story id (as a string) to its stored article content
+        """
+        ids = [int(story_id) for story_id in story_ids]
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT id, article_content FROM stories "
+                f"WHERE id IN ({placeholders}) AND article_content IS NOT NULL",
+                ids,
+            ).fetchall()
+        return {str(row["id"]): json.loads(row["article_content"]) for row in rows}
+
+    def top_uncovered(self, limit: int = 5, max_age_days: float = 2) -> List[Dict]:
+        """
+        Get the best ranked stories that have not been covered in a video yet.
+
+        Args:
+            limit: Number of stories to return
+            max_age_days: Ignore stories not seen on the front page for this long
+
+        Returns:
+            List of story dictionaries in rank order
+        """
+        since = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT * FROM stories
+                WHERE covered_at IS NULL AND last_seen >= ?
+                ORDER BY last_seen DESC, last_rank
+                LIMIT ?
+                """,
+                (since, limit),
+            ).fetchall()
+        return [_story_from_row(row) for row in rows]
+
+    def mark_covered(self, story_ids: Iterable):
+        """
+        Mark stories as covered so they are not picked again.
+
+        Args:
+            story_ids: HN story ids
+        """
+        now = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE stories SET covered_at = ? WHERE id = ?",
+                [(now, int(story_id)) for story_id in story_ids],
+            )
+
+    def fingerprint(self) -> str:
+        """
+        Return a digest of the stored stories that only changes with their content.
+
+        The database file itself changes on every scrape, which stamps each
+        story with the time it was seen and adds snapshots; those are left out.
+
+        Returns:
+            SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, title, link, author, points, comments, last_rank, article_content, covered_at "
+                "FROM stories ORDER BY id"
+            )
+            for row in rows:
+                digest.update(json.dumps(tuple(row)).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_snapshots(self, story_id) -> List[Dict]:
+        """
+        Get the points/comments history of a story.
+
+        Args:
+            story_id: HN story id
+
+        Returns:
+            Snapshot dictionaries ordered by scrape time
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT scraped_at, rank, points, comments FROM snapshots "
+                "WHERE story_id = ? ORDER BY scraped_at",
+                (int(story_id),),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def _story_from_row(row: sqlite3.Row) -> Dict:
+    """Convert a stories row into the scraper's story dictionary shape."""
+    return {
+        "id": str(row["id"]),
+        "title": row["title"],
+        "link": row["link"],
+        "points": str(row["points"]),
+        "author": row["author"],
+        "comments": str(row["comments"]),
+        "article_content": json.loads(row["article_content"]) if row["article_content"] else None,
+        "scraped_at": row["last_seen"],
+    }
+
+
+def _to_int(value: Optional[str]) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,341 @@
+"""
+Tracing
+
+Span-style timings and counters for one run. Pipeline stages, scraper
+requests, Gemini calls, the TTS chunk loop and uploads open spans; every
+finished span is appended to a JSONL trace and folded into a per-name summary
+(count, time, errors) that ends the trace and is printed as a run report.
+
+Handled errors are reported with `error`, which prints them as before and
+records them in the trace under the span they happened in. Work handed to a
+thread pool is wrapped with `in_context` so its spans keep their parent.
+
+Tracing is off unless `configure` is called (app.py --trace) or the
+TRACE_FILE environment variable names a trace file. While it is off `span`
+returns a shared no-op span and `count` returns at once, so instrumented code
+costs a function call per span.
+"""
+
+import atexit
+import contextvars
+import functools
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is then left out
+    resource = None
+
+TRACE_DIR = "data/traces"
+
+# Span the code currently runs in; asyncio tasks and threads each see their own,
+# pool threads only see the caller's through `in_context`
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_span", default=None)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Return the peak resident set size of the process in MB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def describe_error(error: BaseException) -> str:
+    """Return the type and message of an exception, e.g. for logs and span errors."""
+    message = str(error)
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+class Span:
+    """A timed operation with attributes, finished when its `with` block exits."""
+
+    __slots__ = ("tracer", "name", "attrs", "id", "parent", "start", "started_at", "error", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.id = next(tracer._ids)
+        self.parent = None
+        self.start = 0.0
+        self.started_at = 0.0
+        self.error = None
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.id)
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        if exc is not None and self.error is None:
+            self.error = describe_error(exc)
+        self.tracer._finish(self, duration)
+        return False
+
+    def set(self, **attrs):
+        """Add or update attributes."""
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        """Mark the span as failed by an error that was handled instead of raised."""
+        self.error = describe_error(error) if isinstance(error, BaseException) else str(error)
+
+    def elapsed(self) -> float:
+        """Seconds since the span started."""
+        return time.perf_counter() - self.start
+
+
+class _NullSpan:
+    """Span handed out while tracing is off; does nothing and is falsy."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def elapsed(self) -> float:
+        return 0.0
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Writes finished spans to a JSONL file and keeps per-name totals."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: JSONL trace file, or None for a disabled tracer
+        """
+        self.path = path
+        self.enabled = path is not None
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.started = time.perf_counter()
+        self.spans: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, float] = {}
+        self.closed = False
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._file = None
+        if self.enabled:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # Line buffered, so a crashed run still leaves every finished span behind
+            self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def span(self, name: str, **attrs) -> Span:
+        """
+        Start a span, to be used as a context manager.
+
+        Args:
+            name: Span name, e.g. "http.get"; spans of one name are summarized together
+            **attrs: Attributes recorded with the span
+
+        Returns:
+            The span, or a no-op span while tracing is off
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def count(self, name: str, amount: float = 1):
+        """Add to a run-wide counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def error(self, name: str, message: str, **attrs):
+        """
+        Record a handled error under the current span and count it.
+
+        Args:
+            name: Counter of the error, e.g. "hn.item_errors"
+            message: Error message as printed
+            **attrs: Attributes recorded with the error
+        """
+        if not self.enabled:
+            return
+        record = {
+            "type": "error",
+            "name": name,
+            "parent": _current_span.get(),
+            "thread": threading.current_thread().name,
+            "time": round(time.time(), 6),
+            "message": message,
+        }
+        if attrs:
+            record["attrs"] = attrs
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+            if not self.closed:
+                self._file.write(line + "\n")
+
+    def _finish(self, span: Span, duration: float):
+        record = {
+            "type": "span",
+            "name": span.name,
+            "id": span.id,
+            "parent": span.parent,
+            "thread": threading.current_thread().name,
+            "start": round(span.started_at, 6),
+            "seconds": round(duration, 6),
+            "max_rss_mb": peak_rss_mb(),
+        }
+        if span.attrs:
+            record["attrs"] = span.attrs
+        if span.error:
+            record["error"] = span.error
+        line = json.dumps(record, default=str)
+
+        with self._lock:
+            totals = self.spans.setdefault(span.name, {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0})
+            totals["count"] += 1
+            totals["seconds"] += duration
+            totals["max_seconds"] = max(totals["max_seconds"], duration)
+            if span.error:
+                totals["errors"] += 1
+            if not self.closed:
+                self._file.write(line + "\n")
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the run totals: wall time, peak RSS, per-span-name totals and counters."""
+        with self._lock:
+            return {
+                "type": "summary",
+                "run_id": self.run_id,
+                "seconds": round(time.perf_counter() - self.started, 3),
+                "peak_rss_mb": peak_rss_mb(),
+                "errors": sum(totals["errors"] for totals in self.spans.values()),
+                "spans": {name: dict(totals) for name, totals in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def report(self) -> str:
+        """Return the summary as a printable table."""
+        summary = self.summary()
+        peak = summary["peak_rss_mb"]
+        lines = [f"Run {summary['run_id']}: {summary['seconds']:.1f}s, {summary['errors']} failed spans"
+                 + (f", peak RSS {peak:.0f} MB" if peak is not None else ""),
+                 f"{'span':<28} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8} {'errors':>6}"]
+        for name, totals in summary["spans"].items():
+            lines.append(f"{name:<28} {totals['count']:>6} {totals['seconds']:>9.3f} "
+                         f"{totals['seconds'] / totals['count']:>8.3f} {totals['max_seconds']:>8.3f} "
+                         f"{totals['errors']:>6}")
+        for name, value in summary["counters"].items():
+            lines.append(f"{name:<28} {value:>g}")
+        return "\n".join(lines)
+
+    def close(self) -> Optional[Dict[str, Any]]:
+        """
+        Append the summary to the trace and close it. Safe to call more than once.
+
+        Returns:
+            The summary, or None if the tracer is disabled or already closed
+        """
+        if not self.enabled or self.closed:
+            return None
+        summary = self.summary()
+        with self._lock:
+            self._file.write(json.dumps(summary, default=str) + "\n")
+            self._file.close()
+            self.closed = True
+        return summary
+
+
+_tracer = Tracer()
+
+
+def configure(path: Optional[str] = None) -> Tracer:
+    """
+    Turn tracing on for the rest of the process.
+
+    Args:
+        path: JSONL trace file, defaults to data/traces/run-<timestamp>.jsonl
+
+    Returns:
+        The new process-wide tracer; it is closed at exit if not closed before
+    """
+    global _tracer
+    _tracer.close()
+    tracer = Tracer(path or os.path.join(TRACE_DIR, f"run-{datetime.now():%Y%m%d-%H%M%S}.jsonl"))
+    atexit.register(tracer.close)
+    _tracer = tracer
+    return tracer
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """Start a span on the process-wide tracer; see Tracer.span."""
+    return _tracer.span(name, **attrs)
+
+
+def count(name: str, amount: float = 1):
+    """Add to a counter of the process-wide tracer."""
+    _tracer.count(name, amount)
+
+
+def error(name: str, message: str, **attrs):
+    """Print a handled error and record it on the process-wide tracer; see Tracer.error."""
+    print(message)
+    _tracer.error(name, message, **attrs)
+
+
+def in_context(fn: Callable) -> Callable:
+    """
+    Wrap a function handed to a thread pool so that it runs in the caller's context.
+
+    Pool threads do not inherit context variables, so spans opened by the work
+    would otherwise have no parent. Every call runs in its own copy of the
+    caller's context, as a context can only be entered by one thread at a time.
+
+    Args:
+        fn: Function to run in the pool
+
+    Returns:
+        The wrapped function, or `fn` itself while tracing is off
+    """
+    if not _tracer.enabled:
+        return fn
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+if os.getenv("TRACE_FILE"):
+    configure(os.getenv("TRACE_FILE"))
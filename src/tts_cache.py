@@ -0,0 +1,86 @@
+"""
+TTS Segment Cache
+
+Content-addressed on-disk cache of synthesized audio, one entry per chunk of
+text Kokoro synthesizes, keyed by a hash of (phonemes, voice, lang_code, model
+version). Re-running the audio stage on an edited script only synthesizes the
+chunks whose phonemes changed.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from disk_lru import SizeCap, mark_used
+
+
+class SegmentCache:
+    """Disk cache of per-chunk audio with size-capped LRU eviction."""
+
+    def __init__(self, cache_dir: str = "data/tts_cache", max_bytes: int = 500 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding one .npy file per chunk
+            max_bytes: Upper bound for the total size of the cache
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size_cap = SizeCap(cache_dir, max_bytes, ".npy")
+
+    @staticmethod
+    def key(phonemes: str, voice: str, lang_code: str, model_version: str) -> str:
+        """Return the cache key of a chunk."""
+        payload = "\0".join((phonemes, voice, lang_code, model_version))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Load the audio of a chunk.
+
+        Args:
+            key: Chunk key from `key`
+
+        Returns:
+            Float32 audio, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            audio = np.load(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        mark_used(path)
+        with self._lock:
+            self.stats["hits"] += 1
+        return audio
+
+    def put(self, key: str, audio: np.ndarray):
+        """
+        Store the audio of a chunk.
+
+        Args:
+            key: Chunk key from `key`
+            audio: Float32 audio
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, audio.astype(np.float32, copy=False))
+        os.replace(tmp_path, path)
+        self._size_cap.added(os.path.getsize(path))
+
+    def report(self) -> str:
+        """Return a one-line summary of the cache statistics."""
+        return f"TTS cache: {self.stats['hits']} hits, {self.stats['misses']} misses"
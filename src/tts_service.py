@@ -0,0 +1,501 @@
+"""
+TTS Service
+
+Keeps the Kokoro pipeline and voice tensors warm so the model is loaded once
+per process instead of once per channel. Synthesis can run in-process or be
+sent to a long-lived local daemon (`python src/tts_service.py --serve`) that
+every channel's audio stage shares. The daemon only accepts clients that
+present the key it generated in data/tts_daemon.key on first start (or the
+TTS_DAEMON_AUTHKEY environment variable, if set).
+"""
+
+import argparse
+import multiprocessing
+import os
+import pickle
+import secrets
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from tts_cache import SegmentCache
+
+SAMPLE_RATE = 24000
+DEFAULT_VOICE = "af_heart"
+DEFAULT_LANG_CODE = "a"
+
+# Absolute amplitude below which a sample counts as silent
+SILENCE_THRESHOLD = 1e-3
+
+DAEMON_ADDRESS = ("127.0.0.1", int(os.getenv("TTS_DAEMON_PORT", "50123")))
+DAEMON_KEY_FILE = "data/tts_daemon.key"
+
+
+def daemon_authkey(create: bool = False, key_file: str = DAEMON_KEY_FILE) -> Optional[bytes]:
+    """
+    Return the daemon's shared secret.
+
+    TTS_DAEMON_AUTHKEY takes precedence; otherwise the key is read from a file
+    only the owner can read, which the daemon creates with a random key.
+
+    Args:
+        create: Generate the key file if it does not exist yet
+        key_file: File holding the key
+
+    Returns:
+        The key, or None if there is none and `create` is False
+    """
+    if os.getenv("TTS_DAEMON_AUTHKEY"):
+        return os.getenv("TTS_DAEMON_AUTHKEY").encode("utf-8")
+    try:
+        with open(key_file, "rb") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        if not create:
+            return None
+    os.makedirs(os.path.dirname(key_file) or ".", exist_ok=True)
+    key = secrets.token_hex(32).encode("ascii")
+    # Created with owner-only permissions, it must never be readable by other users
+    fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def kokoro_version() -> str:
+    """Return the installed Kokoro version, used to invalidate cached audio."""
+    try:
+        from importlib.metadata import version
+        return version("kokoro")
+    except Exception:
+        return "unknown"
+
+
+def _kokoro_pipeline_factory(lang_code: str, model: bool = True):
+    # Imported lazily, importing kokoro pulls in torch
+    from kokoro import KPipeline
+    return KPipeline(lang_code=lang_code, model=model)
+
+
+class TTSService:
+    """In-process Kokoro synthesis with pipelines and voices kept warm."""
+
+    def __init__(self, pipeline_factory: Optional[Callable[[str], object]] = None,
+                 cache: Optional[SegmentCache] = None, model_version: Optional[str] = None):
+        """
+        Initialize the service. Nothing is loaded until the first job.
+
+        Args:
+            pipeline_factory: Callable building a pipeline for a lang code,
+                defaults to kokoro.KPipeline. With a cache it is also called
+                with model=False for a pipeline that only yields phonemes.
+            cache: Per-chunk audio cache, or None to synthesize everything
+            model_version: Part of the cache key, defaults to the Kokoro version
+        """
+        self.pipeline_factory = pipeline_factory or _kokoro_pipeline_factory
+        self.cache = cache
+        self.model_version = model_version or kokoro_version()
+        self._pipelines: Dict[Tuple[str, bool], object] = {}
+        self._lock = threading.Lock()
+        self.stats = {"load_seconds": 0.0, "jobs": 0}
+
+    def _get_pipeline(self, lang_code: str, voice: Optional[str] = None, model: bool = True):
+        pipeline = self._pipelines.get((lang_code, model))
+        if pipeline is None:
+            start = time.perf_counter()
+            pipeline = self.pipeline_factory(lang_code) if model else self.pipeline_factory(lang_code, model=False)
+            self._pipelines[(lang_code, model)] = pipeline
+            self.stats["load_seconds"] += time.perf_counter() - start
+        # KPipeline caches loaded voice tensors, so this only costs once per voice
+        if model and hasattr(pipeline, "load_voice"):
+            pipeline.load_voice(voice)
+        return pipeline
+
+    def warm_up(self, lang_code: str = DEFAULT_LANG_CODE, voice: str = DEFAULT_VOICE):
+        """
+        Load the pipeline and voice ahead of the first job.
+
+        Args:
+            lang_code: Kokoro language code
+            voice: Voice to preload
+        """
+        with self._lock:
+            self._get_pipeline(lang_code, voice)
+            if self.cache is not None:
+                self._get_pipeline(lang_code, model=False)
+
+    def synthesize(self, text: str, voice: str = DEFAULT_VOICE,
+                   lang_code: str = DEFAULT_LANG_CODE) -> Iterator[np.ndarray]:
+        """
+        Synthesize text, yielding one audio chunk per chunk Kokoro produces.
+
+        With a cache, a pipeline without a model first splits the text into
+        Kokoro's chunks and their phonemes, which is cheap. Only chunks whose
+        phonemes are missing from the cache go through the model, and the model
+        is not even loaded when every chunk is cached. The chunks are the same
+        as without a cache, so is the audio.
+
+        Args:
+            text: Text to speak
+            voice: Kokoro voice name
+            lang_code: Kokoro language code
+
+        Yields:
+            Float32 audio arrays at SAMPLE_RATE
+        """
+        with self._lock:
+            self.stats["jobs"] += 1
+        if self.cache is None:
+            # Pipelines are not thread-safe, jobs from different channels take turns
+            with self._lock:
+                pipeline = self._get_pipeline(lang_code, voice)
+                for _, _, audio in pipeline(text, voice=voice):
+                    if audio is None:
+                        continue
+                    yield _to_numpy(audio)
+            return
+
+        for phonemes in self._phonemize(text, voice, lang_code):
+            key = self.cache.key(phonemes, voice, lang_code, self.model_version)
+            audio = self.cache.get(key)
+            if audio is None:
+                audio = self._synthesize_phonemes(phonemes, voice, lang_code)
+                if audio is None:
+                    continue
+                self.cache.put(key, audio)
+            yield audio
+
+    def synthesize_parallel(self, text: str, voice: str = DEFAULT_VOICE,
+                            lang_code: str = DEFAULT_LANG_CODE, workers: Optional[int] = None,
+                            batch_size: int = 4) -> Iterator[np.ndarray]:
+        """
+        Synthesize batches of Kokoro's chunks across a process pool, in order.
+
+        The text is split into Kokoro's chunks here, as in `synthesize` with a
+        cache. Each worker process builds its own pipeline once and keeps it
+        warm for every batch of phonemes it receives. Cached chunks are served
+        locally and only misses are sent to the pool. Chunks are yielded in
+        script order as soon as the batch holding them is done.
+
+        Args:
+            text: Text to speak
+            voice: Kokoro voice name
+            lang_code: Kokoro language code
+            workers: Number of worker processes, defaults to the CPU count
+            batch_size: Chunks per job sent to a worker
+
+        Yields:
+            Float32 audio arrays at SAMPLE_RATE
+        """
+        with self._lock:
+            self.stats["jobs"] += 1
+        chunks = self._phonemize(text, voice, lang_code)
+        keys = [self.cache.key(phonemes, voice, lang_code, self.model_version) if self.cache else None
+                for phonemes in chunks]
+        cached = [self.cache.get(key) if self.cache else None for key in keys]
+        missing = [i for i, audio in enumerate(cached) if audio is None]
+        if not missing:
+            yield from cached
+            return
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(missing)))
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        # Spawned workers do not inherit an already imported torch from this process
+        context = multiprocessing.get_context("spawn")
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(pickle.dumps(self.pipeline_factory), lang_code, voice,
+                                           threads_per_worker)) as pool:
+            futures = {}
+            for batch in batches:
+                future = pool.submit(_synthesize_batch, [chunks[i] for i in batch], voice, lang_code)
+                for position, i in enumerate(batch):
+                    futures[i] = (future, position)
+
+            for i, audio in enumerate(cached):
+                if audio is None:
+                    future, position = futures[i]
+                    audio = future.result()[position]
+                    if audio is None:
+                        continue
+                    if self.cache:
+                        self.cache.put(keys[i], audio)
+                yield audio
+
+    def _phonemize(self, text: str, voice: str, lang_code: str) -> List[str]:
+        """Split text into Kokoro's chunks without running the model, returning their phonemes."""
+        with self._lock:
+            pipeline = self._get_pipeline(lang_code, model=False)
+            return [phonemes for _, phonemes, _ in pipeline(text, voice=voice) if phonemes]
+
+    def _synthesize_phonemes(self, phonemes: str, voice: str, lang_code: str) -> Optional[np.ndarray]:
+        """Synthesize the phonemes of one chunk into a single array."""
+        with self._lock:
+            pipeline = self._get_pipeline(lang_code, voice)
+            parts = [_to_numpy(audio) for _, _, audio in pipeline.generate_from_tokens(phonemes, voice=voice)
+                     if audio is not None]
+        if not parts:
+            return None
+        return np.concatenate(parts)
+
+
+_worker_service: Optional[TTSService] = None
+
+
+def _init_worker(pipeline_factory: bytes, lang_code: str, voice: str, threads: int):
+    """
+    Build the warm pipeline of a synthesis worker process.
+
+    The factory arrives pickled and is only loaded once the thread limits are
+    in the environment, as loading it may import torch. torch.set_num_threads
+    covers a torch that was imported anyway.
+    """
+    global _worker_service
+    # Keep workers from oversubscribing the CPU with intra-op threads
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    _worker_service = TTSService(pipeline_factory=pickle.loads(pipeline_factory))
+    _worker_service.warm_up(lang_code, voice)
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
+
+
+def _synthesize_batch(chunks: List[str], voice: str, lang_code: str) -> List[Optional[np.ndarray]]:
+    return [_worker_service._synthesize_phonemes(phonemes, voice, lang_code) for phonemes in chunks]
+
+
+class TTSClient:
+    """Client for a TTS daemon started with `serve`."""
+
+    def __init__(self, address: Tuple[str, int] = DAEMON_ADDRESS, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey or daemon_authkey()
+
+    def synthesize(self, text: str, voice: str = DEFAULT_VOICE,
+                   lang_code: str = DEFAULT_LANG_CODE) -> Iterator[np.ndarray]:
+        """Same contract as TTSService.synthesize, executed by the daemon."""
+        with Client(self.address, authkey=self.authkey) as conn:
+            conn.send({"text": text, "voice": voice, "lang_code": lang_code})
+            while True:
+                message = conn.recv()
+                if message is None:
+                    break
+                if isinstance(message, Exception):
+                    raise message
+                yield message
+
+
+def serve(address: Tuple[str, int] = DAEMON_ADDRESS, authkey: Optional[bytes] = None,
+          service: Optional[TTSService] = None):
+    """
+    Run a TTS daemon that keeps one warm service for every client.
+
+    Args:
+        address: Host and port to listen on
+        authkey: Shared secret clients must present, defaults to daemon_authkey()
+        service: Service to use, defaults to the process-wide one
+    """
+    authkey = authkey or daemon_authkey(create=True)
+    service = service or get_tts_service()
+    service.warm_up()
+    print(f"TTS daemon listening on {address[0]}:{address[1]}")
+
+    def handle(conn):
+        with conn:
+            try:
+                job = conn.recv()
+            except EOFError:
+                # Availability probe from get_synthesizer
+                return
+            try:
+                for chunk in service.synthesize(job["text"], job["voice"], job["lang_code"]):
+                    conn.send(chunk)
+                conn.send(None)
+            except Exception as e:
+                print(f"TTS job failed: {e}")
+                try:
+                    conn.send(e)
+                except Exception:
+                    pass
+
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            try:
+                conn = listener.accept()
+            except (OSError, EOFError, AuthenticationError) as e:
+                # A client with the wrong key or a dropped handshake must not stop the daemon
+                print(f"TTS client rejected: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+_default_service = None
+_default_service_lock = threading.Lock()
+
+
+def get_tts_service() -> TTSService:
+    """Return the process-wide TTS service."""
+    global _default_service
+    with _default_service_lock:
+        if _default_service is None:
+            _default_service = TTSService(cache=SegmentCache())
+        return _default_service
+
+
+def get_synthesizer(address: Tuple[str, int] = DAEMON_ADDRESS, authkey: Optional[bytes] = None):
+    """
+    Return the daemon client when a daemon is running and accepts our key,
+    else the in-process service.
+
+    Args:
+        address: Daemon address
+        authkey: Daemon shared secret, defaults to daemon_authkey()
+    """
+    authkey = authkey or daemon_authkey()
+    if authkey is None:
+        # No daemon has been started here, and a foreign one would reject us
+        return get_tts_service()
+    try:
+        Client(address, authkey=authkey).close()
+        return TTSClient(address, authkey)
+    except (OSError, EOFError, AuthenticationError):
+        return get_tts_service()
+
+
+def write_wav_stream(chunks: Iterable[np.ndarray], output_filename: str,
+                     sample_rate: int = SAMPLE_RATE, subtype: str = "PCM_16",
+                     on_chunk: Optional[Callable[[int, np.ndarray], None]] = None) -> int:
+    """
+    Write audio chunks to a WAV file as they are produced.
+
+    Only the chunk being written is held in memory, so peak memory does not
+    grow with the length of the voiceover.
+
+    Args:
+        chunks: Mono float audio chunks
+        output_filename: WAV file to write
+        sample_rate: Sample rate of the chunks
+        subtype: soundfile subtype, e.g. "PCM_16" or "FLOAT"
+        on_chunk: Called with the chunk index and data before each write
+
+    Returns:
+        Number of frames written
+    """
+    frames = 0
+    with sf.SoundFile(output_filename, mode="w", samplerate=sample_rate,
+                      channels=1, format="WAV", subtype=subtype) as f:
+        for i, chunk in enumerate(chunks):
+            if on_chunk:
+                on_chunk(i, chunk)
+            f.write(chunk)
+            frames += len(chunk)
+    return frames
+
+
+def trace_chunks(chunks: Iterable[np.ndarray], span, sample_rate: int = SAMPLE_RATE) -> Iterator[np.ndarray]:
+    """
+    Pass audio chunks through, recording the chunk loop on a tracing span.
+
+    Once the chunks run out the span gets the number of chunks, the audio
+    length, the realtime factor (span seconds per second of audio) and the
+    longest wait for a single chunk.
+
+    Args:
+        chunks: Audio chunks
+        span: Span of the synthesis job; a disabled span records nothing
+        sample_rate: Sample rate of the chunks
+
+    Yields:
+        The chunks, unchanged
+    """
+    if not span:
+        yield from chunks
+        return
+    count = 0
+    frames = 0
+    slowest = 0.0
+    last = time.perf_counter()
+    for chunk in chunks:
+        # Only the time spent producing the chunk, not the consumer's time
+        slowest = max(slowest, time.perf_counter() - last)
+        count += 1
+        frames += len(chunk)
+        yield chunk
+        last = time.perf_counter()
+    seconds = frames / sample_rate
+    span.set(chunks=count, audio_seconds=round(seconds, 3), slowest_chunk_seconds=round(slowest, 4),
+             realtime_factor=round(span.elapsed() / seconds, 4) if seconds else None)
+
+
+_WAV_DTYPES = {(1, 16): "<i2", (1, 32): "<i4", (3, 32): "<f4", (3, 64): "<f8"}
+
+
+def open_wav_memmap(path: str) -> np.memmap:
+    """
+    Memory-map the samples of a PCM or float WAV file without reading it.
+
+    Args:
+        path: WAV file written by write_wav_stream
+
+    Returns:
+        Read-only memmap of the samples; int16 for PCM_16, float32 for FLOAT
+    """
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        dtype = None
+        channels = 1
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size)
+                format_tag, channels = struct.unpack("<HH", fmt[:4])
+                bits = struct.unpack("<H", fmt[14:16])[0]
+                # WAVE_FORMAT_EXTENSIBLE stores the real format in the sub-format GUID
+                if format_tag == 0xFFFE:
+                    format_tag = struct.unpack("<H", fmt[24:26])[0]
+                dtype = _WAV_DTYPES.get((format_tag, bits))
+                if dtype is None:
+                    raise ValueError(f"Unsupported WAV sample format in {path}")
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+    itemsize = np.dtype(dtype).itemsize
+    frames = size // (itemsize * channels)
+    shape = (frames,) if channels == 1 else (frames, channels)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def _to_numpy(audio) -> np.ndarray:
+    """Convert a Kokoro audio tensor to a float32 NumPy array."""
+    if hasattr(audio, "detach"):
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm Kokoro TTS service")
+    parser.add_argument("--serve", action="store_true", help="run the local TTS daemon")
+    args = parser.parse_args()
+    if args.serve:
+        serve()
+    else:
+        parser.print_help()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Video Renderer
+
+Renders a 9:16 Shorts video from a bundle's voiceover and visuals. The
+background and overlay are composed once with NumPy; raw frames are then piped
+straight into an ffmpeg subprocess, which encodes them together with the WAV.
+No per-frame images are written.
+
+Usage:
+    python src/video_renderer.py output/youtube-tech-2025-04-18 [--fps 30]
+"""
+
+import argparse
+import glob
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+FFMPEG = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+WIDTH = 1080
+HEIGHT = 1920
+FPS = 30
+
+# Progress bar along the bottom edge, the only part of a frame that changes
+BAR_HEIGHT = 12
+BAR_MARGIN = 160
+BAR_COLOR = (255, 255, 255)
+
+# Gradient used when a bundle has no background image (top and bottom colors)
+CHANNEL_COLORS = {
+    "tech": ((10, 14, 32), (36, 64, 132)),
+    "stoic": ((26, 20, 14), (112, 88, 56)),
+}
+DEFAULT_COLORS = ((0, 0, 0), (64, 64, 64))
+
+
+def load_image(path: str, width: int = WIDTH, height: int = HEIGHT, fit: str = "cover") -> np.ndarray:
+    """
+    Decode and scale an image with ffmpeg.
+
+    Args:
+        path: Image file
+        width: Output width
+        height: Output height
+        fit: "cover" crops the image to fill the frame, "contain" fits it
+            inside and pads with transparency
+
+    Returns:
+        uint8 RGBA array of shape (height, width, 4)
+    """
+    if fit == "cover":
+        vf = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+    else:
+        vf = (f"format=rgba,scale={width}:{height}:force_original_aspect_ratio=decrease,"
+              f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black@0")
+    result = subprocess.run(
+        [FFMPEG, "-v", "error", "-i", path, "-vf", vf, "-frames:v", "1",
+         "-f", "rawvideo", "-pix_fmt", "rgba", "-"],
+        capture_output=True, check=True,
+    )
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(height, width, 4)
+
+
+def gradient_background(top, bottom, width: int = WIDTH, height: int = HEIGHT) -> np.ndarray:
+    """Return an RGBA vertical gradient from the `top` to the `bottom` RGB color."""
+    t = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+    column = (np.asarray(top, np.float32) * (1 - t) + np.asarray(bottom, np.float32) * t).round()
+    rgba = np.empty((height, width, 4), dtype=np.uint8)
+    rgba[..., :3] = column.astype(np.uint8)[:, None, :]
+    rgba[..., 3] = 255
+    return rgba
+
+
+def compose(background: np.ndarray, overlay: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Alpha-blend an overlay onto a background.
+
+    Args:
+        background: uint8 RGBA or RGB array
+        overlay: uint8 RGBA array of the same size, or None
+
+    Returns:
+        C-contiguous uint8 RGB array
+    """
+    rgb = background[..., :3]
+    if overlay is None:
+        return np.ascontiguousarray(rgb)
+    alpha = overlay[..., 3:4].astype(np.uint16)
+    blended = (overlay[..., :3] * alpha + rgb * (255 - alpha) + 127) // 255
+    return np.ascontiguousarray(blended, dtype=np.uint8)
+
+
+def rgb_to_yuv420p(rgb: np.ndarray) -> np.ndarray:
+    """
+    Convert an RGB frame to a planar YUV 4:2:0 buffer (BT.709, limited range).
+
+    Feeding ffmpeg YUV directly skips its per-frame RGB conversion, which costs
+    more than the encoding itself for a mostly static picture.
+
+    Args:
+        rgb: uint8 array of shape (height, width, 3) with even height and width
+
+    Returns:
+        Flat uint8 array holding the Y, U and V planes back to back
+    """
+    height, width = rgb.shape[:2]
+    x = rgb.astype(np.float32)
+    luma = x @ np.array([0.2126, 0.7152, 0.0722], np.float32)
+    y = 16 + 219 / 255 * luma
+    # Chroma is averaged over 2x2 blocks
+    blue = (x[..., 2] - luma).reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3))
+    red = (x[..., 0] - luma).reshape(height // 2, 2, width // 2, 2).mean(axis=(1, 3))
+    u = 128 + 224 / 255 * blue / 1.8556
+    v = 128 + 224 / 255 * red / 1.5748
+    planes = [plane.round().clip(0, 255).astype(np.uint8).ravel() for plane in (y, u, v)]
+    return np.concatenate(planes)
+
+
+def yuv420p_planes(buffer: np.ndarray, width: int, height: int):
+    """Return (Y, U, V) 2-D views into a buffer from rgb_to_yuv420p."""
+    luma_size = width * height
+    chroma_size = luma_size // 4
+    return (buffer[:luma_size].reshape(height, width),
+            buffer[luma_size:luma_size + chroma_size].reshape(height // 2, width // 2),
+            buffer[luma_size + chroma_size:].reshape(height // 2, width // 2))
+
+
+def render_video(audio_path: str, output_path: str, background: np.ndarray,
+                 overlay: Optional[np.ndarray] = None, fps: int = FPS, preset: str = "veryfast",
+                 progress_bar: bool = True) -> float:
+    """
+    Encode a video of the composed visuals with the voiceover as its audio track.
+
+    The frame is composed and converted to YUV once. Consecutive frames share
+    one buffer that is only touched where the progress bar grows, so most
+    frames are written to ffmpeg without any per-frame work.
+
+    Args:
+        audio_path: Voiceover WAV
+        output_path: MP4 to write; replaced atomically once encoding succeeds
+        background: RGBA background of the output size
+        overlay: RGBA overlay of the output size, or None
+        fps: Frame rate
+        preset: x264 preset
+        progress_bar: Draw a bar that fills up with playback time
+
+    Returns:
+        Realtime factor (video seconds rendered per wall clock second)
+    """
+    info = sf.info(audio_path)
+    duration = info.frames / info.samplerate
+    frame_count = max(1, int(np.ceil(duration * fps)))
+    height, width = background.shape[:2]
+
+    frame = rgb_to_yuv420p(compose(background, overlay))
+    bar_color = rgb_to_yuv420p(np.full((2, 2, 3), BAR_COLOR, dtype=np.uint8))[[0, 4, 5]]
+    bar_top = height - BAR_MARGIN
+    bar_planes = [
+        plane[top:top + rows]
+        for plane, top, rows in zip(yuv420p_planes(frame, width, height),
+                                    (bar_top, bar_top // 2, bar_top // 2),
+                                    (BAR_HEIGHT, BAR_HEIGHT // 2, BAR_HEIGHT // 2))
+    ]
+    bar_width = 0
+
+    tmp_path = f"{output_path}.tmp.mp4"
+    cmd = [
+        FFMPEG, "-y", "-v", "error",
+        "-f", "rawvideo", "-pix_fmt", "yuv420p", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+        "-i", audio_path,
+        "-map", "0:v", "-map", "1:a",
+        "-c:v", "libx264", "-preset", preset, "-tune", "stillimage", "-crf", "23",
+        "-colorspace", "bt709", "-color_primaries", "bt709", "-color_trc", "bt709", "-color_range", "tv",
+        "-c:a", "aac", "-b:a", "192k",
+        "-shortest", "-movflags", "+faststart",
+        tmp_path,
+    ]
+    start = time.perf_counter()
+    # ffmpeg's messages go to a file: a pipe nobody reads while frames are written
+    # fills up once ffmpeg logs enough, and both processes then wait on each other
+    with tempfile.TemporaryFile() as stderr_file:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file)
+        succeeded = False
+        try:
+            try:
+                for index in range(frame_count):
+                    if progress_bar:
+                        # Even widths keep the bar aligned with the chroma planes
+                        new_width = (index + 1) * width // frame_count // 2 * 2
+                        if new_width > bar_width:
+                            for scale, plane, value in zip((1, 2, 2), bar_planes, bar_color):
+                                plane[:, bar_width // scale:new_width // scale] = value
+                            bar_width = new_width
+                    process.stdin.write(frame.data)
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            if process.wait() != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", "replace")
+                raise RuntimeError(f"ffmpeg failed: {stderr.strip()}")
+            os.replace(tmp_path, output_path)
+            succeeded = True
+        finally:
+            # Also on Ctrl+C or any other error: no ffmpeg left running, no partial file left behind
+            if not succeeded:
+                process.kill()
+                process.wait()
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    elapsed = time.perf_counter() - start
+    return duration / elapsed if elapsed > 0 else float("inf")
+
+
+def render_bundle(bundle_dir: str, channel: Optional[str] = None, fps: int = FPS,
+                  width: int = WIDTH, height: int = HEIGHT) -> str:
+    """
+    Render the video of an output/youtube-{channel}-{date}/ bundle.
+
+    Uses visuals/bg*.{jpg,png} as background (or a channel colored gradient)
+    and visuals/overlay.png on top, if they exist. The audio is the mastered
+    voiceover if there is one, the raw voiceover otherwise.
+
+    Args:
+        bundle_dir: Bundle directory
+        channel: Channel name, taken from the directory name by default
+        fps: Frame rate
+        width: Video width
+        height: Video height
+
+    Returns:
+        Path to the written video-{channel}.mp4
+    """
+    if channel is None:
+        match = re.match(r"youtube-([a-z]+)-", os.path.basename(os.path.normpath(bundle_dir)))
+        if not match:
+            raise ValueError(f"Cannot tell the channel of {bundle_dir}")
+        channel = match.group(1)
+
+    # Prefer the mastered voiceover of the audio post-processing stage
+    audio_path = os.path.join(bundle_dir, f"voiceover-{channel}-master.wav")
+    if not os.path.exists(audio_path):
+        audio_path = os.path.join(bundle_dir, f"voiceover-{channel}.wav")
+    output_path = os.path.join(bundle_dir, f"video-{channel}.mp4")
+    visuals_dir = os.path.join(bundle_dir, "visuals")
+
+    backgrounds = sorted(glob.glob(os.path.join(visuals_dir, "bg*.jpg")) +
+                         glob.glob(os.path.join(visuals_dir, "bg*.png")))
+    if backgrounds:
+        background = load_image(backgrounds[0], width, height, fit="cover")
+    else:
+        background = gradient_background(*CHANNEL_COLORS.get(channel, DEFAULT_COLORS), width, height)
+
+    overlay_path = os.path.join(visuals_dir, "overlay.png")
+    overlay = load_image(overlay_path, width, height, fit="contain") if os.path.exists(overlay_path) else None
+
+    print(f"Rendering {output_path}...")
+    realtime_factor = render_video(audio_path, output_path, background, overlay, fps=fps)
+    print(f"Video written to: {output_path} ({realtime_factor:.1f}x realtime)")
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Shorts video of an output bundle")
+    parser.add_argument("bundle_dir", help="output/youtube-{channel}-{date} directory")
+    parser.add_argument("--channel", help="channel name, taken from the directory name by default")
+    parser.add_argument("--fps", type=int, default=FPS)
+    args = parser.parse_args(argv)
+    render_bundle(args.bundle_dir, args.channel, fps=args.fps)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
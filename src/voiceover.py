@@ -0,0 +1,80 @@
+"""
+Voiceover
+
+Synthesizes a channel's script into its voiceover WAV file. Shared by the
+audio_generation module of every channel, which only supply their paths and
+voice.
+"""
+
+import os
+
+import numpy as np
+import soundfile as sf
+
+import tracing
+from tts_service import SAMPLE_RATE, get_synthesizer, get_tts_service, trace_chunks, write_wav_stream
+
+
+def generate_voiceover(channel, script_path, output_filename, voice, lang_code, stream=True,
+                       return_audio=True, autoplay=False, workers=1):
+    """
+    Synthesize a script file into a WAV file.
+
+    Args:
+        channel (str): Channel name, recorded on the tracing span
+        script_path (str): UTF-8 text file with the script
+        output_filename (str): WAV file to write
+        voice (str): Kokoro voice
+        lang_code (str): Kokoro language code
+        stream (bool): Write each chunk to the WAV file as it is produced instead
+            of concatenating all chunks in memory first
+        return_audio (bool): Return the samples; set to False when only the file
+            is needed, which spares reading it back in stream mode
+        autoplay (bool): Play the result in IPython
+        workers (int): Synthesize sentence batches in this many processes
+
+    Returns:
+        Float32 samples in [-1, 1] at SAMPLE_RATE, or None if return_audio is
+        False. In stream mode these are the samples read back from the 16-bit
+        WAV file, so they are quantized to 16 bits.
+    """
+    with open(script_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    os.makedirs(os.path.dirname(output_filename), exist_ok=True)
+
+    with tracing.span("tts.generate_audio", channel=channel, workers=workers, stream=stream) as span:
+        if workers > 1:
+            # Every worker process keeps its own warm pipeline
+            generator = get_tts_service().synthesize_parallel(text, voice=voice, lang_code=lang_code,
+                                                              workers=workers)
+        else:
+            # Reuses the warm pipeline of the TTS daemon or of this process
+            generator = get_synthesizer().synthesize(text, voice=voice, lang_code=lang_code)
+        # Records chunk count, audio length and realtime factor when tracing is on
+        generator = trace_chunks(generator, span)
+
+        if stream:
+            # Write every chunk straight to disk, only one chunk is held in memory
+            write_wav_stream(generator, output_filename)
+            combined_audio = None
+            if return_audio or autoplay:
+                combined_audio, _ = sf.read(output_filename, dtype="float32")
+        else:
+            # Collect all audio chunks
+            all_audio_chunks = list(generator)
+
+            # Combine all audio chunks into a single array
+            combined_audio = np.concatenate(all_audio_chunks).astype(np.float32, copy=False)
+
+            # Save the combined audio to a single file
+            sf.write(output_filename, combined_audio, SAMPLE_RATE)
+
+    print(f"Audio saved to {output_filename}")
+
+    # Display the combined audio
+    if autoplay:
+        from IPython.display import display, Audio
+        display(Audio(data=combined_audio, rate=SAMPLE_RATE, autoplay=True))
+
+    return combined_audio if return_audio else None
@@ -1,45 +1,186 @@
+import argparse
+import hashlib
+import json
 import os
+import random
+import sys
+import threading
+import time
 import google_auth_oauthlib.flow
+import httplib2
+import google_auth_httplib2
 import googleapiclient.discovery
 import googleapiclient.errors
+import googleapiclient.http
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
-from google import genai
+from gemini_client import get_client
+import tracing
+
+CLIENT_SECRETS_FILE = "client_secret.json"
+# Saved OAuth token, refreshed automatically so uploads can run unattended
+TOKEN_FILE = "youtube_token.json"
+SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+
+# Chunks must be a multiple of 256 KiB
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_RETRIES = 10
+RETRIABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, IOError)
+
+# Where in-progress upload sessions are remembered so a crashed run can resume
+UPLOAD_STATE_DIR = "data/upload_state"
+# YouTube upload sessions expire after about a week
+UPLOAD_SESSION_MAX_AGE = 6 * 24 * 3600
 
 def authenticate_youtube():
-    """Authenticate with YouTube API using OAuth flow"""
-    print("Starting YouTube API authentication...")
-    client_secrets_file = "client_secret.json"
-    scopes = ["https://www.googleapis.com/auth/youtube.upload"]
+    """Authenticate with YouTube API, reusing saved credentials when possible"""
+    return get_youtube()
+
+def get_credentials(interactive=True):
+    """
+    Load the saved OAuth credentials, refreshing them if needed
+    
+    The browser based OAuth flow only runs when there are no usable saved
+    credentials. The resulting token is stored in TOKEN_FILE for later runs.
+    
+    Args:
+        interactive (bool): Allow falling back to the browser flow
+        
+    Returns:
+        google.oauth2.credentials.Credentials: Valid user credentials
+    """
+    credentials = None
+    if os.path.exists(TOKEN_FILE):
+        try:
+            credentials = Credentials.from_authorized_user_file(TOKEN_FILE, SCOPES)
+        except ValueError as e:
+            tracing.error("youtube.auth_errors", f"Ignoring unreadable token file: {e}")
+    
+    if credentials and not credentials.valid and credentials.refresh_token:
+        try:
+            credentials.refresh(Request())
+            _save_credentials(credentials)
+        except RefreshError as e:
+            tracing.error("youtube.auth_errors", f"Could not refresh saved credentials: {e}")
+            credentials = None
     
+    if credentials and credentials.valid:
+        return credentials
+    
+    if not interactive:
+        raise RuntimeError(f"No valid YouTube credentials in {TOKEN_FILE}; "
+                           f"run youtube_uploader.py --auth once to sign in")
+    
+    print("Starting YouTube API authentication...")
     # Allow OAuth flow in development environment
     os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
     
     # Run the OAuth flow
     print("Starting OAuth flow...")
     flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-        client_secrets_file, scopes)
+        CLIENT_SECRETS_FILE, SCOPES)
     credentials = flow.run_local_server(port=8090)
     print("OAuth flow completed successfully!")
+    _save_credentials(credentials)
+    return credentials
+
+def _save_credentials(credentials):
+    tmp_path = TOKEN_FILE + ".tmp"
+    # The token grants upload access, so only the owner may read it. A stale
+    # temp file would keep its old permissions, so it is removed first.
+    try:
+        os.remove(tmp_path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(credentials.to_json())
+    os.replace(tmp_path, TOKEN_FILE)
+
+def build_youtube(credentials, **kwargs):
+    """
+    Create a YouTube service object that can be shared between threads
+    
+    The API description comes from the discovery document bundled with
+    googleapiclient, so no network round trip is needed. Each thread gets its
+    own authorized HTTP connection since httplib2 is not thread-safe.
+    
+    Args:
+        credentials: OAuth credentials
+        **kwargs: Passed to googleapiclient.discovery.build
+        
+    Returns:
+        YouTube API service object
+    """
+    local = threading.local()
+    
+    def build_request(http, *args, **request_kwargs):
+        if not hasattr(local, "http"):
+            local.http = google_auth_httplib2.AuthorizedHttp(credentials, http=googleapiclient.http.build_http())
+        return googleapiclient.http.HttpRequest(local.http, *args, **request_kwargs)
     
-    # Create YouTube service
     youtube = googleapiclient.discovery.build(
-        "youtube", "v3", credentials=credentials)
+        "youtube", "v3", credentials=credentials, static_discovery=True,
+        requestBuilder=build_request, **kwargs)
     
     return youtube
 
-def generate_title():
-    topic = f''
-    """Generate title for a video based on the title"""
-    response = genai.Client.generate_content(
+_youtube = None
+_youtube_lock = threading.Lock()
+
+def get_youtube(interactive=True):
+    """
+    Return the process-wide YouTube service object, creating it on first use
+    
+    Args:
+        interactive (bool): Allow the browser OAuth flow if there are no saved credentials
+    """
+    global _youtube
+    with _youtube_lock:
+        if _youtube is None:
+            _youtube = build_youtube(get_credentials(interactive))
+        return _youtube
+
+def generate_title(topic):
+    """Generate a title for a video about the given topic"""
+    response = get_client().models.generate_content(
         model="gemini-2.0-flash",
-        prompt=f"Generate a title for a video about {topic}"
+        contents=f"Generate a title for a YouTube Shorts video about {topic}. "
+                 f"Reply with the title only, under 100 characters."
     )
-    title = response.text
+    # YouTube rejects titles longer than 100 characters
+    title = response.text.strip().strip('"')[:100]
     return title
 
 
-def upload_video(youtube, file_path, title, description, tags=None, category_id="22"):
-    """Upload a video to YouTube as unlisted"""
+def upload_video(youtube, file_path, title, description, tags=None, category_id="22",
+                 chunk_size=UPLOAD_CHUNK_SIZE, max_retries=UPLOAD_MAX_RETRIES, state_dir=UPLOAD_STATE_DIR):
+    """
+    Upload a video to YouTube as unlisted
+    
+    The file is sent in chunks over a resumable session. Transient failures are
+    retried with exponential backoff, and the session URI and confirmed offset
+    are saved after every chunk so a restarted process continues where the last
+    one stopped.
+    
+    Args:
+        youtube: YouTube API service object
+        file_path (str): Video file to upload
+        title (str): Video title
+        description (str): Video description
+        tags (list): Video tags
+        category_id (str): YouTube category id
+        chunk_size (int): Bytes per chunk, a multiple of 256 KiB
+        max_retries (int): Consecutive failed attempts before giving up
+        state_dir (str): Directory holding the upload session state
+        
+    Returns:
+        dict: The inserted video resource
+    """
     if tags is None:
         tags = ["api", "upload", "automated"]
         
@@ -57,20 +198,77 @@ def upload_video(youtube, file_path, title, description, tags=None, category_id=
         }
     }
     
-    # Prepare the media file
-    print(f"Preparing to upload: {file_path}")
-    media = MediaFileUpload(file_path, resumable=True)
+    with tracing.span("youtube.upload", file=file_path) as span:
+        # Prepare the media file
+        print(f"Preparing to upload: {file_path}")
+        media = MediaFileUpload(file_path, chunksize=chunk_size, resumable=True)
+        total_size = media.size()
+        span.set(bytes=total_size)
     
-    # Create the upload request
-    request = youtube.videos().insert(
-        part="snippet,status",
-        body=request_body,
-        media_body=media
-    )
+        # Create the upload request
+        request = youtube.videos().insert(
+            part="snippet,status",
+            body=request_body,
+            media_body=media
+        )
     
-    # Execute the upload
-    print("Starting upload... This may take a while depending on file size")
-    response = request.execute()
+        state_path = _upload_state_path(file_path, state_dir)
+        state = _load_upload_state(state_path)
+        if state:
+            request.resumable_uri = state["resumable_uri"]
+            request.resumable_progress = state["offset"]
+            print(f"Resuming upload at {state['offset'] / total_size:.0%}")
+            span.set(resumed_at=state["offset"])
+    
+        # Execute the upload
+        print("Starting upload... This may take a while depending on file size")
+        response = None
+        retry = 0
+        start_offset = request.resumable_progress
+        start_time = time.time()
+        while response is None:
+            try:
+                status, response = request.next_chunk()
+            except HttpError as e:
+                if e.resp.status in (404, 410) and state:
+                    # The saved session expired, start a new one from the beginning
+                    print("Upload session expired, starting over")
+                    _clear_upload_state(state_path)
+                    state = None
+                    request.resumable_uri = None
+                    request.resumable_progress = 0
+                    start_offset = 0
+                    continue
+                if e.resp.status not in RETRIABLE_STATUS_CODES:
+                    raise
+                error = f"HTTP {e.resp.status}"
+            except RETRIABLE_EXCEPTIONS as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                retry = 0
+                if status:
+                    _save_upload_state(state_path, file_path, request.resumable_uri, status.resumable_progress)
+                    elapsed = time.time() - start_time
+                    rate = (status.resumable_progress - start_offset) / elapsed if elapsed > 0 else 0
+                    print(f"Uploaded {status.progress():.0%} "
+                          f"({status.resumable_progress / 1e6:.1f} of {total_size / 1e6:.1f} MB, "
+                          f"{rate / 1e6:.2f} MB/s)")
+                continue
+        
+            retry += 1
+            if retry > max_retries:
+                print(f"Upload failed after {max_retries} retries, it can be resumed later")
+                raise RuntimeError(f"Upload of {file_path} failed: {error}")
+            delay = random.uniform(0, min(64, 2 ** retry))
+            tracing.error("youtube.upload_retries", f"Upload error ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+    
+        _clear_upload_state(state_path)
+        elapsed = time.time() - start_time
+        if elapsed > 0:
+            print(f"Sent {(total_size - start_offset) / 1e6:.1f} MB in {elapsed:.1f}s "
+                  f"({(total_size - start_offset) / elapsed / 1e6:.2f} MB/s)")
+        span.set(sent_bytes=total_size - start_offset, video_id=response.get("id"))
     
     # Return upload details
     video_id = response.get("id")
@@ -83,7 +281,73 @@ def upload_video(youtube, file_path, title, description, tags=None, category_id=
     
     return response
 
-def main():
+def _upload_state_path(file_path, state_dir):
+    """Return the state file of an upload, keyed by the video's path, size and mtime."""
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}\0{stat.st_size}\0{stat.st_mtime_ns}"
+    return os.path.join(state_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+def _load_upload_state(state_path):
+    """Return the saved session of an upload, or None if there is no usable one."""
+    try:
+        with open(state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - state["created_at"] > UPLOAD_SESSION_MAX_AGE:
+        _clear_upload_state(state_path)
+        return None
+    return state
+
+def _save_upload_state(state_path, file_path, resumable_uri, offset):
+    state = _load_upload_state(state_path) or {"created_at": time.time()}
+    if state.get("resumable_uri") != resumable_uri:
+        state["created_at"] = time.time()
+    state.update({"file_path": file_path, "resumable_uri": resumable_uri, "offset": offset})
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+def _clear_upload_state(state_path):
+    try:
+        os.remove(state_path)
+    except OSError:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upload videos to YouTube")
+    parser.add_argument("--auth", action="store_true",
+                        help="sign in and save the OAuth token for unattended runs")
+    parser.add_argument("--batch", action="store_true",
+                        help="upload every finished output/youtube-*-{date}/ bundle without prompting")
+    parser.add_argument("--date", action="append", dest="dates",
+                        help="only upload bundles of this YYYY-MM-DD date (repeatable)")
+    parser.add_argument("--max-concurrency", type=int, default=2)
+    parser.add_argument("--daily-quota", type=int, default=10000,
+                        help="API units the batch may spend per day")
+    args = parser.parse_args(argv)
+    
+    if args.auth:
+        get_credentials()
+        print(f"Credentials saved to {TOKEN_FILE}")
+        return 0
+    
+    if args.batch:
+        from batch_uploader import UploadManifest, upload_batch
+        # Never wait for a browser sign-in in unattended runs
+        get_youtube(interactive=False)
+        results = upload_batch(
+            get_youtube,
+            dates=args.dates,
+            max_concurrency=args.max_concurrency,
+            manifest=UploadManifest(daily_quota=args.daily_quota),
+        )
+        for bundle_dir, status in sorted(results.items()):
+            print(f"{bundle_dir}: {status}")
+        return 1 if "failed" in results.values() else 0
+    
     # Authenticate
     youtube = authenticate_youtube()
     
@@ -95,7 +359,7 @@ def main():
     # Validate the file exists
     if not os.path.exists(video_path):
         print(f"Error: File not found at {video_path}")
-        return
+        return 1
     
     # Upload the video
     response = upload_video(
@@ -106,6 +370,7 @@ def main():
     )
     
     print("Upload complete!")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
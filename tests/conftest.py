@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts import their siblings by name, as they do when run from the project root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in ("src", "src/tech", "src/stoic"):
+    sys.path.insert(0, os.path.join(ROOT, path))
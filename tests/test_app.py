@@ -0,0 +1,109 @@
+import argparse
+import json
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+ARGS = argparse.Namespace(channels=["tech", "stoic"], hn_backend="api", hn_limit=3,
+                          stoic_topic=None, tts_workers=1)
+
+
+def test_audio_generation_modules_of_the_channels_are_kept_apart():
+    tech = app.load_channel_module("tech", "audio_generation")
+    stoic = app.load_channel_module("stoic", "audio_generation")
+
+    assert tech is not stoic
+    assert tech.__name__ == "tech_audio_generation"
+    assert sys.modules["stoic_audio_generation"] is stoic
+    # Loaded once, later stages get the same module
+    assert app.load_channel_module("tech", "audio_generation") is tech
+
+
+def test_other_modules_are_imported_by_name():
+    assert app.load_channel_module("tech", "story_store") is sys.modules["story_store"]
+
+
+def test_build_pipeline_wires_one_branch_per_channel():
+    pipeline = app.build_pipeline(ARGS)
+
+    assert list(pipeline.stages) == [f"{channel}/{stage}" for channel in ARGS.channels for stage in app.STAGES]
+    for channel in ARGS.channels:
+        for previous, stage in zip(app.STAGES, app.STAGES[1:]):
+            current = pipeline.stages[f"{channel}/{stage}"]
+            assert current.deps == [f"{channel}/{previous}"]
+            # Each stage reads what the one before it wrote
+            assert pipeline.stages[f"{channel}/{previous}"].outputs[-1] in current.inputs
+    assert pipeline.stages["tech/scrape"].always_run
+    assert pipeline.stages["tech/scrape"].params == {"hn_backend": "api", "hn_limit": 3}
+    assert app.PASSAGES_DB not in pipeline.stages["stoic/script"].inputs
+
+
+def test_build_pipeline_with_a_topic_reads_the_passages():
+    args = argparse.Namespace(**dict(vars(ARGS), channels=["stoic"], stoic_topic="death"))
+    pipeline = app.build_pipeline(args)
+
+    assert list(pipeline.stages) == [f"stoic/{stage}" for stage in app.STAGES]
+    assert app.PASSAGES_DB in pipeline.stages["stoic/script"].inputs
+    assert pipeline.stages["stoic/scrape"].params == {"topic": "death"}
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    modules = {}
+    monkeypatch.setattr(app, "load_channel_module", lambda channel, module: modules[module])
+    return modules
+
+
+def test_run_stage_passes_the_scraper_options(modules):
+    calls = []
+    modules["hacker_news_scraper"] = SimpleNamespace(main=lambda argv: calls.append(argv) or [])
+
+    # An empty scrape is a failure even if an earlier run left stories behind
+    assert app.run_stage("tech", "scrape", ARGS) is False
+    assert calls == [["--backend", "api", "--limit", "3"]]
+
+
+def test_stoic_scrape_succeeds_with_quotes_of_an_earlier_run(modules, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    modules["stoic_news_scraper"] = SimpleNamespace(scrape_quotes=lambda: None)
+
+    assert app.run_stage("stoic", "scrape", ARGS) is False
+    (tmp_path / "data" / "quotes").mkdir(parents=True)
+    (tmp_path / app.STOIC_QUOTE_FILES[1]).write_text(json.dumps([{"text": "quote"}]))
+    assert app.run_stage("stoic", "scrape", ARGS) is True
+
+
+def test_run_stage_script_and_audio(modules):
+    audio = []
+    modules["stoic_script"] = SimpleNamespace(main=lambda argv: None)
+    modules["audio_generation"] = SimpleNamespace(generate_audio=lambda text, **kwargs: audio.append(kwargs))
+
+    assert app.run_stage("stoic", "script", ARGS) is False
+    assert app.run_stage("tech", "audio", ARGS) is True
+    assert audio == [{"return_audio": False, "workers": 1}]
+    with pytest.raises(ValueError):
+        app.run_stage("tech", "upload", ARGS)
+
+
+def test_help_imports_no_third_party_modules():
+    # The usage goes to stdout, the modules --help imported to stderr
+    code = (
+        "import runpy, sys\n"
+        "before = set(sys.modules)\n"
+        "sys.argv = [%r, '--help']\n"
+        "try:\n"
+        "    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "imported = set(sys.modules) - before\n"
+        "print(sorted(name for name in imported if name.split('.')[0] not in sys.stdlib_module_names),\n"
+        "      file=sys.stderr)\n"
+    ) % app.__file__
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert "usage:" in result.stdout
+    assert result.stderr.strip() == "[]"
@@ -0,0 +1,32 @@
+import glob
+import os
+import re
+from collections import Counter
+
+import pytest
+
+from article_extractor import HAS_LXML, HAS_SELECTOLAX, extract_article
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          "benchmarks", "fixtures", "articles")
+PAGES = sorted(os.path.basename(path)[:-len(".html")] for path in glob.glob(os.path.join(CORPUS_DIR, "*.html")))
+PARSERS = ["html.parser"] + (["lxml"] if HAS_LXML else []) + (["selectolax"] if HAS_SELECTOLAX else [])
+
+
+def words(text):
+    return Counter(re.findall(r"\w+", (text or "").lower()))
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("page", PAGES)
+def test_density_finds_the_main_text(page, parser):
+    with open(os.path.join(CORPUS_DIR, f"{page}.html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(CORPUS_DIR, f"{page}.txt"), encoding="utf-8") as f:
+        expected = words(f.read())
+
+    got = words(extract_article(html, parser=parser, max_chars=100000)["content"])
+
+    overlap = sum((got & expected).values())
+    assert overlap / sum(expected.values()) > 0.95
+    assert overlap / sum(got.values()) > 0.9
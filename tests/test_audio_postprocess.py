@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio_postprocess import PEAK_CEILING_DB, TARGET_LUFS, LoudnessMeter, Resampler, postprocess
+
+SAMPLE_RATE = 24000
+
+
+def tone(seconds, sample_rate=SAMPLE_RATE):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def silence(seconds, sample_rate=SAMPLE_RATE):
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+
+@pytest.mark.parametrize("signal, max_seconds", [
+    (tone(3), 3.0),
+    (np.concatenate((silence(1), tone(3), silence(2))), 3.5),
+    (np.concatenate((tone(1), silence(1.5), tone(1))), 2.5),
+], ids=["tone", "padded", "gap"])
+def test_postprocess(tmp_path, signal, max_seconds):
+    src, dst = tmp_path / "in.wav", tmp_path / "out.wav"
+    sf.write(src, signal, SAMPLE_RATE)
+
+    stats = postprocess(str(src), str(dst), sample_rate=48000)
+
+    audio, rate = sf.read(dst, dtype="float32")
+    assert rate == 48000
+    assert len(audio) == pytest.approx(stats["seconds"] * 48000)
+    # Only the tone and the kept edges of silence survive trimming
+    assert 2.0 <= stats["seconds"] <= max_seconds
+    assert np.isfinite(stats["lufs"])
+    assert np.max(np.abs(audio)) <= 10 ** (PEAK_CEILING_DB / 20) + 1e-3
+
+
+def test_postprocess_silence_only(tmp_path):
+    src, dst = tmp_path / "in.wav", tmp_path / "out.wav"
+    sf.write(src, silence(2), SAMPLE_RATE)
+
+    stats = postprocess(str(src), str(dst), sample_rate=48000)
+
+    assert stats["lufs"] == float("-inf")
+    assert stats["gain_db"] == 0.0
+    assert len(sf.read(dst)[0]) == 0
+
+
+def test_empty_chunks():
+    resampler = Resampler(SAMPLE_RATE, 48000)
+    assert resampler.process(np.zeros(0, dtype=np.float32)).dtype == np.float32
+    assert len(resampler.process(np.zeros(0, dtype=np.float32))) == 0
+    assert len(resampler.flush()) == 0
+
+    meter = LoudnessMeter(SAMPLE_RATE)
+    meter.add(np.zeros(0, dtype=np.float32))
+    assert meter.peak == 0.0
+    assert meter.integrated() == float("-inf")
+
+
+def sine(frequency, seconds, sample_rate, amplitude=1.0):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+@pytest.mark.parametrize("orig_rate", [24000, 44100, 22050])
+def test_resampled_sine_is_not_delayed(orig_rate):
+    resampler = Resampler(orig_rate, 48000)
+    signal = sine(1000, 1, orig_rate)
+    blocks = [resampler.process(signal[i:i + 4096]) for i in range(0, len(signal), 4096)]
+    out = np.concatenate(blocks + [resampler.flush()])
+
+    assert len(out) == 48000
+    # Away from the edges, where the filter sees the start and end of the stream
+    expected = sine(1000, 1, 48000)
+    np.testing.assert_allclose(out[2000:-2000], expected[2000:-2000], atol=1e-3)
+
+
+def test_meter_reads_a_full_scale_sine_at_minus_3_lufs():
+    # BS.1770: a 0 dBFS 997 Hz sine in one channel reads -3.01 LKFS
+    meter = LoudnessMeter(48000)
+    meter.add(sine(997, 5, 48000).astype(np.float32))
+    assert meter.integrated() == pytest.approx(-3.01, abs=0.1)
+
+
+@pytest.mark.parametrize("orig_rate", [24000, 44100])
+def test_mastered_sine_meets_the_target_loudness(tmp_path, orig_rate):
+    src, dst = tmp_path / "in.wav", tmp_path / "out.wav"
+    sf.write(src, sine(997, 5, orig_rate, amplitude=0.1).astype(np.float32), orig_rate, subtype="FLOAT")
+
+    postprocess(str(src), str(dst), sample_rate=48000)
+
+    audio, rate = sf.read(dst, dtype="float32")
+    meter = LoudnessMeter(rate)
+    meter.add(audio)
+    assert meter.integrated() == pytest.approx(TARGET_LUFS, abs=0.1)
@@ -0,0 +1,89 @@
+import json
+import threading
+
+import pytest
+
+import batch_uploader
+import tracing
+from batch_uploader import UPLOAD_QUOTA_COST, UploadManifest, upload_batch
+
+
+def make_bundles(output_dir, dates, channel="tech"):
+    for date in dates:
+        bundle = output_dir / f"youtube-{channel}-{date}"
+        bundle.mkdir(parents=True)
+        (bundle / f"video-{channel}.mp4").write_bytes(b"video")
+        (bundle / f"script-{channel}.txt").write_text(f"News of {date}")
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def upload_video(youtube, file_path, title, description, tags=None):
+        with tracing.span("youtube.upload", file=file_path), lock:
+            calls.append(file_path)
+            if "fail" in title:
+                raise RuntimeError("connection reset")
+            return {"id": f"video{len(calls)}"}
+
+    monkeypatch.setattr(batch_uploader, "upload_video", upload_video)
+    return calls
+
+
+def run(tmp_path, manifest, title_func=lambda topic: "title"):
+    return upload_batch(lambda: object(), str(tmp_path / "output"), manifest=manifest,
+                        title_func=title_func, max_concurrency=2)
+
+
+def test_stops_at_the_daily_quota(tmp_path, uploads):
+    make_bundles(tmp_path / "output", ["2026-01-01", "2026-01-02", "2026-01-03"])
+    manifest = UploadManifest(str(tmp_path / "manifest.json"), daily_quota=2 * UPLOAD_QUOTA_COST)
+
+    results = run(tmp_path, manifest)
+
+    assert sorted(results.values()) == ["over quota", "uploaded", "uploaded"]
+    assert len(uploads) == 2
+    assert not manifest.reserve_quota()
+
+
+def test_uploaded_bundles_are_skipped(tmp_path, uploads):
+    make_bundles(tmp_path / "output", ["2026-01-01"])
+    path = str(tmp_path / "manifest.json")
+    run(tmp_path, UploadManifest(path))
+
+    assert run(tmp_path, UploadManifest(path)) == {}
+    assert len(uploads) == 1
+
+
+def test_failed_upload_returns_its_quota(tmp_path, uploads):
+    make_bundles(tmp_path / "output", ["2026-01-01", "2026-01-02"])
+    manifest = UploadManifest(str(tmp_path / "manifest.json"), daily_quota=2 * UPLOAD_QUOTA_COST)
+
+    results = run(tmp_path, manifest, title_func=lambda topic: "fail" if "01-01" in topic else "ok")
+
+    assert sorted(results.values()) == ["failed", "uploaded"]
+    with open(tmp_path / "manifest.json", encoding="utf-8") as f:
+        assert list(json.load(f)["quota"].values()) == [UPLOAD_QUOTA_COST]
+    # The failed bundle can be retried within the same day
+    assert list(run(tmp_path, manifest).values()) == ["uploaded"]
+
+
+def test_uploads_and_failures_are_traced_under_the_batch(tmp_path, uploads, monkeypatch):
+    tracer = tracing.Tracer(str(tmp_path / "trace.jsonl"))
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    make_bundles(tmp_path / "output", ["2026-01-01", "2026-01-02", "2026-01-03"])
+
+    run(tmp_path, UploadManifest(str(tmp_path / "manifest.json")),
+        title_func=lambda topic: "fail" if "01-01" in topic else "ok")
+    tracer.close()
+
+    with open(tracer.path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    batch = next(record for record in records if record.get("name") == "youtube.batch_upload")
+    assert batch["attrs"] == {"bundles": 3, "uploaded": 2}
+    assert [record["parent"] for record in records if record.get("name") == "youtube.upload"] == [batch["id"]] * 3
+    errors = [record for record in records if record["type"] == "error"]
+    assert len(errors) == 1 and errors[0]["parent"] == batch["id"]
+    assert "connection reset" in errors[0]["message"]
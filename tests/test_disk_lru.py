@@ -0,0 +1,59 @@
+import os
+
+import disk_lru
+from disk_lru import SizeCap
+
+
+def write(path, nbytes, used):
+    with open(path, "wb") as f:
+        f.write(b"x" * nbytes)
+    os.utime(path, (used, used))
+    return nbytes
+
+
+def test_least_recently_used_entries_go_first(tmp_path):
+    cap = SizeCap(str(tmp_path), max_bytes=300, suffix=".json", companions=(".body",))
+    for used, name in enumerate("abc", 1):
+        cap.added(write(tmp_path / f"{name}.json", 10, used) + write(tmp_path / f"{name}.body", 90, used))
+    cap.added(write(tmp_path / "d.json", 100, 4))
+
+    # Evicted down to 90 % of the budget, with the body of an entry
+    assert sorted(os.listdir(tmp_path)) == ["c.body", "c.json", "d.json"]
+
+
+def test_directory_is_only_listed_over_budget(tmp_path, monkeypatch):
+    cap = SizeCap(str(tmp_path), max_bytes=1000, suffix=".npy")
+    listings = []
+    scan = cap._scan
+    monkeypatch.setattr(cap, "_scan", lambda: listings.append(1) or scan())
+
+    for i in range(9):
+        cap.added(write(tmp_path / f"{i}.npy", 100, i))
+    # Once for the starting total, the writes after that are counted
+    assert len(listings) == 1
+
+    cap.added(write(tmp_path / "9.npy", 200, 9))
+    assert len(listings) == 2
+    assert sorted(os.listdir(tmp_path)) == [f"{i}.npy" for i in range(2, 10)]
+
+    # Back under the low-water mark, the next write is counted again
+    cap.added(write(tmp_path / "10.npy", 50, 10))
+    assert len(listings) == 2
+
+
+def test_overestimated_total_is_corrected(tmp_path):
+    cap = SizeCap(str(tmp_path), max_bytes=250, suffix=".json")
+    cap.added(write(tmp_path / "a.json", 100, 1))
+    # An overwrite of the same entry is reported as new bytes
+    cap.added(write(tmp_path / "a.json", 100, 2))
+    cap.added(write(tmp_path / "a.json", 100, 3))
+
+    assert os.listdir(tmp_path) == ["a.json"]
+
+
+def test_mark_used_ignores_missing_files(tmp_path):
+    path = tmp_path / "a.json"
+    write(path, 1, 1)
+    disk_lru.mark_used(str(path))
+    assert os.path.getmtime(path) > 1
+    disk_lru.mark_used(str(tmp_path / "missing.json"))
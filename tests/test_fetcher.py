@@ -0,0 +1,92 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from fetcher import ContentTypeError, Fetcher, HostRateLimiter, HttpCache
+
+PAGE = b"<html><body>" + b"x" * 100000 + b"</body></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PAGE if self.path != "/doc.pdf" else b"%PDF-1.4"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf" if self.path == "/doc.pdf" else "text/html")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, args=(0.01,), daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return Fetcher(cache=HttpCache(str(tmp_path / "cache")))
+
+
+def test_fresh_entries_are_served_from_cache(server, fetcher):
+    assert fetcher.get(f"{server}/page").content == PAGE
+    response = fetcher.get(f"{server}/page")
+
+    assert response.from_cache and response.content == PAGE
+    assert len(Handler.requests) == 1
+
+
+def test_stale_entries_are_revalidated(server, fetcher):
+    fetcher.get(f"{server}/page")
+    response = fetcher.get(f"{server}/page", ttl=0)
+
+    assert response.from_cache and response.content == PAGE
+    assert Handler.requests[-1] == ("/page", '"v1"')
+    assert fetcher.stats["revalidated"] == 1
+
+
+def test_truncated_body_is_not_served_to_a_full_read(server, fetcher):
+    assert len(fetcher.get(f"{server}/page", max_bytes=1024).content) == 1024
+    # The same limit can reuse the short body
+    assert fetcher.get(f"{server}/page", max_bytes=1024).from_cache
+    assert len(fetcher.get(f"{server}/page", max_bytes=512).content) == 1024
+
+    response = fetcher.get(f"{server}/page")
+
+    assert not response.from_cache
+    assert response.content == PAGE
+    # No conditional request, a 304 would have confirmed the short body
+    assert Handler.requests[-1] == ("/page", None)
+    assert fetcher.get(f"{server}/page").content == PAGE
+
+
+def test_unwanted_content_type_is_rejected(server, fetcher):
+    with pytest.raises(ContentTypeError):
+        fetcher.get(f"{server}/doc.pdf", content_types=("text/html",))
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    limiter = HostRateLimiter(0.1)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait("https://a.example/page")
+    limiter.wait("https://b.example/page")
+
+    assert 0.2 <= time.monotonic() - start < 0.3
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from gemini_cache import CachedGeminiClient, ResponseCache
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = []
+
+    def generate_content(self, model, contents, **kwargs):
+        self.calls.append((model, contents, kwargs))
+        return Response(f"answer {len(self.calls)}")
+
+
+class FakeClient:
+    def __init__(self):
+        self.models = FakeModels()
+        self.files = "files api"
+
+
+@pytest.fixture
+def client(tmp_path):
+    return CachedGeminiClient(FakeClient(), ResponseCache(str(tmp_path / "cache")), enabled=True)
+
+
+def test_identical_requests_hit_the_cache(client):
+    first = client.models.generate_content(model="gemini-2.0-flash", contents="prompt")
+    second = client.models.generate_content(model="gemini-2.0-flash", contents="prompt")
+
+    assert second.text == first.text == "answer 1"
+    assert second.from_cache
+    assert len(client.client.models.calls) == 1
+    assert client.stats == {"hits": 1, "misses": 1}
+
+
+def test_model_prompt_and_config_are_part_of_the_key(client):
+    client.models.generate_content(model="gemini-2.0-flash", contents="prompt")
+    client.models.generate_content(model="gemini-2.0-pro", contents="prompt")
+    client.models.generate_content(model="gemini-2.0-flash", contents="other prompt")
+    client.models.generate_content(model="gemini-2.0-flash", contents="prompt", config={"temperature": 0})
+
+    assert len(client.client.models.calls) == 4
+    assert client.client.models.calls[-1][2] == {"config": {"temperature": 0}}
+
+
+def test_bypass_refreshes_the_entry(client):
+    client.models.generate_content(model="m", contents="prompt")
+    assert client.models.generate_content(model="m", contents="prompt", bypass_cache=True).text == "answer 2"
+    assert client.models.generate_content(model="m", contents="prompt").text == "answer 2"
+
+
+def test_disabled_cache_always_calls(tmp_path):
+    client = CachedGeminiClient(FakeClient(), ResponseCache(str(tmp_path)), enabled=False)
+    client.models.generate_content(model="m", contents="prompt")
+    client.models.generate_content(model="m", contents="prompt")
+    assert len(client.client.models.calls) == 2
+
+
+def test_async_requests_share_the_cache(client):
+    client.models.generate_content(model="m", contents="prompt")
+    response = asyncio.run(client.aio.models.generate_content(model="m", contents="prompt"))
+    assert response.from_cache and response.text == "answer 1"
+
+
+def test_other_attributes_reach_the_client(client):
+    assert client.files == "files api"
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.put("key", "m", "text")
+    assert cache.get("key") == "text"
+
+    # Age the entry as if it had been stored two minutes ago
+    path = os.path.join(str(tmp_path), "key.json")
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["stored_at"] = time.time() - 120
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+    assert cache.get("key") is None
+    assert not os.path.exists(path)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    cache.put("a", "m", "x" * 100)
+    os.utime(os.path.join(str(tmp_path), "a.json"), (1, 1))
+    cache.put("b", "m", "y" * 100)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "y" * 100
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import gemini_client
+from gemini_client import RateLimitedClient, TokenBucket, is_retryable, retry_after
+
+
+class ApiError(Exception):
+    def __init__(self, code, headers=None):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+class Response:
+    text = "ok"
+    usage_metadata = None
+
+
+class FlakyModels:
+    """Fails with the given errors in turn, then succeeds."""
+
+    def __init__(self, errors=(), delay=0.0):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents, **kwargs):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                threading.Event().wait(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return Response()
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class FakeClient:
+    def __init__(self, models):
+        self.models = models
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    """Upper bounds of the jittered backoffs; the waits themselves are skipped."""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append(high)
+        return 0.0
+
+    monkeypatch.setattr(gemini_client.random, "uniform", uniform)
+    return bounds
+
+
+def client_for(models, **kwargs):
+    kwargs.setdefault("requests_per_minute", 6000)
+    return RateLimitedClient(FakeClient(models), **kwargs)
+
+
+def test_transient_errors_are_retried_with_exponential_backoff(backoffs):
+    models = FlakyModels([ApiError(503), ApiError(429), ConnectionError(), ApiError(500)])
+    client = client_for(models, base_delay=1.0, max_delay=4.0)
+
+    assert client.models.generate_content(model="m", contents="prompt").text == "ok"
+    assert models.calls == 5
+    # Doubled on every attempt, capped at max_delay
+    assert backoffs == [1.0, 2.0, 4.0, 4.0]
+    assert client.stats["retries"] == 4 and client.stats["failures"] == 0
+
+
+def test_retry_after_is_honored(backoffs):
+    models = FlakyModels([ApiError(429, {"retry-after": "0.05"})])
+    client = client_for(models)
+
+    client.models.generate_content(model="m", contents="prompt")
+
+    assert models.calls == 2
+    assert backoffs == []
+
+
+def test_client_errors_are_not_retried(backoffs):
+    models = FlakyModels([ApiError(400)])
+    client = client_for(models)
+
+    with pytest.raises(ApiError):
+        client.models.generate_content(model="m", contents="prompt")
+    assert models.calls == 1
+    assert client.stats["failures"] == 1
+
+
+def test_gives_up_after_max_retries(backoffs):
+    models = FlakyModels([ApiError(503)] * 10)
+    client = client_for(models, max_retries=2)
+
+    with pytest.raises(ApiError):
+        client.models.generate_content(model="m", contents="prompt")
+    assert models.calls == 3
+
+
+def test_slow_attempts_time_out_and_are_retried(backoffs):
+    client = client_for(FlakyModels(delay=0.2), max_retries=1, timeout=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        client.models.generate_content(model="m", contents="prompt")
+    assert client.stats["retries"] == 1
+
+
+def test_concurrency_is_bounded():
+    models = FlakyModels(delay=0.05)
+    client = client_for(models, max_concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda i: client.models.generate_content(model="m", contents=str(i)), range(6)))
+
+    assert models.calls == 6
+    assert models.max_in_flight == 2
+
+
+def test_token_bucket_waits_for_refill():
+    async def take():
+        bucket = TokenBucket(per_minute=1200, capacity=2)
+        assert await bucket.acquire() == 0
+        assert await bucket.acquire() == 0
+        # 20 tokens a second, so the third one takes 50 ms
+        return await bucket.acquire()
+
+    assert asyncio.run(take()) == pytest.approx(0.05, abs=0.01)
+
+
+def test_error_classification():
+    assert is_retryable(ApiError(503)) and is_retryable(ConnectionError())
+    assert not is_retryable(ApiError(404)) and not is_retryable(ValueError())
+    assert retry_after(ApiError(429, {"retry-after": "7"})) == 7.0
+    assert retry_after(ApiError(429)) is None
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+import gutenberg_ingest
+from gutenberg_ingest import (MAX_PASSAGE_WORDS, MIN_PASSAGE_WORDS, ingest_book, iter_paragraphs, iter_passages,
+                              read_header)
+from passage_store import PassageStore
+
+BOOK = b"""The Project Gutenberg eBook of Meditations
+
+Title: Meditations
+Author: Marcus Aurelius
+
+*** START OF THE PROJECT GUTENBERG EBOOK MEDITATIONS ***
+
+THE FIRST BOOK
+
+I. Of my grandfather Verus I have learned to be gentle and meek, and to
+refrain from all anger and passion. From the fame and memory of him that
+begot me I have learned both shamefastness and manlike behaviour.
+
+II. Begin the morning by saying to thyself, I shall meet with the busy-body,
+the _ungrateful_, arrogant, deceitful, envious, unsocial.
+
+*** END OF THE PROJECT GUTENBERG EBOOK MEDITATIONS ***
+
+This license text must not become a passage, however many words it may have.
+"""
+
+
+def sentence(words):
+    return " ".join(["word"] * (words - 1) + ["end."]).capitalize()
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path / "meditations.txt"
+    path.write_bytes(BOOK)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PassageStore(str(tmp_path / "passages.db"))
+
+
+def test_only_the_text_between_the_markers_is_read():
+    paragraphs = list(iter_paragraphs(BOOK))
+
+    assert paragraphs[0] == "THE FIRST BOOK"
+    assert paragraphs[-1].startswith("II. Begin the morning")
+    # Line wrapping and italics are gone
+    assert "ungrateful, arrogant" in paragraphs[-1]
+    assert not any("license" in paragraph for paragraph in paragraphs)
+
+
+def test_header_fields():
+    assert read_header(BOOK) == {"title": "Meditations", "author": "Marcus Aurelius"}
+
+
+def test_headings_and_section_numbers_are_dropped():
+    passages = list(iter_passages(iter_paragraphs(BOOK)))
+
+    assert len(passages) == 2
+    assert passages[0].startswith("Of my grandfather")
+    assert passages[1].startswith("Begin the morning")
+
+
+def test_sentences_are_grouped_up_to_the_maximum():
+    paragraph = " ".join([sentence(30)] * 7)
+
+    passages = list(iter_passages([paragraph]))
+
+    assert [len(passage.split()) for passage in passages] == [90, 90, 30]
+    assert all(MIN_PASSAGE_WORDS <= len(passage.split()) <= MAX_PASSAGE_WORDS for passage in passages)
+
+
+def test_short_remainder_joins_the_previous_passage():
+    paragraph = " ".join([sentence(45), sentence(45), sentence(5)])
+
+    assert [len(passage.split()) for passage in iter_passages([paragraph])] == [95]
+
+
+def test_short_paragraphs_are_dropped():
+    assert list(iter_passages(["Know thyself, said the oracle."])) == []
+    assert list(iter_passages([sentence(MIN_PASSAGE_WORDS)])) == [sentence(MIN_PASSAGE_WORDS)]
+
+
+def test_unchanged_book_is_skipped(store, book, monkeypatch):
+    assert ingest_book(store, book) == 2
+    assert ingest_book(store, book) == -1
+    assert ingest_book(store, book, force=True) == 2
+
+    # A different size or modification time means the book changed
+    with open(book, "ab") as f:
+        f.write(b"\n")
+    assert ingest_book(store, book) == 2
+    stat = os.stat(book)
+    os.utime(book, (stat.st_atime, stat.st_mtime + 10))
+    assert ingest_book(store, book) == 2
+    assert store.books()[0]["passages"] == 2
+
+
+def test_main_ingests_and_searches(store, book, capsys):
+    assert gutenberg_ingest.main([book, "--db", store.db_path]) == 0
+    assert gutenberg_ingest.main([book, "--db", store.db_path]) == 0
+    assert gutenberg_ingest.main(["--db", store.db_path, "--search", "anger"]) == 0
+
+    out = capsys.readouterr().out
+    assert "2 passages" in out and "unchanged" in out
+    assert "[Meditations] Of my grandfather" in out
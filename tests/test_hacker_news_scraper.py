@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import hacker_news_scraper
+import tracing
+from fetcher import Fetcher
+from hacker_news_scraper import HackerNewsScraper, HostRateLimiter
+from story_store import StoryStore
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ARTICLE_COUNT = 8
+
+STORIES = [{"id": "1", "title": "First", "link": "https://a.example/", "points": "10",
+            "author": "pg", "comments": "2", "article_content": None}]
+
+
+def front_page(origin):
+    """A front page in the markup of news.ycombinator.com, linking to ARTICLE_COUNT local articles."""
+    rows = []
+    for rank in range(1, ARTICLE_COUNT + 1):
+        rows.append(
+            f'<tr class="athing submission" id="{1000 + rank}"><td class="title">'
+            f'<span class="titleline"><a href="{origin}/articles/{rank}.html">Story {rank}</a></span></td></tr>'
+            f'<tr><td class="subtext"><span class="subline">'
+            f'<span class="score" id="score_{1000 + rank}">{10 * rank} points</span> by '
+            f'<a href="user?id=user{rank}" class="hnuser">user{rank}</a> '
+            f'<a href="item?id={1000 + rank}">{rank}&nbsp;comments</a></span></td></tr>'
+        )
+    return f"<html><body><table>{''.join(rows)}</table></body></html>"
+
+
+def article(name):
+    number = name.split(".")[0]
+    return (f"<html><head><title>Article {number}</title></head><body>"
+            f"<article><p>Body of article {number}.</p></article></body></html>")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """
+    Serves fixtures/hn-api under /v0/, where unknown items are null as on
+    Firebase, the front page at /news and an article at /articles/<rank>.html.
+    """
+
+    requests = []
+
+    def do_GET(self):
+        FixtureHandler.requests.append(self.path)
+        content_type = "text/html; charset=utf-8"
+        if self.path.startswith("/v0/"):
+            path = os.path.join(FIXTURES, "hn-api", self.path[len("/v0/"):])
+            content_type = "application/json"
+            body = b"null"
+            if os.path.isfile(path):
+                with open(path, "rb") as f:
+                    body = f.read()
+        elif self.path == "/news":
+            body = front_page(f"http://{self.headers['Host']}").encode()
+        else:
+            body = article(self.path.rsplit("/", 1)[-1]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    FixtureHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=httpd.serve_forever, args=(0.01,), daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_api_backend_parses_recorded_items(server):
+    # Items 8863 and 121003 are the examples of the API documentation
+    scraper = HackerNewsScraper(backend="api", api_url=f"{server}/v0/", fetcher=Fetcher())
+
+    stories = scraper.get_top_stories(limit=5)
+
+    # The deleted item and the missing one are dropped, rank order is kept
+    assert [story["id"] for story in stories] == ["8863", "121003", "900001"]
+    dropbox, ask, show = stories
+    assert dropbox == {
+        "id": "8863",
+        "title": "My YC app: Dropbox - Throw away your USB drive",
+        "link": "http://www.getdropbox.com/u/2/screencast.html",
+        "points": "111",
+        "author": "dhouston",
+        "comments": "71",
+        "article_content": None,
+        "scraped_at": dropbox["scraped_at"],
+    }
+    # Ask HN posts link to their own item page
+    assert ask["link"] == "https://news.ycombinator.com/item?id=121003"
+    # Stories without comments have no descendants field
+    assert show["comments"] == "0"
+
+
+def test_api_backend_respects_the_limit(server):
+    scraper = HackerNewsScraper(backend="api", api_url=f"{server}/v0/", fetcher=Fetcher())
+    assert [story["id"] for story in scraper.get_top_stories(limit=2)] == ["8863", "121003"]
+    # Only the ranked ids and the two items are requested
+    assert sorted(FixtureHandler.requests) == ["/v0/item/121003.json", "/v0/item/8863.json", "/v0/topstories.json"]
+
+
+def html_scraper(server, **kwargs):
+    return HackerNewsScraper(base_url=f"{server}/news", fetcher=Fetcher(), **kwargs)
+
+
+def test_html_backend_parses_the_front_page(server):
+    stories = html_scraper(server, per_host_delay=0).get_top_stories(limit=5)
+
+    assert [story["id"] for story in stories] == ["1001", "1002", "1003", "1004", "1005"]
+    assert stories[1]["title"] == "Story 2"
+    assert stories[1]["link"] == f"{server}/articles/2.html"
+    assert (stories[1]["points"], stories[1]["author"], stories[1]["comments"]) == ("20", "user2", "2")
+
+
+def test_articles_are_only_fetched_when_asked_for(server):
+    html_scraper(server, per_host_delay=0).get_top_stories(limit=5)
+    assert FixtureHandler.requests == ["/news"]
+
+
+def test_articles_are_fetched_concurrently_in_rank_order(server):
+    scraper = html_scraper(server, max_workers=4, per_host_delay=0)
+    stories = scraper.get_top_stories(limit=ARTICLE_COUNT, fetch_articles=True)
+
+    assert [story["article_content"]["title"] for story in stories] == [
+        f"Article {rank}" for rank in range(1, ARTICLE_COUNT + 1)]
+    assert stories[0]["article_content"]["content"] == "Body of article 1."
+
+
+@pytest.mark.parametrize("backend", ["html", "api"])
+def test_spans_of_worker_threads_keep_their_parent(server, tmp_path, monkeypatch, backend):
+    tracer = tracing.Tracer(str(tmp_path / "trace.jsonl"))
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    scraper = HackerNewsScraper(backend=backend, base_url=f"{server}/news", api_url=f"{server}/v0/",
+                                fetcher=Fetcher(), max_workers=4, per_host_delay=0)
+
+    with tracing.span("tech/scrape") as stage:
+        scraper.get_top_stories(limit=4, fetch_articles=True)
+    tracer.close()
+
+    with open(tracer.path, encoding="utf-8") as f:
+        spans = [record for record in map(json.loads, f) if record["type"] == "span"]
+    top = next(span for span in spans if span["name"] == "hn.get_top_stories")
+    assert top["parent"] == stage.id
+    children = [span for span in spans if span["name"] in ("hn.article", "http.get")]
+    assert any(span["thread"] != threading.main_thread().name for span in children)
+    # Every request is in the scrape span or in an article span inside it
+    article_ids = {span["id"] for span in spans if span["name"] == "hn.article"}
+    assert all(span["parent"] in article_ids | {top["id"]} for span in children)
+
+
+def test_requests_to_one_host_are_spaced(server):
+    scraper = html_scraper(server, max_workers=8, per_host_delay=0.05)
+    stories = scraper.get_top_stories(limit=6)
+
+    start = time.monotonic()
+    scraper.fetch_articles(stories)
+
+    # Six article requests to one host, each at least 0.05 s after the one before
+    assert time.monotonic() - start >= 5 * 0.05
+
+
+def test_stored_articles_are_not_fetched_again(server, tmp_path):
+    store = StoryStore(str(tmp_path / "stories.db"))
+    scraper = html_scraper(server, per_host_delay=0, store=store)
+    stories = scraper.get_top_stories(limit=3, fetch_articles=True)
+    scraper.save_stories(stories, str(tmp_path / "stories.json"))
+    FixtureHandler.requests = []
+
+    again = [dict(story, article_content=None) for story in stories]
+    scraper.fetch_articles(again)
+
+    assert FixtureHandler.requests == []
+    assert [story["article_content"] for story in again] == [story["article_content"] for story in stories]
+
+
+def test_different_hosts_do_not_wait_on_each_other():
+    limiter = HostRateLimiter(min_interval=10)
+    limiter.wait("https://a.example/one")
+
+    start = time.monotonic()
+    limiter.wait("https://b.example/one")
+    assert time.monotonic() - start < 1
+
+
+@pytest.fixture
+def in_tmp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_main_returns_the_saved_stories(in_tmp, monkeypatch):
+    monkeypatch.setattr(HackerNewsScraper, "get_top_stories", lambda self, limit, fetch_articles: list(STORIES))
+
+    assert hacker_news_scraper.main([]) == STORIES
+    with open(in_tmp / "hacker_news_stories.json", encoding="utf-8") as f:
+        assert json.load(f) == STORIES
+
+
+def test_main_fails_despite_an_old_stories_file(in_tmp, monkeypatch):
+    (in_tmp / "hacker_news_stories.json").write_text(json.dumps(STORIES))
+    monkeypatch.setattr(HackerNewsScraper, "get_top_stories", lambda self, limit, fetch_articles: [])
+
+    assert hacker_news_scraper.main([]) == []
@@ -0,0 +1,105 @@
+import pytest
+
+import hacker_script
+from hacker_news_scraper import HackerNewsScraper
+from story_store import StoryStore
+
+STORY = {"id": "1", "title": "First", "link": "https://a.example/post", "points": "10",
+         "author": "pg", "comments": "2", "article_content": None}
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, model, contents, **kwargs):
+        self.prompts.append(contents)
+        return Response("script")
+
+
+@pytest.fixture
+def models(monkeypatch):
+    models = FakeModels()
+    client = type("Client", (), {"models": models})()
+    monkeypatch.setattr(hacker_script, "get_client", lambda: client)
+    monkeypatch.setattr(hacker_script, "gemini_report", lambda: "")
+    return models
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # The script stage and the scraper's cache use data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    store = StoryStore(hacker_script.STORIES_DB)
+    store.upsert_stories([STORY])
+    return store
+
+
+def test_trim_keeps_short_text():
+    assert hacker_script.trim_to_token_budget("  a short\n\ntext ") == "a short text"
+
+
+def test_trim_cuts_at_a_word_boundary():
+    text = " ".join(f"word{i}" for i in range(500))
+
+    trimmed = hacker_script.trim_to_token_budget(text)
+
+    # 200 tokens at 4 characters each, then the ellipsis
+    assert trimmed.endswith("...")
+    kept = trimmed[:-len("...")]
+    assert len(kept) <= 200 * 4
+    assert text.startswith(kept + " ")
+    assert kept.split()[-1] in text.split()
+
+
+def test_article_excerpt_is_trimmed_into_the_prompt(models):
+    article = " ".join(["lorem"] * 1000)
+    item = dict(STORY, article_content={"title": "First", "content": article})
+
+    hacker_script.create_tech_script([item])
+
+    prompt = models.prompts[0]
+    assert f"Article excerpt: {hacker_script.trim_to_token_budget(article)}\n" in prompt
+    assert article not in prompt
+
+
+def test_description_is_used_without_content(models):
+    item = dict(STORY, article_content={"title": "First", "description": "Short summary", "content": None})
+    hacker_script.create_tech_script([item])
+    assert "Article excerpt: Short summary\n" in models.prompts[0]
+
+
+def test_failed_article_fetch_degrades_to_the_title(store, models, monkeypatch):
+    monkeypatch.setattr(HackerNewsScraper, "_get_article_content", lambda self, url: None)
+
+    items = hacker_script.fetch_article_context([dict(STORY)])
+    hacker_script.create_tech_script(items)
+
+    assert items[0]["article_content"] is None
+    assert "Title: First\n" in models.prompts[0]
+    assert "Article excerpt" not in models.prompts[0]
+
+
+def test_stored_article_is_used_without_a_fetch(store, monkeypatch):
+    store.save_article_contents([dict(STORY, article_content={"title": "First", "content": "Stored text"})])
+    monkeypatch.setattr(HackerNewsScraper, "_get_article_content",
+                        lambda self, url: pytest.fail("the article was fetched again"))
+
+    items = hacker_script.fetch_article_context([dict(STORY)])
+
+    assert items[0]["article_content"]["content"] == "Stored text"
+
+
+def test_script_picks_uncovered_stories_and_marks_them(store, models, monkeypatch):
+    monkeypatch.setattr(HackerNewsScraper, "_get_article_content", lambda self, url: None)
+
+    assert hacker_script.main() is not None
+    assert store.top_uncovered() == []
+    # Nothing left to cover on the next run
+    assert hacker_script.main() is None
+    assert len(models.prompts) == 1
@@ -0,0 +1,65 @@
+import pytest
+
+from passage_store import PassageStore
+
+PASSAGES = [
+    "Refrain from all anger and passion, and be gentle and meek.",
+    "The fear of death is worse than death itself.",
+    "Anger is a brief madness that ruins the one who feels it.",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PassageStore(str(tmp_path / "passages.db"))
+    path = tmp_path / "letters.txt"
+    path.write_text("\n".join(PASSAGES))
+    store.replace_book("letters", str(path), "Letters", "Seneca", PASSAGES)
+    return store
+
+
+def test_search_ranks_matching_passages(store):
+    results = store.search("anger")
+
+    assert sorted(result["quote"] for result in results) == sorted([PASSAGES[0], PASSAGES[2]])
+    assert all(result["author"] == "Seneca" and result["source"] == "Letters" for result in results)
+
+
+def test_any_keyword_matches(store):
+    assert len(store.search("death madness")) == 2
+
+
+def test_author_filter(store):
+    assert store.search("anger", author="Marcus Aurelius") == []
+    assert len(store.search("anger", author="Seneca")) == 2
+
+
+@pytest.mark.parametrize("topic", [
+    'fear of "death',
+    "death AND",
+    "NOT death",
+    "death OR",
+    "(death",
+    "death*",
+    "text:death",
+    "NEAR(death fear)",
+    "^death",
+    "death -fear",
+    "it's death",
+])
+def test_fts5_syntax_in_the_topic_is_searched_as_words(store, topic):
+    results = store.search(topic)
+
+    assert PASSAGES[1] in [result["quote"] for result in results]
+
+
+@pytest.mark.parametrize("topic", ["", "   ", '"""', "*", "-"])
+def test_topic_without_words_finds_nothing(store, topic):
+    assert store.search(topic) == []
+
+
+def test_replacing_a_book_drops_its_old_passages(store, tmp_path):
+    store.replace_book("letters", str(tmp_path / "letters.txt"), "Letters", "Seneca", PASSAGES[:1])
+
+    assert store.search("death") == []
+    assert store.books()[0]["passages"] == 1
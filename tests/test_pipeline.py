@@ -0,0 +1,68 @@
+import json
+
+from pipeline import Pipeline, Stage, json_fingerprint
+from story_store import StoryStore
+
+STORIES = [
+    {"id": "1", "title": "First", "link": "https://a.example/", "points": "10", "comments": "2"},
+    {"id": "2", "title": "Second", "link": "https://b.example/", "points": "5", "comments": "0"},
+]
+
+
+def write_stories(path, stories, scraped_at):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([dict(story, scraped_at=scraped_at) for story in stories], f)
+
+
+def script_stage(tmp_path, runs):
+    stories_json = str(tmp_path / "stories.json")
+    stories_db = str(tmp_path / "stories.db")
+    script = tmp_path / "script.txt"
+
+    def run():
+        runs.append(1)
+        script.write_text("script")
+        return True
+
+    return Stage("script", run, inputs=[stories_json, stories_db], outputs=[str(script)],
+                 fingerprints={stories_json: json_fingerprint("scraped_at"),
+                               stories_db: lambda path: StoryStore(path).fingerprint()})
+
+
+def scrape(tmp_path, stories, scraped_at):
+    write_stories(tmp_path / "stories.json", stories, scraped_at)
+    StoryStore(str(tmp_path / "stories.db")).upsert_stories(stories)
+
+
+def run_pipeline(tmp_path, runs):
+    pipeline = Pipeline(state_file=str(tmp_path / "state.json"))
+    pipeline.add(script_stage(tmp_path, runs))
+    return pipeline.run()["script"]
+
+
+def test_rescrape_with_same_stories_skips(tmp_path):
+    runs = []
+    scrape(tmp_path, STORIES, "2026-01-01T08:00:00")
+    assert run_pipeline(tmp_path, runs) == "ran"
+
+    # Same stories, new timestamps in the JSON file and the database
+    scrape(tmp_path, STORIES, "2026-01-01T08:05:00")
+    assert run_pipeline(tmp_path, runs) == "skipped"
+    assert len(runs) == 1
+
+
+def test_changed_stories_rerun(tmp_path):
+    runs = []
+    scrape(tmp_path, STORIES, "2026-01-01T08:00:00")
+    run_pipeline(tmp_path, runs)
+
+    scrape(tmp_path, [dict(STORIES[0], points="11"), STORIES[1]], "2026-01-01T09:00:00")
+    assert run_pipeline(tmp_path, runs) == "ran"
+
+
+def test_json_fingerprint_ignores_nested_keys(tmp_path):
+    a, b = tmp_path / "a.json", tmp_path / "b.json"
+    a.write_text(json.dumps({"items": [{"x": 1, "scraped_at": "t1"}]}))
+    b.write_text(json.dumps({"items": [{"scraped_at": "t2", "x": 1}]}))
+    fingerprint = json_fingerprint("scraped_at")
+    assert fingerprint(str(a)) == fingerprint(str(b))
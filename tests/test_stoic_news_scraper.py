@@ -0,0 +1,118 @@
+import json
+import os
+
+import pytest
+
+import stoic_news_scraper
+import tracing
+from fetcher import Fetcher
+from stoic_news_scraper import (QUOTE_PAGE_TTL, merge_quotes, parse_page_count, parse_quotes_page,
+                                scrape_author_quotes, scrape_marcus_aurelius_quotes, scrape_quotes)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "goodreads")
+
+
+@pytest.fixture
+def quotes_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(stoic_news_scraper, "QUOTES_DIR", str(tmp_path))
+    # scrape_quotes reports the shared fetcher's stats, which would create data/http_cache
+    monkeypatch.setattr(stoic_news_scraper, "get_fetcher", lambda: Fetcher())
+    return tmp_path
+
+
+def fake_scrape(failing=()):
+    def scrape_author_quotes(author, *args, **kwargs):
+        if author in failing:
+            raise ConnectionError("goodreads unreachable")
+        return [{"quote": f"A quote of {author}.", "author": author}]
+    return scrape_author_quotes
+
+
+def test_parse_quotes_page():
+    with open(os.path.join(FIXTURES, "quotes-page-1.html"), "rb") as f:
+        html = f.read()
+    quotes = parse_quotes_page(html, "Marcus Aurelius")
+    assert quotes
+    assert all(quote["quote"] and quote["author"] == "Marcus Aurelius" for quote in quotes)
+    assert parse_page_count(html) >= 3
+
+
+def test_merge_quotes_skips_formatting_variants(tmp_path):
+    path = str(tmp_path / "quotes.json")
+    assert merge_quotes(path, [{"quote": "Waste no more time arguing."}]) == 1
+    assert merge_quotes(path, [{"quote": "waste no more time, arguing"}, {"quote": "Be good."}]) == 1
+    with open(path, encoding="utf-8") as f:
+        assert [quote["quote"] for quote in json.load(f)] == ["Waste no more time arguing.", "Be good."]
+
+
+def test_failed_author_gets_an_empty_file(quotes_dir, monkeypatch):
+    monkeypatch.setattr(stoic_news_scraper, "scrape_author_quotes", fake_scrape(failing=("seneca",)))
+
+    added = scrape_quotes()
+
+    assert added == {"marcus_aurelius": 1, "seneca": -1, "epictetus": 1}
+    with open(quotes_dir / "seneca_quotes.json", encoding="utf-8") as f:
+        assert json.load(f) == []
+
+
+def test_failed_author_keeps_earlier_quotes(quotes_dir, monkeypatch):
+    merge_quotes(str(quotes_dir / "seneca_quotes.json"), [{"quote": "Luck is preparation."}])
+    monkeypatch.setattr(stoic_news_scraper, "scrape_author_quotes", fake_scrape(failing=("seneca",)))
+
+    scrape_quotes(["seneca"])
+
+    with open(quotes_dir / "seneca_quotes.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 1
+
+
+def test_scrape_marcus_aurelius_quotes_returns_the_quotes(quotes_dir, monkeypatch):
+    monkeypatch.setattr(stoic_news_scraper, "scrape_author_quotes", fake_scrape())
+    assert scrape_marcus_aurelius_quotes() == [{"quote": "A quote of marcus_aurelius.", "author": "marcus_aurelius"}]
+
+    monkeypatch.setattr(stoic_news_scraper, "scrape_author_quotes", fake_scrape(failing=("marcus_aurelius",)))
+    assert scrape_marcus_aurelius_quotes() == []
+
+
+class FixtureResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureFetcher:
+    def __init__(self):
+        self.ttls = {}
+
+    def get(self, url, ttl=None, before_request=None, **kwargs):
+        page = int(url.rsplit("=", 1)[1])
+        self.ttls[page] = ttl
+        with tracing.span("http.get", url=url), open(os.path.join(FIXTURES, f"quotes-page-{page}.html"), "rb") as f:
+            return FixtureResponse(f.read())
+
+
+def test_only_later_pages_get_the_long_ttl(monkeypatch):
+    fetcher = FixtureFetcher()
+    monkeypatch.setattr(stoic_news_scraper, "get_fetcher", lambda: fetcher)
+
+    quotes = scrape_author_quotes("marcus_aurelius", max_pages=3, per_host_delay=0)
+
+    assert quotes
+    assert fetcher.ttls == {1: None, 2: QUOTE_PAGE_TTL, 3: QUOTE_PAGE_TTL}
+
+
+def test_page_requests_are_traced_under_their_author(tmp_path, monkeypatch):
+    tracer = tracing.Tracer(str(tmp_path / "trace.jsonl"))
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    monkeypatch.setattr(stoic_news_scraper, "get_fetcher", FixtureFetcher)
+
+    scrape_author_quotes("marcus_aurelius", max_pages=3, per_host_delay=0)
+    tracer.close()
+
+    with open(tracer.path, encoding="utf-8") as f:
+        spans = [record for record in map(json.loads, f) if record["type"] == "span"]
+    author = next(span for span in spans if span["name"] == "goodreads.author")
+    requests = [span for span in spans if span["name"] == "http.get"]
+    assert len(requests) == 3
+    assert all(span["parent"] == author["id"] for span in requests)
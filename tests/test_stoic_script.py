@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+import stoic_script
+from gemini_cache import CachedGeminiClient, ResponseCache
+from passage_store import PassageStore
+from stoic_script import MAX_SCRIPT_WORDS, MIN_SCRIPT_WORDS, create_quote_scripts_batch, parse_batch_response
+
+QUOTES = [
+    {"quote": "The obstacle is the way.", "author": "Marcus Aurelius"},
+    {"quote": "We suffer more in imagination than in reality.", "author": "Seneca"},
+    {"quote": "It's not what happens to you, but how you react to it that matters.", "author": "Epictetus"},
+]
+
+
+def script(words=75, tag="word"):
+    return " ".join([tag] * words)
+
+
+def batch(*items):
+    return json.dumps([{"index": index, "script": text} for index, text in items])
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    """Answers batch requests with the given responses in turn, single quotes with a script."""
+
+    def __init__(self, batch_responses):
+        self.batch_responses = list(batch_responses)
+        self.batch_calls = 0
+        self.single_calls = []
+
+    def generate_content(self, model, contents, config=None, **kwargs):
+        if config is not None:
+            self.batch_calls += 1
+            return Response(self.batch_responses.pop(0))
+        self.single_calls.append(contents)
+        return Response(script(tag="single"))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    def make(*batch_responses):
+        models = FakeModels(batch_responses)
+        client = CachedGeminiClient(type("Client", (), {"models": models})(),
+                                    ResponseCache(str(tmp_path / "cache")), enabled=True)
+        monkeypatch.setattr(stoic_script, "get_client", lambda: client)
+        return models
+    return make
+
+
+def test_valid_items_are_split_by_index():
+    text = batch((1, script(tag="b") + "\n"), (0, script(tag="a")))
+
+    assert parse_batch_response(text, 2) == {0: script(tag="a"), 1: script(tag="b")}
+
+
+@pytest.mark.parametrize("text", ["not json", '{"index": 0, "script": "x"}', "null"])
+def test_malformed_responses_yield_nothing(text):
+    assert parse_batch_response(text, 3) == {}
+
+
+def test_word_count_bounds():
+    text = batch((0, script(MIN_SCRIPT_WORDS - 1)), (1, script(MIN_SCRIPT_WORDS)),
+                 (2, script(MAX_SCRIPT_WORDS)), (3, script(MAX_SCRIPT_WORDS + 1)))
+
+    assert sorted(parse_batch_response(text, 4)) == [1, 2]
+
+
+def test_bad_and_duplicate_indices_are_skipped():
+    items = [{"index": -1, "script": script()}, {"index": 3, "script": script()},
+             {"index": "0", "script": script()}, {"index": 0, "script": script(tag="first")},
+             {"index": 0, "script": script(tag="second")}, {"index": 1, "script": None},
+             {"index": 2}, "not an object"]
+
+    assert parse_batch_response(json.dumps(items), 3) == {0: script(tag="first")}
+
+
+def test_complete_batch_needs_one_request(client):
+    models = client(batch((0, script(tag="a")), (1, script(tag="b")), (2, script(tag="c"))))
+
+    assert create_quote_scripts_batch(QUOTES) == [script(tag="a"), script(tag="b"), script(tag="c")]
+    assert models.batch_calls == 1
+    assert models.single_calls == []
+
+
+def test_missing_scripts_are_generated_per_quote(client):
+    # The first response lacks quote 2 and has a short script for quote 1, the retry fixes quote 1 only
+    models = client(batch((0, script(tag="a")), (1, "too short")),
+                    batch((0, script(tag="x")), (1, script(tag="b"))))
+
+    scripts = create_quote_scripts_batch(QUOTES)
+
+    assert scripts == [script(tag="a"), script(tag="b"), script(tag="single")]
+    assert models.batch_calls == 2
+    assert len(models.single_calls) == 1 and QUOTES[2]["quote"] in models.single_calls[0]
+
+
+def test_incomplete_cached_response_is_not_reused(client):
+    client(batch((0, script(tag="a"))), batch((0, script(tag="a"))))
+    create_quote_scripts_batch(QUOTES)
+
+    # The stored response is incomplete, so it is requested again and replaced by the good one
+    models = client(batch((0, script(tag="a")), (1, script(tag="b")), (2, script(tag="c"))))
+    assert create_quote_scripts_batch(QUOTES) == [script(tag="a"), script(tag="b"), script(tag="c")]
+    assert models.batch_calls == 1
+    assert create_quote_scripts_batch(QUOTES) == [script(tag="a"), script(tag="b"), script(tag="c")]
+    assert models.batch_calls == 1
+
+
+@pytest.fixture
+def scripted(tmp_path, monkeypatch):
+    # Quotes, passages and scripts are read and written relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "quotes").mkdir(parents=True)
+    (tmp_path / "data" / "quotes" / "seneca_quotes.json").write_text(json.dumps(QUOTES[1:2]))
+    picked = []
+    monkeypatch.setattr(stoic_script, "create_quote_script", lambda quote: picked.append(quote) or script())
+    monkeypatch.setattr(stoic_script, "gemini_report", lambda: "")
+    return picked
+
+
+def test_topic_without_a_passage_index_falls_back_to_quotes(scripted):
+    assert stoic_script.main(["--topic", "anger"]) is not None
+    assert scripted == QUOTES[1:2]
+
+
+@pytest.mark.parametrize("topic", ["zebra", 'anger" OR', "NOT (", '"'])
+def test_topic_without_matching_passages_falls_back_to_quotes(scripted, tmp_path, topic):
+    store = PassageStore(stoic_script.PASSAGES_DB)
+    book = tmp_path / "letters.txt"
+    book.write_text("Letters")
+    store.replace_book("letters", str(book), "Letters", "Seneca", ["The fear of death is worse than death."])
+
+    assert stoic_script.main(["--topic", topic]) is not None
+    assert scripted == QUOTES[1:2]
+
+
+def test_topic_picks_a_matching_passage(scripted, tmp_path):
+    store = PassageStore(stoic_script.PASSAGES_DB)
+    book = tmp_path / "letters.txt"
+    book.write_text("Letters")
+    store.replace_book("letters", str(book), "Letters", "Seneca", ["The fear of death is worse than death."])
+
+    stoic_script.main(["--topic", "death"])
+
+    assert scripted[0]["quote"] == "The fear of death is worse than death."
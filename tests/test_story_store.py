@@ -0,0 +1,87 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from story_store import StoryStore
+
+STORIES = [
+    {"id": "1", "title": "First", "link": "https://a.example/", "author": "pg", "points": "10", "comments": "2"},
+    {"id": "2", "title": "Second", "link": "https://b.example/", "author": "dang", "points": "5", "comments": "0"},
+    {"id": "3", "title": "Third", "link": "https://c.example/", "author": "luu", "points": "1", "comments": "1"},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return StoryStore(str(tmp_path / "stories.db"))
+
+
+def ids(stories):
+    return [story["id"] for story in stories]
+
+
+def test_top_uncovered_follows_the_rank(store):
+    store.upsert_stories(STORIES)
+    assert ids(store.top_uncovered(limit=2)) == ["1", "2"]
+
+
+def test_covered_story_is_not_picked_again(store):
+    store.upsert_stories(STORIES)
+    store.mark_covered(["1", "3"])
+
+    # Still on the front page the next day, but already in a video
+    store.upsert_stories(STORIES)
+    assert ids(store.top_uncovered()) == ["2"]
+
+
+def test_latest_scrape_comes_first(store):
+    store.upsert_stories(STORIES)
+    store.upsert_stories(list(reversed(STORIES[1:])))
+
+    # Stories of the newer scrape by their rank there, then the one that dropped off
+    assert ids(store.top_uncovered()) == ["3", "2", "1"]
+
+
+def test_stories_gone_from_the_front_page_expire(store):
+    store.upsert_stories(STORIES)
+    last_week = (datetime.now() - timedelta(days=7)).isoformat()
+    with sqlite3.connect(store.db_path) as conn:
+        conn.execute("UPDATE stories SET last_seen = ? WHERE id = 1", (last_week,))
+
+    assert ids(store.top_uncovered()) == ["2", "3"]
+
+
+def test_snapshots_record_every_scrape(store):
+    store.upsert_stories(STORIES)
+    store.upsert_stories([dict(STORIES[0], points="25", comments="9")])
+
+    assert [(s["points"], s["comments"]) for s in store.get_snapshots("1")] == [(10, 2), (25, 9)]
+    assert store.top_uncovered(limit=1)[0]["points"] == "25"
+
+
+def test_fingerprint_changes_with_the_stories_only(store):
+    store.upsert_stories(STORIES)
+    before = store.fingerprint()
+
+    # Seeing the same stories again only adds timestamps and snapshots
+    store.upsert_stories(STORIES)
+    assert store.fingerprint() == before
+
+    store.upsert_stories([dict(STORIES[0], points="11")] + STORIES[1:])
+    changed = store.fingerprint()
+    assert changed != before
+
+    store.mark_covered(["2"])
+    assert store.fingerprint() != changed
+
+
+def test_article_contents_are_kept_by_later_scrapes(store):
+    store.upsert_stories(STORIES)
+    store.save_article_contents([dict(STORIES[0], article_content={"title": "A", "content": "Text"})])
+
+    # A scrape without article content does not wipe the stored one
+    store.upsert_stories([dict(STORIES[0], article_content=None)])
+
+    assert store.get_article_contents(["1", "2"]) == {"1": {"title": "A", "content": "Text"}}
+    assert store.top_uncovered(limit=1)[0]["article_content"] == {"title": "A", "content": "Text"}
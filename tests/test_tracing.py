@@ -0,0 +1,132 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+from tracing import NULL_SPAN, Tracer
+
+
+@pytest.fixture
+def tracer(tmp_path, monkeypatch):
+    tracer = Tracer(str(tmp_path / "trace.jsonl"))
+    monkeypatch.setattr(tracing, "_tracer", tracer)
+    yield tracer
+    tracer.close()
+
+
+def records(tracer):
+    tracer.close()
+    with open(tracer.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def spans(tracer):
+    return {record["name"]: record for record in records(tracer) if record["type"] == "span"}
+
+
+def test_spans_nest(tracer):
+    with tracing.span("stage", channel="tech") as outer:
+        with tracing.span("http.get", url="https://a.example/") as inner:
+            inner.set(status=200)
+    with tracing.span("stage.next"):
+        pass
+
+    finished = spans(tracer)
+    assert finished["stage"]["parent"] is None
+    assert finished["http.get"]["parent"] == outer.id
+    assert finished["http.get"]["attrs"] == {"url": "https://a.example/", "status": 200}
+    assert finished["stage.next"]["parent"] is None
+
+
+def test_pool_work_keeps_its_parent(tracer):
+    def fetch(i):
+        with tracing.span("fetch", i=i):
+            # Keeps several calls inside the copied context at the same time
+            barrier.wait()
+        return i
+
+    barrier = threading.Barrier(4)
+    with tracing.span("batch") as batch:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert list(executor.map(tracing.in_context(fetch), range(4))) == [0, 1, 2, 3]
+
+    fetches = [record for record in records(tracer) if record.get("name") == "fetch"]
+    assert len(fetches) == 4
+    assert all(record["parent"] == batch.id for record in fetches)
+
+
+def test_pool_work_without_the_context_has_no_parent(tracer):
+    def fetch():
+        with tracing.span("fetch"):
+            pass
+
+    with tracing.span("batch"):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(fetch).result()
+
+    assert spans(tracer)["fetch"]["parent"] is None
+
+
+def test_errors_are_printed_and_recorded_under_their_span(tracer, capsys):
+    with tracing.span("hn.get_top_stories") as span:
+        tracing.error("hn.item_errors", "Error getting item 1: timeout", item=1)
+    tracing.error("hn.item_errors", "Error getting item 2: timeout")
+
+    assert capsys.readouterr().out.splitlines() == ["Error getting item 1: timeout", "Error getting item 2: timeout"]
+    errors = [record for record in records(tracer) if record["type"] == "error"]
+    assert [error["parent"] for error in errors] == [span.id, None]
+    assert errors[0]["message"] == "Error getting item 1: timeout"
+    assert errors[0]["attrs"] == {"item": 1}
+    assert tracer.summary()["counters"] == {"hn.item_errors": 2}
+
+
+def test_summary_aggregates_spans_and_ends_the_trace(tracer):
+    for _ in range(3):
+        with tracing.span("http.get"):
+            pass
+    with pytest.raises(ValueError):
+        with tracing.span("http.get"):
+            raise ValueError("bad gateway")
+    with tracing.span("hn.article") as span:
+        span.fail("not html")
+    tracing.count("http.hits", 2)
+    tracing.count("http.hits")
+
+    written = records(tracer)
+    summary = written[-1]
+    assert summary["type"] == "summary"
+    assert summary["errors"] == 2
+    assert summary["spans"]["http.get"]["count"] == 4
+    assert summary["spans"]["http.get"]["errors"] == 1
+    assert summary["spans"]["http.get"]["max_seconds"] <= summary["spans"]["http.get"]["seconds"]
+    assert summary["counters"] == {"http.hits": 3}
+    assert [record["error"] for record in written if "error" in record] == ["ValueError: bad gateway", "not html"]
+    assert "http.get" in tracer.report()
+    # Closing again writes nothing
+    assert tracer.close() is None
+    assert len(records(tracer)) == len(written)
+
+
+def test_disabled_tracer_does_nothing(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(tracing, "_tracer", Tracer())
+    monkeypatch.chdir(tmp_path)
+
+    def work():
+        pass
+
+    with tracing.span("stage", channel="tech") as span:
+        span.set(stories=5)
+        span.fail("ignored")
+        tracing.count("http.hits")
+    tracing.error("hn.item_errors", "Error getting item 1")
+
+    assert span is NULL_SPAN and not span
+    assert tracing.in_context(work) is work
+    assert tracing.get_tracer().summary()["spans"] == {}
+    assert tracing.get_tracer().summary()["counters"] == {}
+    assert tracing.get_tracer().close() is None
+    # Errors are still printed, and no trace is written
+    assert capsys.readouterr().out == "Error getting item 1\n"
+    assert list(tmp_path.iterdir()) == []
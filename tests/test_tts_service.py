@@ -0,0 +1,225 @@
+import os
+import re
+import socket
+import stat
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import tts_service
+from tts_cache import SegmentCache
+from tts_service import TTSClient, TTSService, daemon_authkey, get_synthesizer, serve
+
+
+class FakeService:
+    def warm_up(self):
+        pass
+
+    def synthesize(self, text, voice, lang_code):
+        for word in text.split():
+            yield np.full(4, len(word), dtype=np.float32)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_daemon(authkey):
+    address = ("127.0.0.1", free_port())
+    threading.Thread(target=serve, args=(address, authkey, FakeService()), daemon=True).start()
+    for _ in range(100):
+        try:
+            socket.create_connection(address, timeout=0.1).close()
+            return address
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError("daemon did not start")
+
+
+def test_daemon_key_is_generated_private(tmp_path, monkeypatch):
+    monkeypatch.delenv("TTS_DAEMON_AUTHKEY", raising=False)
+    key_file = str(tmp_path / "data" / "tts_daemon.key")
+
+    assert daemon_authkey(key_file=key_file) is None
+    key = daemon_authkey(create=True, key_file=key_file)
+    assert len(key) == 64
+    assert stat.S_IMODE((tmp_path / "data" / "tts_daemon.key").stat().st_mode) == 0o600
+    # Clients read the same key back
+    assert daemon_authkey(key_file=key_file) == key
+
+    monkeypatch.setenv("TTS_DAEMON_AUTHKEY", "from-env")
+    assert daemon_authkey(key_file=key_file) == b"from-env"
+
+
+def test_client_with_the_daemon_key(monkeypatch):
+    address = start_daemon(b"secret")
+
+    synthesizer = get_synthesizer(address, b"secret")
+
+    assert isinstance(synthesizer, TTSClient)
+    chunks = list(synthesizer.synthesize("one three"))
+    assert [chunk[0] for chunk in chunks] == [3, 5]
+
+
+def test_wrong_key_falls_back_to_in_process(monkeypatch):
+    address = start_daemon(b"secret")
+    local = FakeService()
+    monkeypatch.setattr(tts_service, "get_tts_service", lambda: local)
+
+    assert get_synthesizer(address, b"wrong") is local
+
+
+class FakePipeline:
+    """
+    Chunks like Kokoro: paragraphs, then sentences packed up to 12 words per
+    chunk. Phonemes are the upper-cased text and the audio is derived from them.
+    """
+
+    loaded = []
+    synthesized = []
+
+    def __init__(self, lang_code, model=True):
+        self.model = model
+        FakePipeline.loaded.append(model)
+
+    def load_voice(self, voice):
+        pass
+
+    def chunks(self, text):
+        for paragraph in re.split(r"\n+", text.strip()):
+            chunk = []
+            for sentence in re.split(r"(?<=[.!?])\s+", paragraph.strip()):
+                if chunk and len(" ".join(chunk + [sentence]).split()) > 12:
+                    yield " ".join(chunk)
+                    chunk = []
+                chunk.append(sentence)
+            if chunk:
+                yield " ".join(chunk)
+
+    def __call__(self, text, voice=None):
+        for graphemes in self.chunks(text):
+            phonemes = graphemes.upper()
+            yield graphemes, phonemes, self.audio(phonemes) if self.model else None
+
+    def generate_from_tokens(self, tokens, voice=None):
+        yield "", tokens, self.audio(tokens)
+
+    def audio(self, phonemes):
+        FakePipeline.synthesized.append(phonemes)
+        return np.frombuffer(phonemes.encode(), dtype=np.uint8).astype(np.float32) / 255
+
+
+SCRIPT = ("Stop scrolling. The obstacle is the way. Focus on what you control.\n"
+          "Let the rest go. Waste no more time arguing about what a good man should be. Be one.")
+
+
+@pytest.fixture
+def fake_pipeline():
+    FakePipeline.loaded = []
+    FakePipeline.synthesized = []
+    return FakePipeline
+
+
+def cached_service(tmp_path, model_version="1"):
+    return TTSService(pipeline_factory=FakePipeline, cache=SegmentCache(str(tmp_path / "tts_cache")),
+                      model_version=model_version)
+
+
+def test_cached_audio_is_the_uncached_audio(fake_pipeline, tmp_path):
+    uncached = list(TTSService(pipeline_factory=FakePipeline).synthesize(SCRIPT))
+    cold = list(cached_service(tmp_path).synthesize(SCRIPT))
+    warm = list(cached_service(tmp_path).synthesize(SCRIPT))
+
+    # Kokoro's chunks, not sentences: the model sees the same input either way
+    assert len(uncached) == 4
+    for chunks in (cold, warm):
+        assert len(chunks) == len(uncached)
+        for chunk, expected in zip(chunks, uncached):
+            np.testing.assert_array_equal(chunk, expected)
+
+
+def test_fully_cached_script_does_not_load_the_model(fake_pipeline, tmp_path):
+    list(cached_service(tmp_path).synthesize(SCRIPT))
+    FakePipeline.loaded = []
+    FakePipeline.synthesized = []
+
+    service = cached_service(tmp_path)
+    list(service.synthesize(SCRIPT))
+
+    assert FakePipeline.loaded == [False]
+    assert FakePipeline.synthesized == []
+    assert service.cache.stats == {"hits": 4, "misses": 0}
+
+
+def test_only_changed_chunks_are_synthesized(fake_pipeline, tmp_path):
+    list(cached_service(tmp_path).synthesize(SCRIPT))
+    FakePipeline.synthesized = []
+
+    edited = SCRIPT.replace("Be one.", "Be one today.")
+    chunks = list(cached_service(tmp_path).synthesize(edited))
+
+    assert FakePipeline.synthesized == ["BE ONE TODAY."]
+    assert len(chunks) == 4
+
+
+def test_voice_and_model_version_are_part_of_the_key(fake_pipeline, tmp_path):
+    list(cached_service(tmp_path).synthesize(SCRIPT))
+    FakePipeline.synthesized = []
+
+    list(cached_service(tmp_path).synthesize(SCRIPT, voice="am_adam"))
+    list(cached_service(tmp_path, model_version="2").synthesize(SCRIPT))
+
+    assert len(FakePipeline.synthesized) == 8
+
+
+def test_segment_cache_round_trip(tmp_path):
+    cache = SegmentCache(str(tmp_path))
+    key = SegmentCache.key("HELLO.", "af_heart", "a", "1")
+
+    assert cache.get(key) is None
+    cache.put(key, np.arange(4, dtype=np.float64))
+
+    audio = cache.get(key)
+    assert audio.dtype == np.float32
+    np.testing.assert_array_equal(audio, [0, 1, 2, 3])
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_parallel_chunks_come_in_script_order(fake_pipeline, tmp_path):
+    expected = list(TTSService(pipeline_factory=FakePipeline).synthesize(SCRIPT))
+    # The first and third chunk are cached, the others go to the workers
+    list(cached_service(tmp_path).synthesize("Stop scrolling. The obstacle is the way. Focus on what you control."))
+    list(cached_service(tmp_path).synthesize("Waste no more time arguing about what a good man should be."))
+
+    service = cached_service(tmp_path)
+    chunks = list(service.synthesize_parallel(SCRIPT, workers=2, batch_size=1))
+
+    assert len(chunks) == len(expected)
+    for chunk, audio in zip(chunks, expected):
+        np.testing.assert_array_equal(chunk, audio)
+    assert service.cache.stats == {"hits": 2, "misses": 2}
+    # The workers' chunks were cached on the way
+    list(service.synthesize(SCRIPT))
+    assert service.cache.stats == {"hits": 6, "misses": 2}
+
+
+def test_worker_thread_limit_is_set_before_the_factory_loads(monkeypatch):
+    seen = []
+
+    def factory(lang_code, model=True):
+        seen.append(os.environ["OMP_NUM_THREADS"])
+        return FakePipeline(lang_code, model)
+
+    monkeypatch.setattr(tts_service.pickle, "loads", lambda data: factory)
+    # Restored afterwards, as is the worker's service
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.setenv(name, "1")
+    monkeypatch.setattr(tts_service, "_worker_service", None)
+    tts_service._init_worker(b"", "a", "af_heart", 3)
+
+    assert seen == ["3"]
+    assert os.environ["MKL_NUM_THREADS"] == "3"
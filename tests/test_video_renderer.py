@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import video_renderer
+from video_renderer import render_video
+
+# Stands in for ffmpeg: logs a lot before it reads its input, then writes the output file
+FAKE_FFMPEG = """#!{python}
+import sys
+sys.stderr.write("frame= progress\\n" * 20000)
+sys.stderr.flush()
+frames = sys.stdin.buffer.read()
+if {fail}:
+    sys.stderr.write("Unknown encoder 'libx264'\\n")
+    sys.exit(1)
+with open(sys.argv[-1], "wb") as f:
+    f.write(b"mp4" + str(len(frames)).encode())
+"""
+
+
+@pytest.fixture
+def voiceover(tmp_path):
+    path = tmp_path / "voiceover.wav"
+    sf.write(path, np.zeros(24000, dtype=np.float32), 24000)
+    return str(path)
+
+
+def fake_ffmpeg(tmp_path, monkeypatch, fail=False):
+    path = tmp_path / "ffmpeg"
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable, fail=fail))
+    os.chmod(path, 0o755)
+    monkeypatch.setattr(video_renderer, "FFMPEG", str(path))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs an executable script as ffmpeg")
+def test_verbose_ffmpeg_does_not_block(tmp_path, monkeypatch, voiceover):
+    fake_ffmpeg(tmp_path, monkeypatch)
+    output = tmp_path / "video.mp4"
+
+    render_video(voiceover, str(output), np.zeros((640, 360, 3), dtype=np.uint8), fps=10)
+
+    # One second of 360x640 yuv420p frames at 10 fps
+    assert output.read_bytes() == b"mp4" + str(10 * 360 * 640 * 3 // 2).encode()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs an executable script as ffmpeg")
+def test_ffmpeg_errors_are_reported(tmp_path, monkeypatch, voiceover):
+    fake_ffmpeg(tmp_path, monkeypatch, fail=True)
+
+    with pytest.raises(RuntimeError, match="Unknown encoder"):
+        render_video(voiceover, str(tmp_path / "video.mp4"), np.zeros((640, 360, 3), dtype=np.uint8), fps=10)
+    assert not (tmp_path / "video.mp4").exists()
+
+
+# Writes a partial output file, then reads frames until its input is closed
+PARTIAL_FFMPEG = """#!{python}
+import sys
+with open(sys.argv[-1], "wb") as f:
+    f.write(b"partial")
+sys.stdin.buffer.read()
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs an executable script as ffmpeg")
+def test_interrupted_render_kills_ffmpeg_and_removes_the_partial_file(tmp_path, monkeypatch, voiceover):
+    path = tmp_path / "ffmpeg"
+    path.write_text(PARTIAL_FFMPEG.format(python=sys.executable))
+    os.chmod(path, 0o755)
+    monkeypatch.setattr(video_renderer, "FFMPEG", str(path))
+    output = tmp_path / "video.mp4"
+    partial = tmp_path / "video.mp4.tmp.mp4"
+    processes = []
+    real_popen = subprocess.Popen
+
+    class InterruptedStdin:
+        def __init__(self, stdin):
+            self.stdin = stdin
+
+        def write(self, data):
+            # Ctrl+C once ffmpeg has started writing its output
+            for _ in range(500):
+                if partial.exists():
+                    raise KeyboardInterrupt
+                time.sleep(0.01)
+            raise AssertionError("ffmpeg did not start")
+
+        def close(self):
+            self.stdin.close()
+
+    def popen(*args, **kwargs):
+        process = real_popen(*args, **kwargs)
+        process.stdin = InterruptedStdin(process.stdin)
+        processes.append(process)
+        return process
+
+    monkeypatch.setattr(video_renderer.subprocess, "Popen", popen)
+
+    with pytest.raises(KeyboardInterrupt):
+        render_video(voiceover, str(output), np.zeros((640, 360, 3), dtype=np.uint8), fps=10)
+
+    assert processes[0].returncode is not None
+    assert not partial.exists()
+    assert not output.exists()
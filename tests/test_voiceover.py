@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import voiceover
+from tts_service import SAMPLE_RATE
+
+
+class FakeSynthesizer:
+    def synthesize(self, text, voice, lang_code):
+        for i, word in enumerate(text.split()):
+            yield np.linspace(-0.5, 0.5, 240 * (i + 1), dtype=np.float32)
+
+
+@pytest.fixture
+def script(tmp_path, monkeypatch):
+    monkeypatch.setattr(voiceover, "get_synthesizer", lambda: FakeSynthesizer())
+    path = tmp_path / "script.txt"
+    path.write_text("Ünïcode script here", encoding="utf-8")
+    return str(path)
+
+
+def generate(script, tmp_path, **kwargs):
+    return voiceover.generate_voiceover("tech", script, str(tmp_path / "out" / "voiceover.wav"),
+                                        voice="af_heart", lang_code="a", **kwargs)
+
+
+@pytest.mark.parametrize("stream", [True, False])
+def test_both_modes_return_float_samples(script, tmp_path, stream):
+    audio = generate(script, tmp_path, stream=stream)
+
+    assert audio.dtype == np.float32
+    assert audio.shape == (240 * 6,)
+    written, rate = sf.read(str(tmp_path / "out" / "voiceover.wav"), dtype="float32")
+    assert rate == SAMPLE_RATE
+    np.testing.assert_allclose(audio, written, atol=1 / 32768)
+
+
+def test_streamed_samples_match_the_in_memory_ones(script, tmp_path):
+    streamed = generate(script, tmp_path, stream=True)
+    in_memory = generate(script, tmp_path, stream=False)
+    # Only 16-bit quantization apart
+    np.testing.assert_allclose(streamed, in_memory, atol=1 / 32768)
+
+
+def test_samples_can_be_skipped(script, tmp_path):
+    assert generate(script, tmp_path, return_audio=False) is None
+    assert sf.info(str(tmp_path / "out" / "voiceover.wav")).frames == 240 * 6
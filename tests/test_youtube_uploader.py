@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import stat
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import build_http
+
+import youtube_uploader
+
+
+class FakeCredentials:
+    def to_json(self):
+        return '{"token": "secret"}'
+
+
+def test_token_file_is_private(tmp_path, monkeypatch):
+    token_file = tmp_path / "youtube_token.json"
+    monkeypatch.setattr(youtube_uploader, "TOKEN_FILE", str(token_file))
+    # A leftover temp file from a crashed run must not pass its permissions on
+    tmp_file = tmp_path / "youtube_token.json.tmp"
+    tmp_file.write_text("stale")
+    os.chmod(tmp_file, 0o644)
+
+    youtube_uploader._save_credentials(FakeCredentials())
+
+    assert token_file.read_text() == '{"token": "secret"}'
+    assert stat.S_IMODE(token_file.stat().st_mode) == 0o600
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """Speaks the resumable upload protocol; `fail_puts` lists PUT numbers answered with a 503."""
+
+    protocol_version = "HTTP/1.1"
+    origin = ""
+    sessions = {}
+    posts = 0
+    puts = []
+    fail_puts = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        UploadHandler.posts += 1
+        session = f"session{UploadHandler.posts}"
+        self.sessions[session] = b""
+        self._send(200, b"", {"Location": f"{self.origin}/upload/{session}"})
+
+    def do_PUT(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        session = self.path.rsplit("/", 1)[-1]
+        content_range = self.headers.get("Content-Range", "")
+        UploadHandler.puts.append((session, content_range))
+        if session not in self.sessions:
+            self._send(404, b"Session expired")
+            return
+        received = self.sessions[session]
+        if content_range.startswith("bytes */"):
+            self._send(308, b"", {"Range": f"bytes=0-{len(received) - 1}"} if received else {})
+            return
+        if len(UploadHandler.puts) in self.fail_puts:
+            self._send(503, b"Backend error")
+            return
+        first, last, total = map(int, re.match(r"bytes (\d+)-(\d+)/(\d+)", content_range).groups())
+        assert first == len(received)
+        self.sessions[session] = received + body
+        if last + 1 < total:
+            self._send(308, b"", {"Range": f"bytes=0-{last}"})
+        else:
+            self._send(200, json.dumps({"id": f"video-{session}"}).encode(), {"Content-Type": "application/json"})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+CHUNK = 256 * 1024
+VIDEO = bytes(range(256)) * (3 * CHUNK // 256) + b"tail"
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    UploadHandler.sessions = {}
+    UploadHandler.posts = 0
+    UploadHandler.puts = []
+    UploadHandler.fail_puts = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UploadHandler)
+    UploadHandler.origin = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True).start()
+    # No backoff waits
+    monkeypatch.setattr(youtube_uploader.random, "uniform", lambda low, high: 0)
+
+    document = json.loads(get_static_doc("youtube", "v3"))
+    document["rootUrl"] = f"{UploadHandler.origin}/"
+    # build_http keeps httplib2 from treating the 308 of a resumable upload as a redirect
+    yield build_from_document(document, http=build_http())
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(VIDEO)
+    return str(path)
+
+
+def upload(youtube, video, tmp_path, **kwargs):
+    return youtube_uploader.upload_video(youtube, video, "Title", "Description", chunk_size=CHUNK,
+                                         state_dir=str(tmp_path / "state"), **kwargs)
+
+
+def test_upload_in_chunks(youtube, video, tmp_path):
+    assert upload(youtube, video, tmp_path) == {"id": "video-session1"}
+    assert UploadHandler.sessions["session1"] == VIDEO
+    assert len(UploadHandler.puts) == 4
+    # A finished upload leaves no session behind
+    assert os.listdir(tmp_path / "state") == []
+
+
+def test_failed_chunk_is_retried(youtube, video, tmp_path):
+    UploadHandler.fail_puts = {2}
+
+    assert upload(youtube, video, tmp_path) == {"id": "video-session1"}
+    assert UploadHandler.sessions["session1"] == VIDEO
+    assert UploadHandler.posts == 1
+
+
+def test_interrupted_upload_resumes_in_a_new_process(youtube, video, tmp_path):
+    UploadHandler.fail_puts = {3}
+    with pytest.raises(RuntimeError):
+        upload(youtube, video, tmp_path, max_retries=0)
+    assert len(UploadHandler.sessions["session1"]) == 2 * CHUNK
+
+    # A fresh call finds the saved session and sends only the rest
+    UploadHandler.puts = []
+    assert upload(youtube, video, tmp_path) == {"id": "video-session1"}
+    assert UploadHandler.posts == 1
+    assert UploadHandler.puts[0] == ("session1", f"bytes {2 * CHUNK}-{3 * CHUNK - 1}/{len(VIDEO)}")
+    assert UploadHandler.sessions["session1"] == VIDEO
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_expired_session_starts_over(youtube, video, tmp_path, monkeypatch, status):
+    UploadHandler.fail_puts = {3}
+    with pytest.raises(RuntimeError):
+        upload(youtube, video, tmp_path, max_retries=0)
+
+    # The server forgets the session, as YouTube does after about a week
+    del UploadHandler.sessions["session1"]
+    monkeypatch.setattr(UploadHandler, "_send", expire(UploadHandler._send, status))
+
+    assert upload(youtube, video, tmp_path) == {"id": "video-session2"}
+    assert UploadHandler.sessions["session2"] == VIDEO
+
+
+def expire(send, status):
+    def send_with_status(self, code, body, headers=None):
+        return send(self, status if code == 404 else code, body, headers)
+    return send_with_status